@@ -0,0 +1,669 @@
+"""
+Alertas de um período: faixas sem cobertura e funcionários com mais de 6
+dias seguidos de trabalho
+
+O período é carregado em poucas consultas (funcionários, faixas, escalas,
+folgas e férias) e os alertas saem das matrizes do período (MatrizEscala):
+as sequências de trabalho por diferença ao longo de funcionário x dia e as
+faixas vazias pela ocupação dia x faixa, checadas contra o índice de
+cobertura (cobertura.IndiceCobertura) das faixas ocupadas no dia.
+
+Os alertas ficam gravados na tabela alerta e são mantidos a cada commit:
+alterações de escalas, folgas e férias (eventos do ORM ou a gravação em
+lote) marcam os funcionários e dias afetados, e antes do commit só os
+alertas de excesso desses funcionários, em volta das datas alteradas, e os
+de cobertura desses dias são recalculados, carregando só essas datas. As
+telas leem a tabela (alertas_do_periodo), com uma consulta pelo índice
+(admin_id, data_referencia); um período ainda sem alertas gravados é
+calculado por inteiro na primeira leitura, em uma sessão à parte, e
+registrado em periodo_alertas.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from sqlalchemy import delete, event, insert, inspect, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased, object_session
+
+from models import (
+    db,
+    Alerta,
+    PeriodoAlertas,
+    Funcionario,
+    FaixaHorario,
+    EscalaDiaria,
+    Folga,
+    Ferias,
+)
+from matriz_escala import MatrizEscala
+from scheduling_context import SchedulingContext
+from cobertura import IndiceCobertura
+from alteracoes import (
+    ALTERACOES_ALERTAS,
+    admin_do_funcionario,
+    enviar_alteracoes,
+    intervalo_de_datas,
+    marcar_alteracoes,
+    valores_do_atributo,
+)
+
+# Mais que isso de dias seguidos de trabalho gera alerta
+MAX_DIAS_CONSECUTIVOS = 6
+
+# Colunas que identificam um alerta gravado (as linhas iguais são mantidas,
+# com o mesmo id e o mesmo "resolvido")
+COLUNAS_ALERTA = ("tipo", "data_referencia", "funcionario_id", "faixa_horario_id")
+
+# Atributos de funcionários e faixas que mudam os alertas gravados
+ATRIBUTOS_FUNCIONARIO = ("nome", "ativo", "admin_id")
+ATRIBUTOS_FAIXA = (
+    "hora_inicio",
+    "hora_fim",
+    "ativo",
+    "ativo_semana",
+    "ativo_fds",
+    "admin_id",
+)
+
+# (admin_id, primeiro_dia) dos períodos que este processo já viu em
+# periodo_alertas (as linhas de lá não são apagadas)
+_periodos_materializados = set()
+
+
+def esquecer_periodos_materializados():
+    """
+    Descarta a lista em memória dos períodos com alertas gravados (para
+    quando o banco é recriado, como nos testes e no benchmark)
+    """
+    _periodos_materializados.clear()
+
+
+def calcular_alertas(admin_id, primeiro_dia, ultimo_dia):
+    """
+    Lista de alertas do admin entre primeiro_dia e ultimo_dia: primeiro os
+    de excesso de dias (por funcionário e data), depois os de cobertura
+    (por data e faixa)
+    """
+    matriz, faixas, escalas, nomes = _carregar_periodo(
+        admin_id, primeiro_dia, ultimo_dia
+    )
+    return alertas_excesso_dias(matriz, nomes) + alertas_sem_cobertura(
+        matriz, faixas, escalas
+    )
+
+
+def _carregar_periodo(admin_id, primeiro_dia, ultimo_dia, sessao=None):
+    """
+    (matriz, faixas, escalas, nomes) do período: a matriz tem os
+    funcionários ativos e todas as faixas do admin (ativas primeiro)
+    """
+    sessao = sessao or db.session
+    funcionarios = sessao.execute(
+        select(Funcionario.id, Funcionario.nome).where(
+            Funcionario.admin_id == admin_id, Funcionario.ativo == True
+        )
+    ).all()
+
+    faixas = _faixas_do_admin(admin_id, sessao)
+
+    escalas = sessao.execute(
+        select(
+            EscalaDiaria.funcionario_id,
+            EscalaDiaria.faixa_horario_id,
+            EscalaDiaria.data,
+        )
+        .join(FaixaHorario)
+        .where(
+            FaixaHorario.admin_id == admin_id,
+            EscalaDiaria.data >= primeiro_dia,
+            EscalaDiaria.data <= ultimo_dia,
+        )
+    ).all()
+
+    matriz = MatrizEscala(
+        [func_id for func_id, _ in funcionarios],
+        [faixa.id for faixa in faixas],
+        primeiro_dia,
+        ultimo_dia,
+    )
+    _definir_ausencias(matriz, admin_id, sessao)
+    matriz.definir_escalas(escalas)
+
+    return matriz, faixas, escalas, dict(funcionarios)
+
+
+def _escalas_dos_funcionarios(admin_id, primeiro_dia, ultimo_dia, funcionarios, sessao):
+    """
+    Tuplas (funcionario_id, faixa_horario_id, data, nome) das escalas dos
+    funcionarios ativos (IDs; None = todos) entre as datas
+    """
+    consulta = (
+        select(
+            EscalaDiaria.funcionario_id,
+            EscalaDiaria.faixa_horario_id,
+            EscalaDiaria.data,
+            Funcionario.nome,
+        )
+        .join(FaixaHorario)
+        .join(Funcionario, Funcionario.id == EscalaDiaria.funcionario_id)
+        .where(
+            FaixaHorario.admin_id == admin_id,
+            Funcionario.ativo == True,
+            EscalaDiaria.data >= primeiro_dia,
+            EscalaDiaria.data <= ultimo_dia,
+        )
+    )
+    if funcionarios is not None:
+        consulta = consulta.where(EscalaDiaria.funcionario_id.in_(funcionarios))
+    return sessao.execute(consulta).all()
+
+
+def _definir_ausencias(matriz, admin_id, sessao, funcionarios=None):
+    """
+    Folgas e férias do admin (ou só dos funcionarios) nas datas da matriz
+    """
+    primeiro_dia, ultimo_dia = matriz.dias[0], matriz.dias[-1]
+    consulta = (
+        select(Folga.funcionario_id, Folga.data)
+        .join(Funcionario)
+        .where(
+            Funcionario.admin_id == admin_id,
+            Folga.data >= primeiro_dia,
+            Folga.data <= ultimo_dia,
+        )
+    )
+    if funcionarios is not None:
+        consulta = consulta.where(Folga.funcionario_id.in_(funcionarios))
+    folgas = sessao.execute(consulta).all()
+
+    consulta = (
+        select(Ferias.funcionario_id, Ferias.data_inicio, Ferias.data_fim)
+        .join(Funcionario)
+        .where(
+            Funcionario.admin_id == admin_id,
+            Ferias.data_fim >= primeiro_dia,
+            Ferias.data_inicio <= ultimo_dia,
+        )
+    )
+    if funcionarios is not None:
+        consulta = consulta.where(Ferias.funcionario_id.in_(funcionarios))
+    ferias = sessao.execute(consulta).all()
+
+    ferias_por_funcionario = {}
+    for func_id, inicio, fim in ferias:
+        ferias_por_funcionario.setdefault(func_id, []).append(
+            {"inicio": inicio, "fim": fim}
+        )
+    matriz.definir_ferias(ferias_por_funcionario)
+    matriz.definir_folgas(
+        {"funcionario_id": func_id, "data": data} for func_id, data in folgas
+    )
+
+
+def _faixas_do_admin(admin_id, sessao):
+    # Faixas inativas não geram alerta, mas as escalas nelas contam como
+    # trabalho e como cobertura das outras faixas
+    faixas = (
+        sessao.execute(select(FaixaHorario).where(FaixaHorario.admin_id == admin_id))
+        .scalars()
+        .all()
+    )
+    faixas.sort(key=lambda faixa: not faixa.ativo)
+    return faixas
+
+
+def alertas_excesso_dias(matriz, nomes, funcionarios=None):
+    """
+    Um alerta por sequência de mais de MAX_DIAS_CONSECUTIVOS dias com
+    escala, sem folga nem férias. nomes: funcionario_id -> nome;
+    funcionarios limita aos IDs informados.
+    """
+    alertas = []
+    for i, d, comprimento in zip(
+        *(
+            array.tolist()
+            for array in matriz.sequencias_de_trabalho(MAX_DIAS_CONSECUTIVOS)
+        )
+    ):
+        func_id = int(matriz.funcionario_ids[i])
+        if funcionarios is not None and func_id not in funcionarios:
+            continue
+        inicio = matriz.dias[d]
+        fim = matriz.dias[d + comprimento - 1]
+        alertas.append(
+            {
+                "tipo": "excesso_dias",
+                "severidade": "alerta",
+                "mensagem": f'{nomes[func_id]} trabalhou {comprimento} dias consecutivos (de {inicio.strftime("%d/%m")} a {fim.strftime("%d/%m")})',
+                "data_referencia": inicio,
+                "funcionario_id": func_id,
+                "funcionario_nome": nomes[func_id],
+            }
+        )
+    return alertas
+
+
+def alertas_sem_cobertura(matriz, faixas, escalas, dias=None):
+    """
+    Um alerta por faixa ativa no tipo de dia, sem ninguém escalado e cujo
+    horário não é coberto pelas faixas ocupadas do dia. faixas na ordem dos
+    índices da matriz; escalas: tuplas (funcionario_id, faixa_horario_id,
+    data) de qualquer funcionário; dias limita às datas informadas.
+    """
+    total_dias = len(matriz.dias)
+    ocupadas = np.zeros((total_dias, len(faixas)), dtype=bool)
+    for _, faixa_id, data in escalas:
+        ocupadas[matriz.indice_dia(data), matriz.indice_faixa[faixa_id]] = True
+
+    eh_fds = matriz.dia_da_semana >= 5
+    ativa_semana = np.array(
+        [bool(faixa.ativo and faixa.ativo_semana) for faixa in faixas], dtype=bool
+    )
+    ativa_fds = np.array(
+        [bool(faixa.ativo and faixa.ativo_fds) for faixa in faixas], dtype=bool
+    )
+    ativas = np.where(eh_fds[:, None], ativa_fds, ativa_semana)
+    if dias is not None:
+        selecionados = np.zeros(total_dias, dtype=bool)
+        selecionados[[d for d in map(matriz.indice_dia, dias) if d is not None]] = True
+        ativas &= selecionados[:, None]
+
+    # Um índice de cobertura por padrão de faixas ocupadas no dia (dias
+    # com o mesmo padrão reaproveitam o índice)
+    indices = {}
+    alertas = []
+    for d, k in zip(*(array.tolist() for array in np.nonzero(ativas & ~ocupadas))):
+        padrao = ocupadas[d].tobytes()
+        if padrao not in indices:
+            indices[padrao] = IndiceCobertura.das_faixas(
+                faixas[j] for j in np.flatnonzero(ocupadas[d]).tolist()
+            )
+        if indices[padrao].cobre_faixa(faixas[k]):
+            continue
+
+        faixa = faixas[k]
+        data = matriz.dias[d]
+        tipo_dia = "fim de semana" if eh_fds[d] else "dia de semana"
+        alertas.append(
+            {
+                "tipo": "sem_cobertura",
+                "severidade": "critico",
+                "mensagem": f'Faixa {faixa.hora_inicio}-{faixa.hora_fim} sem cobertura no dia {data.strftime("%d/%m/%Y")} ({tipo_dia})',
+                "data_referencia": data,
+                "faixa_horario_id": faixa.id,
+                "faixa_hora_inicio": faixa.hora_inicio,
+                "faixa_hora_fim": faixa.hora_fim,
+            }
+        )
+    return alertas
+
+
+# Tabela de alertas
+
+
+def recalcular_alertas(admin_id, primeiro_dia, ultimo_dia, sessao=None):
+    """
+    Recalcula todos os alertas gravados do período. Só a diferença é
+    gravada, na sessão informada (padrão db.session). Não faz commit.
+    """
+    sessao = sessao or db.session
+    matriz, faixas, escalas, nomes = _carregar_periodo(
+        admin_id, primeiro_dia, ultimo_dia, sessao
+    )
+    _gravar_diferenca(
+        sessao,
+        admin_id,
+        alertas_excesso_dias(matriz, nomes)
+        + alertas_sem_cobertura(matriz, faixas, escalas),
+        [
+            Alerta.tipo.in_(["excesso_dias", "sem_cobertura"])
+            & Alerta.data_referencia.between(primeiro_dia, ultimo_dia)
+        ],
+    )
+
+
+def _recalcular_excesso(
+    admin_id, primeiro_dia, ultimo_dia, funcionarios, datas, sessao
+):
+    """
+    Alertas de excesso dos funcionarios (IDs; None = todos) em volta das
+    datas alteradas do período. Carrega só as datas ± MAX_DIAS_CONSECUTIVOS;
+    se alguém tem escala no primeiro ou no último dia da janela, uma
+    sequência pode continuar fora dela e aquele lado vai até o limite do
+    período.
+    Retorna (alertas, filtro dos alertas gravados que eles substituem).
+    """
+    margem = timedelta(days=MAX_DIAS_CONSECUTIVOS)
+    inicio = max(primeiro_dia, min(datas) - margem)
+    fim = min(ultimo_dia, max(datas) + margem)
+    while True:
+        escalas = _escalas_dos_funcionarios(admin_id, inicio, fim, funcionarios, sessao)
+        # Escala na borda da janela: a sequência pode vir de fora dela (folgas
+        # e férias ainda não foram lidas, então isso basta para estender)
+        datas_com_escala = {data for _, _, data, _ in escalas}
+        estender_inicio = inicio > primeiro_dia and inicio in datas_com_escala
+        estender_fim = fim < ultimo_dia and fim in datas_com_escala
+        if not (estender_inicio or estender_fim):
+            break
+        if estender_inicio:
+            inicio = primeiro_dia
+        if estender_fim:
+            fim = ultimo_dia
+
+    nomes = {func_id: nome for func_id, _, _, nome in escalas}
+    matriz = MatrizEscala(
+        list(nomes), list({faixa_id for _, faixa_id, _, _ in escalas}), inicio, fim
+    )
+    if nomes:
+        _definir_ausencias(matriz, admin_id, sessao, list(nomes))
+    matriz.definir_escalas(escala[:3] for escala in escalas)
+
+    filtro = (Alerta.tipo == "excesso_dias") & Alerta.data_referencia.between(
+        inicio, fim
+    )
+    if funcionarios is not None:
+        filtro &= Alerta.funcionario_id.in_(funcionarios)
+    return alertas_excesso_dias(matriz, nomes), filtro
+
+
+def _recalcular_cobertura(admin_id, dias, sessao):
+    """
+    Alertas de cobertura dos dias (datas), com só as escalas desses dias.
+    Retorna (alertas, filtro dos alertas gravados que eles substituem).
+    """
+    faixas = _faixas_do_admin(admin_id, sessao)
+    escalas = sessao.execute(
+        select(
+            EscalaDiaria.funcionario_id,
+            EscalaDiaria.faixa_horario_id,
+            EscalaDiaria.data,
+        )
+        .join(FaixaHorario)
+        .where(FaixaHorario.admin_id == admin_id, EscalaDiaria.data.in_(dias))
+    ).all()
+    matriz = MatrizEscala([], [faixa.id for faixa in faixas], min(dias), max(dias))
+
+    filtro = (Alerta.tipo == "sem_cobertura") & Alerta.data_referencia.in_(dias)
+    return alertas_sem_cobertura(matriz, faixas, escalas, dias), filtro
+
+
+def _gravar_diferenca(sessao, admin_id, novos, filtros):
+    """
+    Deixa os alertas gravados do admin que passam em algum dos filtros
+    iguais a novos: apaga os que sumiram, insere os que faltam e mantém os
+    iguais (mesmo id e mesmo "resolvido")
+    """
+    existentes = sessao.execute(
+        select(
+            Alerta.id, Alerta.mensagem, *(Alerta.__table__.c[c] for c in COLUNAS_ALERTA)
+        )
+        .where(Alerta.admin_id == admin_id, or_(*filtros))
+        .order_by(Alerta.id)
+    ).all()
+
+    desejados = {_chave_alerta(alerta): alerta for alerta in novos}
+    mantidos = set()
+    ids_removidos = []
+    for alerta_id, mensagem, *colunas in existentes:
+        chave = (mensagem, *colunas)
+        if chave in desejados and chave not in mantidos:
+            mantidos.add(chave)
+        else:
+            ids_removidos.append(alerta_id)
+
+    if ids_removidos:
+        sessao.execute(delete(Alerta).where(Alerta.id.in_(ids_removidos)))
+    linhas = [
+        {
+            "admin_id": admin_id,
+            "tipo": alerta["tipo"],
+            "severidade": alerta["severidade"],
+            "mensagem": alerta["mensagem"],
+            "data_referencia": alerta["data_referencia"],
+            "funcionario_id": alerta.get("funcionario_id"),
+            "faixa_horario_id": alerta.get("faixa_horario_id"),
+        }
+        for chave, alerta in desejados.items()
+        if chave not in mantidos
+    ]
+    if linhas:
+        sessao.execute(insert(Alerta), linhas)
+
+
+def _chave_alerta(alerta):
+    return (
+        alerta["mensagem"],
+        alerta["tipo"],
+        alerta["data_referencia"],
+        alerta.get("funcionario_id"),
+        alerta.get("faixa_horario_id"),
+    )
+
+
+def _materializar_periodo(admin_id, primeiro_dia, ultimo_dia):
+    """
+    Calcula os alertas do período por inteiro e o registra em
+    periodo_alertas, se ainda não estiver lá. Usa uma sessão própria: a da
+    requisição não recebe commit nem tem os objetos expirados.
+    """
+    with Session(db.engine) as sessao:
+        ja_gravado = sessao.execute(
+            select(PeriodoAlertas.id).where(
+                PeriodoAlertas.admin_id == admin_id,
+                PeriodoAlertas.primeiro_dia == primeiro_dia,
+            )
+        ).first()
+        if ja_gravado:
+            return
+        recalcular_alertas(admin_id, primeiro_dia, ultimo_dia, sessao=sessao)
+        sessao.execute(
+            insert(PeriodoAlertas).values(admin_id=admin_id, primeiro_dia=primeiro_dia)
+        )
+        try:
+            sessao.commit()
+        except IntegrityError:
+            # Outro processo gravou o período ao mesmo tempo
+            sessao.rollback()
+
+
+def alertas_do_periodo(admin_id, ano, mes):
+    """
+    Alertas não resolvidos do período, lidos da tabela (mesmos dicts e
+    ordem de verificar_alertas_escalas). Não altera a sessão: um período
+    ainda sem alertas gravados é calculado à parte (_materializar_periodo).
+    """
+    primeiro_dia, ultimo_dia = SchedulingContext.limites_periodo(ano, mes)
+
+    if (admin_id, primeiro_dia) not in _periodos_materializados:
+        _materializar_periodo(admin_id, primeiro_dia, ultimo_dia)
+        _periodos_materializados.add((admin_id, primeiro_dia))
+
+    faixa = aliased(FaixaHorario)
+    linhas = db.session.execute(
+        select(Alerta, Funcionario.nome, faixa.hora_inicio, faixa.hora_fim)
+        .outerjoin(Funcionario, Funcionario.id == Alerta.funcionario_id)
+        .outerjoin(faixa, faixa.id == Alerta.faixa_horario_id)
+        .where(
+            Alerta.admin_id == admin_id,
+            Alerta.data_referencia.between(primeiro_dia, ultimo_dia),
+            Alerta.resolvido == False,
+        )
+        .order_by(
+            Alerta.tipo,
+            Alerta.funcionario_id,
+            Alerta.data_referencia,
+            Alerta.faixa_horario_id,
+        )
+    ).all()
+
+    alertas = []
+    for alerta, funcionario_nome, hora_inicio, hora_fim in linhas:
+        dados = {
+            "tipo": alerta.tipo,
+            "severidade": alerta.severidade,
+            "mensagem": alerta.mensagem,
+            "data_referencia": alerta.data_referencia,
+        }
+        if alerta.tipo == "excesso_dias":
+            dados["funcionario_id"] = alerta.funcionario_id
+            dados["funcionario_nome"] = funcionario_nome
+        else:
+            dados["faixa_horario_id"] = alerta.faixa_horario_id
+            dados["faixa_hora_inicio"] = hora_inicio
+            dados["faixa_hora_fim"] = hora_fim
+        alertas.append(dados)
+    return alertas
+
+
+# Alterações pendentes até o commit
+
+
+@event.listens_for(Session, "before_commit")
+def _recalcular_pendentes(session):
+    # O recálculo usa só Core e não gera novas alterações
+    enviar_alteracoes(session)
+    alteracoes = session.info.pop(ALTERACOES_ALERTAS, None)
+    if not alteracoes:
+        return
+
+    for admin_id, pendentes in alteracoes.items():
+        periodos = {}
+
+        def periodo_da(data):
+            return periodos.setdefault(
+                SchedulingContext.periodo_da_data(data),
+                {"funcionarios": set(), "datas": set(), "dias": set()},
+            )
+
+        for func_id, datas in pendentes["funcionarios"].items():
+            for data in datas:
+                periodo = periodo_da(data)
+                periodo["funcionarios"].add(func_id)
+                periodo["datas"].add(data)
+        for data in pendentes["dias"]:
+            periodo_da(data)["dias"].add(data)
+
+        for (ano, mes), periodo in periodos.items():
+            novos = []
+            filtros = []
+            if periodo["datas"]:
+                funcionarios = periodo["funcionarios"]
+                alertas, filtro = _recalcular_excesso(
+                    admin_id,
+                    *SchedulingContext.limites_periodo(ano, mes),
+                    None if None in funcionarios else funcionarios,
+                    periodo["datas"],
+                    session,
+                )
+                novos += alertas
+                filtros.append(filtro)
+            if periodo["dias"]:
+                alertas, filtro = _recalcular_cobertura(
+                    admin_id, periodo["dias"], session
+                )
+                novos += alertas
+                filtros.append(filtro)
+            _gravar_diferenca(session, admin_id, novos, filtros)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendentes(session):
+    session.info.pop(ALTERACOES_ALERTAS, None)
+
+
+@event.listens_for(EscalaDiaria, "after_insert")
+@event.listens_for(EscalaDiaria, "after_update")
+@event.listens_for(EscalaDiaria, "after_delete")
+def _escala_alterada(mapper, connection, escala):
+    session = object_session(escala)
+    datas = valores_do_atributo(escala, "data")
+    for func_id in set(valores_do_atributo(escala, "funcionario_id")):
+        marcar_alteracoes(
+            session,
+            admin_do_funcionario(connection, func_id),
+            datas,
+            [func_id],
+            cobertura=False,
+        )
+    for faixa_id in set(valores_do_atributo(escala, "faixa_horario_id")):
+        admin_id = connection.execute(
+            select(FaixaHorario.admin_id).where(FaixaHorario.id == faixa_id)
+        ).scalar()
+        marcar_alteracoes(session, admin_id, datas, [])
+
+
+@event.listens_for(Folga, "after_insert")
+@event.listens_for(Folga, "after_update")
+@event.listens_for(Folga, "after_delete")
+def _folga_alterada(mapper, connection, folga):
+    for func_id in set(valores_do_atributo(folga, "funcionario_id")):
+        marcar_alteracoes(
+            object_session(folga),
+            admin_do_funcionario(connection, func_id),
+            valores_do_atributo(folga, "data"),
+            [func_id],
+            cobertura=False,
+        )
+
+
+@event.listens_for(Ferias, "after_insert")
+@event.listens_for(Ferias, "after_update")
+@event.listens_for(Ferias, "after_delete")
+def _ferias_alteradas(mapper, connection, ferias):
+    datas = set()
+    for inicio in valores_do_atributo(ferias, "data_inicio"):
+        for fim in valores_do_atributo(ferias, "data_fim"):
+            datas.update(intervalo_de_datas(inicio, fim))
+
+    for func_id in set(valores_do_atributo(ferias, "funcionario_id")):
+        marcar_alteracoes(
+            object_session(ferias),
+            admin_do_funcionario(connection, func_id),
+            datas,
+            [func_id],
+            cobertura=False,
+        )
+
+
+@event.listens_for(Funcionario, "after_update")
+@event.listens_for(FaixaHorario, "after_update")
+def _cadastro_alterado(mapper, connection, alvo):
+    atributos = (
+        ATRIBUTOS_FAIXA if isinstance(alvo, FaixaHorario) else ATRIBUTOS_FUNCIONARIO
+    )
+    estado = inspect(alvo)
+    if any(estado.attrs[atributo].history.has_changes() for atributo in atributos):
+        _marcar_cadastro(connection, alvo)
+
+
+@event.listens_for(Funcionario, "after_delete")
+@event.listens_for(FaixaHorario, "after_insert")
+@event.listens_for(FaixaHorario, "after_delete")
+def _cadastro_incluido_ou_removido(mapper, connection, alvo):
+    # Funcionário novo ainda não tem escalas nem alertas
+    _marcar_cadastro(connection, alvo)
+
+
+def _marcar_cadastro(connection, alvo):
+    """
+    Nome, ativo e horários mudam os alertas de todos os períodos já
+    gravados do admin: os de excesso do funcionário ou a cobertura de todos
+    os dias, recalculados no commit como as outras alterações
+    """
+    session = object_session(alvo)
+    for admin_id in set(valores_do_atributo(alvo, "admin_id")):
+        datas = []
+        for primeiro_dia in connection.execute(
+            select(PeriodoAlertas.primeiro_dia).where(
+                PeriodoAlertas.admin_id == admin_id
+            )
+        ).scalars():
+            ultimo_dia = SchedulingContext.limites_periodo(
+                primeiro_dia.year, primeiro_dia.month
+            )[1]
+            datas.extend(intervalo_de_datas(primeiro_dia, ultimo_dia))
+        if isinstance(alvo, FaixaHorario):
+            marcar_alteracoes(session, admin_id, datas, [])
+        else:
+            marcar_alteracoes(session, admin_id, datas, [alvo.id], cobertura=False)
@@ -0,0 +1,67 @@
+"""
+Registro das alterações feitas em uma sessão, até o commit
+
+Funções comuns aos listeners do ORM (alertas, dias_pendentes) e à gravação
+em lote (persistencia): os valores atuais e anteriores de um atributo, o
+admin de um funcionário e as marcas, em session.info, dos alertas que
+precisam ser recalculados no commit.
+"""
+
+from datetime import timedelta
+
+from sqlalchemy import inspect, select
+
+from models import Funcionario
+
+# Chave dos alertas a recalcular em session.info
+ALTERACOES_ALERTAS = "alertas_pendentes"
+
+
+def valores_do_atributo(alvo, atributo):
+    """
+    Valor atual e, numa alteração, o valor anterior do atributo
+    """
+    historico = inspect(alvo).attrs[atributo].history
+    valores = [getattr(alvo, atributo)]
+    valores.extend(historico.deleted or ())
+    return [valor for valor in valores if valor is not None]
+
+
+def admin_do_funcionario(connection, funcionario_id):
+    return connection.execute(
+        select(Funcionario.admin_id).where(Funcionario.id == funcionario_id)
+    ).scalar()
+
+
+def intervalo_de_datas(inicio, fim):
+    dia = inicio
+    while dia <= fim:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def enviar_alteracoes(session):
+    """
+    Flush dos objetos ainda não enviados, para que as alterações deles
+    cheguem aos listeners antes dos hooks de before_commit
+    """
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+
+
+def marcar_alteracoes(session, admin_id, datas, funcionarios=None, cobertura=True):
+    """
+    Registra na sessão que os alertas do admin nas datas precisam ser
+    recalculados: excesso dos funcionarios (IDs; None = todos do admin) e,
+    com cobertura=True, a cobertura dos dias
+    """
+    if admin_id is None:
+        return
+    pendentes = session.info.setdefault(ALTERACOES_ALERTAS, {}).setdefault(
+        admin_id, {"funcionarios": {}, "dias": set()}
+    )
+    datas = set(datas)
+    for func_id in [None] if funcionarios is None else funcionarios:
+        pendentes["funcionarios"].setdefault(func_id, set()).update(datas)
+    if cobertura:
+        pendentes["dias"].update(datas)
@@ -28,11 +28,21 @@ from models import (
 )
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
 import calendar
+import os
+from tarefas import registro_tarefas
+from alertas import alertas_do_periodo
+from consultas import instalar_rastreador, metricas_rotas
+from migracoes import executar_migracoes
+from visao_calendario import grade_do_periodo, montar_calendario
 from escala_generator import (
     gerar_sugestao_escalas,
     realocar_horarios_por_folga,
     gerar_escalas_com_faixas_horario,
+    regenerar_dias,
+    regenerar_dias_pendentes,
     verificar_alertas_escalas,
 )
 
@@ -46,10 +56,14 @@ except ImportError:
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "sua-chave-secreta-aqui-mude-em-producao"
-app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///escalas.db"
+# ESCALAS_DATABASE_URI permite apontar para outro banco (benchmarks, testes)
+app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get(
+    "ESCALAS_DATABASE_URI", "sqlite:///escalas.db"
+)
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 db.init_app(app)
+instalar_rastreador(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = "login"
@@ -68,14 +82,6 @@ def monthrange_filter(year, month):
     return calendar.monthrange(year, month)[1]
 
 
-@app.template_filter("from_ordinal")
-def from_ordinal_filter(ordinal):
-    """Converte ordinal para data"""
-    from datetime import date
-
-    return date.fromordinal(int(ordinal))
-
-
 app.jinja_env.globals.update(now=datetime.now, calendar=calendar)
 
 
@@ -223,6 +229,9 @@ def calendario():
     ano = request.args.get("ano", datetime.now().year, type=int)
     mes = request.args.get("mes", datetime.now().month, type=int)
 
+    # Alertas do período (tabela alerta, mantida a cada alteração)
+    alertas_lista = alertas_do_periodo(current_user.id, ano, mes)
+
     funcionarios = Funcionario.query.filter_by(admin_id=current_user.id).all()
 
     # Período da empresa: dia 12 do mês até dia 11 do próximo mês
@@ -283,10 +292,17 @@ def calendario():
         .all()
     )
 
-    # Gerar alertas em tempo real
-    from escala_generator import verificar_alertas_escalas
-
-    alertas_lista = verificar_alertas_escalas(current_user.id, ano, mes)
+    # Células do calendário já agrupadas por dia (ver visao_calendario)
+    calendario_periodo = montar_calendario(
+        primeiro_dia,
+        ultimo_dia,
+        faixas_horario,
+        escalas_diarias,
+        folgas,
+        ferias,
+        dias_bloqueados,
+        datetime.now().date(),
+    )
 
     return render_template(
         "admin/calendario.html",
@@ -295,11 +311,7 @@ def calendario():
         primeiro_dia=primeiro_dia,
         ultimo_dia=ultimo_dia,
         funcionarios=funcionarios,
-        folgas=folgas,
-        dias_bloqueados=dias_bloqueados,
-        ferias=ferias,
-        escalas_diarias=escalas_diarias,
-        faixas_horario=faixas_horario,
+        calendario=calendario_periodo,
         alertas=alertas_lista,
     )
 
@@ -334,7 +346,12 @@ def adicionar_folga():
 
     folga = Folga(funcionario_id=funcionario_id, data=data_folga)
     db.session.add(folga)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Outra requisição gravou a mesma folga depois da verificação acima
+        db.session.rollback()
+        return jsonify({"erro": "Folga já existe para este dia"}), 400
 
     # Realocar horários para cobrir a ausência
     try:
@@ -486,12 +503,87 @@ def nova_ferias():
 @app.route("/admin/gerar-escala", methods=["POST"])
 @login_required
 def gerar_escala():
+    """
+    Agenda a geração em segundo plano e responde com a tarefa; o andamento
+    é consultado em /api/jobs/<id>
+    """
     data = request.json
-    mes = data.get("mes")
-    ano = data.get("ano")
+    try:
+        mes = int(data.get("mes"))
+        ano = int(data.get("ano"))
+    except (TypeError, ValueError):
+        return jsonify({"erro": "Mês e ano são obrigatórios"}), 400
+
+    # Opcional: resolver os dias em paralelo (processos=None usa um por CPU)
+    paralelo = bool(data.get("paralelo", False))
+    processos = data.get("processos")
+    if processos is not None:
+        maximo = os.cpu_count() or 1
+        try:
+            processos = int(processos)
+        except (TypeError, ValueError):
+            processos = 0
+        if not 1 <= processos <= maximo:
+            return (
+                jsonify({"erro": f"processos deve ser um inteiro entre 1 e {maximo}"}),
+                400,
+            )
+    # Opcional: tempo máximo de busca do mês, em segundos
+    orcamento_segundos = data.get("orcamento_segundos")
+    if orcamento_segundos is not None:
+        try:
+            orcamento_segundos = float(orcamento_segundos)
+        except (TypeError, ValueError):
+            return jsonify({"erro": "orcamento_segundos deve ser um número"}), 400
+
+    # Opcional: busca local no período depois da geração (True ou
+    # {"iteracoes": ..., "tempo_segundos": ...})
+    otimizacao = data.get("otimizacao")
+    # Opcional: tempo de cada fase no resultado da tarefa (e no log de perfis)
+    perfil = bool(data.get("perfil", False))
+
+    tarefa, criada = registro_tarefas.submeter(
+        app,
+        gerar_escalas_com_faixas_horario,
+        current_user.id,
+        ano,
+        mes,
+        paralelo=paralelo,
+        processos=processos,
+        orcamento_segundos=orcamento_segundos,
+        otimizacao=otimizacao,
+        perfil=perfil,
+    )
+    resposta = tarefa.para_dict()
+    resposta["nova"] = criada
+    return jsonify(resposta), 202
+
+
+@app.route("/api/jobs/<tarefa_id>")
+@login_required
+def consultar_tarefa(tarefa_id):
+    tarefa = registro_tarefas.obter(tarefa_id)
+    if not tarefa or tarefa.admin_id != current_user.id:
+        return jsonify({"erro": "Tarefa não encontrada"}), 404
+
+    return jsonify(tarefa.para_dict())
+
+
+@app.route("/admin/regenerar-dias", methods=["POST"])
+@login_required
+def regenerar_dias_escala():
+    """
+    Recalcula só os dias informados em "datas" (YYYY-MM-DD) ou, sem datas,
+    os dias afetados por alterações desde a última geração
+    """
+    data = request.get_json(silent=True) or {}
 
     try:
-        resultado = gerar_escalas_com_faixas_horario(current_user.id, ano, mes)
+        if data.get("datas"):
+            datas = [datetime.strptime(d, "%Y-%m-%d").date() for d in data.get("datas")]
+            resultado = regenerar_dias(current_user.id, datas)
+        else:
+            resultado = regenerar_dias_pendentes(current_user.id)
         return jsonify(resultado)
     except Exception as e:
         return jsonify({"erro": str(e)}), 400
@@ -511,6 +603,12 @@ def visualizar_escalas():
     ano = request.args.get("ano", datetime.now().year, type=int)
     mes = request.args.get("mes", datetime.now().month, type=int)
 
+    # Alertas do período, lidos da tabela (se houver admin)
+    alertas = []
+    if Admin.query.count() > 0:
+        admin = Admin.query.first()  # Pegar primeiro admin para visualização pública
+        alertas = alertas_do_periodo(admin.id, ano, mes)
+
     # Buscar todos os funcionários (de todos os admins para visualização pública)
     # Ou você pode filtrar por um admin específico se preferir
     funcionarios = Funcionario.query.all()
@@ -535,18 +633,12 @@ def visualizar_escalas():
         or_(and_(Ferias.data_inicio <= ultimo_dia, Ferias.data_fim >= primeiro_dia))
     ).all()
 
-    # Buscar escalas diárias do período
-    escalas_diarias = EscalaDiaria.query.filter(
-        EscalaDiaria.data >= primeiro_dia, EscalaDiaria.data <= ultimo_dia
-    ).all()
-
-    # Gerar alertas em tempo real (se houver admin)
-    alertas = []
-    if Admin.query.count() > 0:
-        admin = Admin.query.first()  # Pegar primeiro admin para visualização pública
-        from escala_generator import verificar_alertas_escalas
-
-        alertas = verificar_alertas_escalas(admin.id, ano, mes)
+    # Buscar escalas diárias do período, com as faixas (usadas no template)
+    escalas_diarias = (
+        EscalaDiaria.query.options(selectinload(EscalaDiaria.faixa_horario))
+        .filter(EscalaDiaria.data >= primeiro_dia, EscalaDiaria.data <= ultimo_dia)
+        .all()
+    )
 
     return render_template(
         "visualizacao.html",
@@ -554,6 +646,7 @@ def visualizar_escalas():
         mes=mes,
         primeiro_dia=primeiro_dia,
         ultimo_dia=ultimo_dia,
+        semanas=grade_do_periodo(primeiro_dia),
         funcionarios=funcionarios,
         folgas=folgas,
         ferias=ferias,
@@ -562,6 +655,13 @@ def visualizar_escalas():
     )
 
 
+# Consultas SQL por rota (ver consultas.py)
+@app.route("/admin/metrics")
+@login_required
+def metricas():
+    return jsonify({"rotas": metricas_rotas.para_dict()})
+
+
 # Exportar PDF
 @app.route("/admin/exportar-pdf")
 @login_required
@@ -670,4 +770,5 @@ def exportar_pdf():
 if __name__ == "__main__":
     with app.app_context():
         db.create_all()
+        executar_migracoes()
     app.run(debug=True)
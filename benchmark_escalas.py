@@ -0,0 +1,286 @@
+"""
+Benchmark da geração, dos alertas, das telas e do PDF em dados sintéticos
+
+Para cada cenário (funcionários x faixas x densidade de férias) cria os
+dados com popular_dados_exemplo.popular_dados_sinteticos (semente fixa) em
+um SQLite temporário e mede:
+
+  - gerar: gerar_escalas_com_faixas_horario
+  - alertas: verificar_alertas_escalas (cálculo completo)
+  - calendario: GET /admin/calendario (admin logado)
+  - escalas: GET /escalas (visualização pública)
+  - pdf: GET /admin/exportar-pdf (gerar_pdf_escala; pulado sem ReportLab)
+  - realocacao: realocar_horarios_por_folga de um escalado do 11º dia do
+    período que acabou de entrar de folga (com o commit e o recálculo dos
+    alertas); a folga é gravada fora da medição
+
+Roda sem rede e sem tocar no escalas.db. O relatório JSON guarda todas as
+medições e um resumo (mínimo e mediana) por etapa; --comparar mostra a
+razão entre as medianas de um relatório anterior e as atuais. Para as
+telas também é mostrado o tempo por linha do período (escalas, folgas e
+férias), que deve ficar estável à medida que os cenários crescem. Uso:
+
+    python benchmark_escalas.py --funcionarios 10 50 --faixas 4 8 --saida rel.json
+    python benchmark_escalas.py --comparar rel_anterior.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ETAPAS = ["gerar", "alertas", "calendario", "escalas", "pdf", "realocacao"]
+
+
+def _medir(funcao, repeticoes, preparar=None):
+    """
+    Tempos de funcao(); com preparar, cada medição chama funcao(*preparar())
+    e a preparação fica fora do tempo
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar() if preparar else ()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append(round(time.perf_counter() - inicio, 4))
+    return tempos
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip()
+
+
+def nome_cenario(funcionarios, faixas, densidade_ferias):
+    return f"{funcionarios}f-{faixas}fx-ferias{densidade_ferias:g}"
+
+
+def executar_cenario(
+    funcionarios, faixas, densidade_ferias, semente, repeticoes, etapas, ano, mes
+):
+    """
+    Recria o banco, popula o cenário e mede as etapas (dentro do app
+    context do app). Retorna o dicionário do cenário para o relatório.
+    """
+    import alertas
+    from app import app, PDF_DISPONIVEL
+    from escala_generator import (
+        gerar_escalas_com_faixas_horario,
+        realocar_horarios_por_folga,
+        verificar_alertas_escalas,
+    )
+    from migracoes import executar_migracoes
+    from models import db, EscalaDiaria, Ferias, Folga
+    from popular_dados_exemplo import popular_dados_sinteticos
+    from scheduling_context import SchedulingContext
+
+    db.drop_all()
+    db.create_all()
+    executar_migracoes()
+    alertas.esquecer_periodos_materializados()
+
+    admin_id = popular_dados_sinteticos(
+        funcionarios,
+        n_faixas=faixas,
+        densidade_ferias=densidade_ferias,
+        semente=semente,
+        ano=ano,
+        mes=mes,
+    )
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["_user_id"] = str(admin_id)
+        sessao["_fresh"] = True
+
+    def pagina(url):
+        def abrir():
+            resposta = cliente.get(url)
+            assert resposta.status_code == 200, (url, resposta.status_code)
+
+        return abrir
+
+    dia_realocado = SchedulingContext.limites_periodo(ano, mes)[0] + timedelta(days=10)
+
+    def nova_folga():
+        # Próximo escalado do dia entra de folga (gravada como na rota)
+        escala = EscalaDiaria.query.filter_by(data=dia_realocado).first()
+        if escala is None:
+            gerar_escalas_com_faixas_horario(admin_id, ano, mes)
+            escala = EscalaDiaria.query.filter_by(data=dia_realocado).first()
+        db.session.add(Folga(funcionario_id=escala.funcionario_id, data=dia_realocado))
+        db.session.commit()
+        return dia_realocado, escala.funcionario_id, admin_id
+
+    acoes = {
+        "gerar": lambda: gerar_escalas_com_faixas_horario(admin_id, ano, mes),
+        "alertas": lambda: verificar_alertas_escalas(admin_id, ano, mes),
+        "calendario": pagina(f"/admin/calendario?ano={ano}&mes={mes}"),
+        "escalas": pagina(f"/escalas?ano={ano}&mes={mes}"),
+        "pdf": pagina(f"/admin/exportar-pdf?ano={ano}&mes={mes}"),
+        "realocacao": realocar_horarios_por_folga,
+    }
+    preparacoes = {"realocacao": nova_folga}
+
+    tempos = {}
+    for etapa in etapas:
+        if etapa == "pdf" and not PDF_DISPONIVEL:
+            continue
+        tempos[etapa] = _medir(acoes[etapa], repeticoes, preparacoes.get(etapa))
+        db.session.remove()
+
+    return {
+        "nome": nome_cenario(funcionarios, faixas, densidade_ferias),
+        "funcionarios": funcionarios,
+        "faixas": faixas,
+        "densidade_ferias": densidade_ferias,
+        "semente": semente,
+        "contagens": {
+            "escalas": EscalaDiaria.query.count(),
+            "folgas": Folga.query.count(),
+            "ferias": Ferias.query.count(),
+            "alertas": len(verificar_alertas_escalas(admin_id, ano, mes)),
+        },
+        "tempos_s": tempos,
+        "resumo_s": {
+            etapa: {"min": min(medidas), "mediana": statistics.median(medidas)}
+            for etapa, medidas in tempos.items()
+        },
+    }
+
+
+def comparar(anterior, atual):
+    """Linhas "cenário etapa: antes -> depois (razão)" para o terminal"""
+    cenarios_anteriores = {c["nome"]: c for c in anterior["cenarios"]}
+    linhas = []
+    for cenario in atual["cenarios"]:
+        antes = cenarios_anteriores.get(cenario["nome"])
+        if antes is None:
+            continue
+        for etapa, resumo in cenario["resumo_s"].items():
+            if etapa not in antes["resumo_s"]:
+                continue
+            t_antes = antes["resumo_s"][etapa]["mediana"]
+            t_depois = resumo["mediana"]
+            razao = t_depois / t_antes if t_antes else float("inf")
+            linhas.append(
+                f"  {cenario['nome']:<24} {etapa:<11} {t_antes:8.3f}s -> "
+                f"{t_depois:8.3f}s ({razao:.2f}x)"
+            )
+    return linhas
+
+
+def escalonamento(relatorio, etapa):
+    """
+    Linhas "cenário: linhas, mediana, µs por linha" da etapa, com linhas =
+    escalas + folgas + férias do cenário. Tempo por linha estável entre
+    cenários de tamanhos diferentes indica crescimento linear.
+    """
+    linhas = []
+    for cenario in relatorio["cenarios"]:
+        if etapa not in cenario["resumo_s"]:
+            continue
+        contagens = cenario["contagens"]
+        total = contagens["escalas"] + contagens["folgas"] + contagens["ferias"]
+        mediana = cenario["resumo_s"][etapa]["mediana"]
+        por_linha = mediana / total * 1e6 if total else float("inf")
+        linhas.append(
+            f"  {cenario['nome']:<24} {total:7d} linhas {mediana:8.3f}s "
+            f"{por_linha:8.1f}µs/linha"
+        )
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--funcionarios", type=int, nargs="+", default=[10, 50, 200, 1000]
+    )
+    parser.add_argument("--faixas", type=int, nargs="+", default=[4, 8, 16])
+    parser.add_argument("--ferias", type=float, nargs="+", default=[0.0, 0.2])
+    parser.add_argument("--etapas", nargs="+", choices=ETAPAS, default=ETAPAS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--semente", type=int, default=1)
+    parser.add_argument("--ano", type=int, default=2026)
+    parser.add_argument("--mes", type=int, default=1)
+    parser.add_argument("--saida", default="benchmark_escalas.json")
+    parser.add_argument("--comparar", help="relatório anterior para comparação")
+    args = parser.parse_args()
+
+    relatorio = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_atual(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticoes": args.repeticoes,
+        "cenarios": [],
+    }
+
+    # Banco temporário, definido antes de importar o app e apagado no fim
+    with tempfile.TemporaryDirectory(prefix="benchmark_escalas_") as pasta:
+        os.environ["ESCALAS_DATABASE_URI"] = (
+            f"sqlite:///{os.path.join(pasta, 'benchmark.db')}"
+        )
+        from app import app
+        from models import db
+
+        with app.app_context():
+            for funcionarios in args.funcionarios:
+                for faixas in args.faixas:
+                    for densidade_ferias in args.ferias:
+                        cenario = executar_cenario(
+                            funcionarios,
+                            faixas,
+                            densidade_ferias,
+                            args.semente,
+                            args.repeticoes,
+                            args.etapas,
+                            args.ano,
+                            args.mes,
+                        )
+                        relatorio["cenarios"].append(cenario)
+                        resumo = " | ".join(
+                            f"{etapa} {r['mediana']:.3f}s"
+                            for etapa, r in cenario["resumo_s"].items()
+                        )
+                        print(f"{cenario['nome']:<24} {resumo}", flush=True)
+            # Fecha as conexões com o arquivo antes de apagar a pasta
+            db.session.remove()
+            db.engine.dispose()
+
+    with open(args.saida, "w") as arquivo:
+        json.dump(relatorio, arquivo, indent=2)
+    print(f"\nRelatório gravado em {args.saida}")
+
+    for etapa in ("calendario", "escalas"):
+        linhas = escalonamento(relatorio, etapa)
+        if linhas:
+            print(f"\nTempo de {etapa} por linha do período:")
+            for linha in linhas:
+                print(linha)
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            anterior = json.load(arquivo)
+        print(f"\nComparação com {args.comparar} (medianas):")
+        for linha in comparar(anterior, relatorio):
+            print(linha)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Benchmark de memória da avaliação exaustiva de combinações de um dia
+
+Compara o pico de memória (RSS) de:
+  - lista: todas as combinações materializadas em uma lista antes de pontuar
+    (comportamento anterior de _gerar_combinacoes_alocacao)
+  - streaming: combinações pontuadas à medida que são geradas
+
+Cada modo roda em um processo separado, para que o pico de um não contamine
+o outro. Uso:
+
+    python benchmark_memoria.py --funcionarios 30 --faixas 10
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+from models import FaixaHorario
+from escala_generator import _avaliar_combinacao, _gerar_combinacoes_alocacao
+from pontuacao import calcular_prioridade_faixas
+
+
+def montar_dia(n_funcionarios, n_faixas, faixas_por_funcionario):
+    """
+    Monta um dia sintético: faixas de 6h começando de hora em hora a partir
+    das 05:00 e funcionários distribuídos em rodízio entre as faixas
+    """
+    faixas = []
+    for i in range(n_faixas):
+        inicio = 5 + i % 13
+        faixas.append(
+            FaixaHorario(
+                id=i + 1,
+                hora_inicio=f"{inicio:02d}:00",
+                hora_fim=f"{inicio + 6:02d}:00",
+                ativo_semana=True,
+                ativo_fds=True,
+            )
+        )
+
+    data = date(2026, 1, 14)  # Quarta-feira
+    faixas_priorizadas = calcular_prioridade_faixas(faixas, data, False)
+
+    disponibilidades = {faixa: [] for faixa in faixas}
+    for func_id in range(1, n_funcionarios + 1):
+        for k in range(faixas_por_funcionario):
+            faixa = faixas[(func_id + k) % n_faixas]
+            disponibilidades[faixa].append(func_id)
+
+    return faixas_priorizadas, disponibilidades, data
+
+
+def pico_rss_kb():
+    """Pico de memória residente do processo em KB (None se indisponível)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS informa em bytes, Linux em KB
+    return pico // 1024 if sys.platform == "darwin" else pico
+
+
+def executar_modo(modo, n_funcionarios, n_faixas, faixas_por_funcionario):
+    faixas_priorizadas, disponibilidades, data = montar_dia(
+        n_funcionarios, n_faixas, faixas_por_funcionario
+    )
+    rss_inicial = pico_rss_kb()
+    # Sem RSS (Windows), mede o pico alocado pelo Python com tracemalloc
+    if rss_inicial is None:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+
+    combinacoes = _gerar_combinacoes_alocacao(faixas_priorizadas, disponibilidades)
+    if modo == "lista":
+        combinacoes = list(combinacoes)
+
+    total = 0
+    melhor_pontuacao = -1
+    for combinacao in combinacoes:
+        total += 1
+        pontuacao = _avaliar_combinacao(combinacao, faixas_priorizadas, data)
+        if pontuacao > melhor_pontuacao:
+            melhor_pontuacao = pontuacao
+
+    tempo = time.perf_counter() - inicio
+    pico_python = None
+    if tracemalloc.is_tracing():
+        _, pico_python = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "modo": modo,
+        "combinacoes": total,
+        "melhor_pontuacao": melhor_pontuacao,
+        "tempo_s": round(tempo, 3),
+        "pico_alocado_python_kb": pico_python // 1024 if pico_python else None,
+        "rss_inicial_kb": rss_inicial,
+        "pico_rss_kb": pico_rss_kb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--funcionarios", type=int, default=30)
+    parser.add_argument("--faixas", type=int, default=10)
+    parser.add_argument(
+        "--faixas-por-funcionario",
+        type=int,
+        default=1,
+        help="quantas faixas cada funcionário pode cobrir",
+    )
+    parser.add_argument("--modo", choices=["lista", "streaming"])
+    args = parser.parse_args()
+
+    parametros = (args.funcionarios, args.faixas, args.faixas_por_funcionario)
+
+    if args.modo:
+        print(json.dumps(executar_modo(args.modo, *parametros)))
+        return
+
+    resultados = []
+    for modo in ["lista", "streaming"]:
+        saida = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--modo",
+                modo,
+                "--funcionarios",
+                str(args.funcionarios),
+                "--faixas",
+                str(args.faixas),
+                "--faixas-por-funcionario",
+                str(args.faixas_por_funcionario),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        resultados.append(json.loads(saida.stdout.strip().splitlines()[-1]))
+
+    print(
+        f"Dia sintético: {args.funcionarios} funcionários, {args.faixas} faixas, "
+        f"{args.faixas_por_funcionario} faixa(s) por funcionário"
+    )
+    for r in resultados:
+        if r["pico_rss_kb"] is not None:
+            memoria = (
+                f"pico RSS {r['pico_rss_kb'] / 1024:.1f} MB "
+                f"(+{(r['pico_rss_kb'] - r['rss_inicial_kb']) / 1024:.1f} MB)"
+            )
+        else:
+            memoria = f"pico alocado {r['pico_alocado_python_kb'] / 1024:.1f} MB"
+        print(
+            f"  {r['modo']:<10} {r['combinacoes']} combinações em "
+            f"{r['tempo_s']}s | {memoria}"
+        )
+
+    assert resultados[0]["melhor_pontuacao"] == resultados[1]["melhor_pontuacao"]
+
+
+if __name__ == "__main__":
+    main()
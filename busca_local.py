@@ -0,0 +1,540 @@
+"""
+Otimização do período inteiro por busca local (simulated annealing)
+
+A geração resolve cada dia isoladamente; esta segunda fase parte das
+escalas e folgas já gravadas e tenta reduzir os alertas de
+verificar_alertas_escalas (faixas sem cobertura e mais de 6 dias seguidos
+de trabalho) com três movimentos:
+
+  - troca de faixa: um funcionário passa para outra faixa em que tem
+    disponibilidade (ou, se estava sem faixa no dia, recebe uma)
+  - folga na semana: a folga de um funcionário muda para outro dia da mesma
+    semana, e ele trabalha no dia em que folgava
+  - troca de turno: dois funcionários trocam de faixa no mesmo dia
+
+Cada movimento altera poucas posições (funcionário, dia); o custo é mantido
+por contadores (funcionários por faixa e dia, faixas ocupadas, dias
+trabalhados, posições alteradas) e recalculado só nos dias e funcionários
+tocados.
+"""
+
+import math
+import random
+import time
+
+import numpy as np
+
+from models import db, Funcionario, EscalaDiaria, FaixaHorario
+from scheduling_context import SchedulingContext
+from persistencia import GravacaoEmLote
+from cobertura import IndiceCobertura
+from alertas import MAX_DIAS_CONSECUTIVOS
+
+# Pesos do custo minimizado: cada alerta e cada posição (funcionário, dia)
+# diferente da escala gravada, para não mexer à toa no que já estava bom
+PESO_SEM_COBERTURA = 200
+PESO_EXCESSO_DIAS = 100
+PESO_ALTERACAO = 1
+
+TEMPERATURA_INICIAL = 200.0
+TEMPERATURA_FINAL = 0.5
+
+
+def _bits(mascara):
+    while mascara:
+        bit = mascara & -mascara
+        yield bit.bit_length() - 1
+        mascara ^= bit
+
+
+def _mascaras(matriz):
+    """
+    Uma máscara de bits por linha de uma matriz bool (bit d = coluna d)
+    """
+    return [
+        int.from_bytes(linha.tobytes(), "little")
+        for linha in np.packbits(matriz, axis=1, bitorder="little")
+    ]
+
+
+def _sequencias_longas(mascara):
+    """
+    Quantidade de sequências de bits 1 com mais de MAX_DIAS_CONSECUTIVOS
+    """
+    total = 0
+    while mascara:
+        # Descartar zeros à direita e medir a sequência de uns
+        mascara >>= (mascara & -mascara).bit_length() - 1
+        tamanho = (mascara ^ (mascara + 1)).bit_length() - 1
+        if tamanho > MAX_DIAS_CONSECUTIVOS:
+            total += 1
+        mascara >>= tamanho
+    return total
+
+
+class ModeloPeriodo:
+    """
+    Escalas e folgas do período em memória, com o custo (alertas) mantido
+    de forma incremental.
+
+    Funcionários, dias e faixas são representados por índices; máscaras de
+    bits guardam, por funcionário, os dias de folga, de férias e de trabalho
+    e, por dia, as faixas ocupadas.
+
+    As escalas que a busca não move contam como em
+    alertas.verificar_alertas_escalas: as de funcionários inativos e as das
+    faixas_inativas (FaixaHorario do admin com ativo=False) ocupam a faixa
+    delas no dia, e um funcionário ativo escalado em faixa inativa trabalha
+    naquele dia, que fica fixo (nenhum movimento o altera).
+    """
+
+    def __init__(self, contexto, escalas, faixas_inativas=()):
+        self.contexto = contexto
+        self.dias = list(contexto.dias())
+        # Faixas inativas ficam depois das ativas: só cobrem as outras, não
+        # geram alerta nem recebem funcionários
+        self.faixas = list(contexto.faixas) + list(faixas_inativas)
+        total_ativas = len(contexto.faixas)
+        self.funcionarios = [func.id for func in contexto.funcionarios]
+
+        indice_dia = {data: d for d, data in enumerate(self.dias)}
+        indice_faixa = {faixa.id: f for f, faixa in enumerate(self.faixas)}
+        indice_funcionario = {func_id: e for e, func_id in enumerate(self.funcionarios)}
+
+        total_dias = len(self.dias)
+        total_funcionarios = len(self.funcionarios)
+
+        # Faixas ativas em cada dia (semana/fim de semana)
+        self.ativas = []
+        for data in self.dias:
+            eh_fds = data.weekday() in [5, 6]
+            mascara = 0
+            for f, faixa in enumerate(self.faixas[:total_ativas]):
+                if (eh_fds and faixa.ativo_fds) or (not eh_fds and faixa.ativo_semana):
+                    mascara |= 1 << f
+            self.ativas.append(mascara)
+
+        self.bloqueados = 0
+        for data in contexto.dias_bloqueados:
+            if data in indice_dia:
+                self.bloqueados |= 1 << indice_dia[data]
+
+        # Semana de cada dia (segunda a domingo, como gerar_folgas_funcionario)
+        self.semana = []
+        semana = 0
+        for data in self.dias:
+            self.semana.append(semana)
+            if data.weekday() == 6:
+                semana += 1
+        self.dias_da_semana = {}
+        for d, semana in enumerate(self.semana):
+            self.dias_da_semana.setdefault(semana, []).append(d)
+
+        # Faixas em que cada funcionário tem disponibilidade
+        self.disponiveis = [[] for _ in range(total_funcionarios)]
+        for faixa_id, func_ids in contexto.disponibilidades_por_faixa.items():
+            if indice_faixa.get(faixa_id, total_ativas) >= total_ativas:
+                continue
+            for func_id in func_ids:
+                if func_id in indice_funcionario:
+                    self.disponiveis[indice_funcionario[func_id]].append(
+                        indice_faixa[faixa_id]
+                    )
+
+        # Linhas funcionário x dia da matriz do contexto viram máscaras
+        self.ferias = _mascaras(contexto.matriz.ferias)
+        self.folga = _mascaras(contexto.matriz.folga)
+
+        # Faixas de cada (funcionário, dia); escalas de funcionários ou faixas
+        # fora do modelo (inativos) passam direto para a gravação, mas ocupam
+        # a faixa no dia e, de um funcionário ativo, fixam o dia (fixos)
+        self.faixas_de = {}
+        self.escalas_externas = []
+        externas_por_dia = [[] for _ in range(total_dias)]
+        self.fixos = [0] * total_funcionarios
+        for func_id, faixa_id, data in escalas:
+            e = indice_funcionario.get(func_id)
+            f = indice_faixa.get(faixa_id)
+            d = indice_dia.get(data)
+            if e is not None and f is not None and f < total_ativas and d is not None:
+                self.faixas_de.setdefault((e, d), []).append(f)
+                continue
+            self.escalas_externas.append((func_id, faixa_id, data))
+            if f is not None and d is not None:
+                externas_por_dia[d].append(f)
+                if e is not None:
+                    self.fixos[e] |= 1 << d
+
+        self.contagem = [[0] * len(self.faixas) for _ in range(total_dias)]
+        self.ocupadas = [0] * total_dias
+        for (e, d), faixas in self.faixas_de.items():
+            for f in faixas:
+                self.contagem[d][f] += 1
+                self.ocupadas[d] |= 1 << f
+        for d, faixas in enumerate(externas_por_dia):
+            for f in faixas:
+                self.contagem[d][f] += 1
+                self.ocupadas[d] |= 1 << f
+
+        self._cobertura_cache = {}
+        self.sem_cobertura = [self._alertas_do_dia(d) for d in range(total_dias)]
+        self.total_sem_cobertura = sum(self.sem_cobertura)
+
+        self.trabalho = [0] * total_funcionarios
+        for e in range(total_funcionarios):
+            for d in range(total_dias):
+                if self._trabalha(e, d):
+                    self.trabalho[e] |= 1 << d
+        self.excesso = [_sequencias_longas(mascara) for mascara in self.trabalho]
+        self.total_excesso = sum(self.excesso)
+
+        # Estado gravado, para contar as posições alteradas
+        self.faixas_originais = {
+            chave: list(faixas) for chave, faixas in self.faixas_de.items()
+        }
+        self.folga_original = list(self.folga)
+        self.alteracoes = 0
+
+    # Custo
+
+    def custo(self):
+        return (
+            PESO_SEM_COBERTURA * self.total_sem_cobertura
+            + PESO_EXCESSO_DIAS * self.total_excesso
+            + PESO_ALTERACAO * self.alteracoes
+        )
+
+    def alertas(self):
+        return {
+            "sem_cobertura": self.total_sem_cobertura,
+            "excesso_dias": self.total_excesso,
+            "total": self.total_sem_cobertura + self.total_excesso,
+        }
+
+    def _coberta(self, f, mascara_outras):
+        """
+        Faixa f coberta pela união das faixas da máscara (mesma regra dos
+        alertas, ver cobertura.IndiceCobertura), em cache por máscara
+        """
+        chave = (f, mascara_outras)
+        if chave not in self._cobertura_cache:
+            faixa = self.faixas[f]
+            self._cobertura_cache[chave] = IndiceCobertura.das_faixas(
+                self.faixas[g] for g in _bits(mascara_outras)
+            ).cobre_faixa(faixa)
+        return self._cobertura_cache[chave]
+
+    def _alertas_do_dia(self, d):
+        total = 0
+        ocupadas = self.ocupadas[d]
+        for f in _bits(self.ativas[d] & ~ocupadas):
+            if not self._coberta(f, ocupadas):
+                total += 1
+        return total
+
+    def _alterada(self, e, d):
+        bit = 1 << d
+        return (self.folga[e] & bit) != (self.folga_original[e] & bit) or sorted(
+            self.faixas_de.get((e, d), [])
+        ) != sorted(self.faixas_originais.get((e, d), []))
+
+    def _trabalha(self, e, d):
+        bit = 1 << d
+        return bool(
+            (self.faixas_de.get((e, d)) or self.fixos[e] & bit)
+            and not self.folga[e] & bit
+            and not self.ferias[e] & bit
+        )
+
+    # Alterações elementares; cada uma retorna a operação inversa
+
+    def atribuir(self, e, d, faixas):
+        alterada = self._alterada(e, d)
+        anteriores = self.faixas_de.get((e, d), [])
+        if faixas:
+            self.faixas_de[(e, d)] = list(faixas)
+        else:
+            self.faixas_de.pop((e, d), None)
+
+        contagem = self.contagem[d]
+        for f in anteriores:
+            contagem[f] -= 1
+            if not contagem[f]:
+                self.ocupadas[d] &= ~(1 << f)
+        for f in faixas:
+            contagem[f] += 1
+            self.ocupadas[d] |= 1 << f
+
+        alertas = self._alertas_do_dia(d)
+        self.total_sem_cobertura += alertas - self.sem_cobertura[d]
+        self.sem_cobertura[d] = alertas
+
+        self._atualizar_trabalho(e, d)
+        self.alteracoes += self._alterada(e, d) - alterada
+        return ("atribuir", e, d, anteriores)
+
+    def marcar_folga(self, e, d, folga):
+        alterada = self._alterada(e, d)
+        anterior = bool(self.folga[e] & (1 << d))
+        if folga:
+            self.folga[e] |= 1 << d
+        else:
+            self.folga[e] &= ~(1 << d)
+        self._atualizar_trabalho(e, d)
+        self.alteracoes += self._alterada(e, d) - alterada
+        return ("marcar_folga", e, d, anterior)
+
+    def _atualizar_trabalho(self, e, d):
+        bit = 1 << d
+        trabalhava = bool(self.trabalho[e] & bit)
+        if trabalhava == self._trabalha(e, d):
+            return
+
+        # Sequências de trabalho imediatamente antes e depois do dia
+        abaixo = (1 << d) - 1
+        zeros_abaixo = ~self.trabalho[e] & abaixo
+        antes = d - zeros_abaixo.bit_length()
+        acima = self.trabalho[e] >> (d + 1)
+        depois = (acima ^ (acima + 1)).bit_length() - 1
+
+        juntas = int(antes + 1 + depois > MAX_DIAS_CONSECUTIVOS)
+        separadas = int(antes > MAX_DIAS_CONSECUTIVOS) + int(
+            depois > MAX_DIAS_CONSECUTIVOS
+        )
+        delta = juntas - separadas if not trabalhava else separadas - juntas
+
+        self.trabalho[e] ^= bit
+        self.excesso[e] += delta
+        self.total_excesso += delta
+
+    def aplicar(self, operacoes):
+        """
+        Aplica as operações em ordem; retorna as inversas, na ordem de desfazer
+        """
+        inversas = []
+        for nome, *argumentos in operacoes:
+            inversas.append(getattr(self, nome)(*argumentos))
+        inversas.reverse()
+        return inversas
+
+    # Movimentos
+
+    def _faixas_possiveis(self, e, d):
+        return [f for f in self.disponiveis[e] if self.ativas[d] & (1 << f)]
+
+    def propor_troca_faixa(self, rnd):
+        e = rnd.randrange(len(self.funcionarios))
+        d = rnd.randrange(len(self.dias))
+        if (self.folga[e] | self.ferias[e] | self.fixos[e]) & (1 << d):
+            return None
+        atuais = self.faixas_de.get((e, d), [])
+        if len(atuais) > 1:
+            return None
+        opcoes = [f for f in self._faixas_possiveis(e, d) if [f] != atuais]
+        if not opcoes:
+            return None
+        return [("atribuir", e, d, [rnd.choice(opcoes)])]
+
+    def propor_folga_na_semana(self, rnd):
+        e = rnd.randrange(len(self.funcionarios))
+        folgas = list(_bits(self.folga[e] & ~self.ferias[e]))
+        if not folgas:
+            return None
+        origem = rnd.choice(folgas)
+        if self.fixos[e] & (1 << origem):
+            return None
+
+        # O fim de semana completo de folga fica onde está
+        data = self.dias[origem]
+        if data.weekday() in [5, 6]:
+            par = origem + 1 if data.weekday() == 5 else origem - 1
+            if 0 <= par < len(self.dias) and self.folga[e] & (1 << par):
+                return None
+
+        indisponiveis = self.folga[e] | self.ferias[e] | self.fixos[e] | self.bloqueados
+        destinos = [
+            d
+            for d in self.dias_da_semana[self.semana[origem]]
+            if not indisponiveis & (1 << d) and len(self.faixas_de.get((e, d), [])) <= 1
+        ]
+        if not destinos:
+            return None
+        destino = rnd.choice(destinos)
+
+        # No dia que era de folga, trabalha na faixa que tinha no destino
+        # (se possível) ou em outra em que tem disponibilidade
+        faixas_origem = self.faixas_de.get((e, origem), [])
+        if not faixas_origem:
+            possiveis = self._faixas_possiveis(e, origem)
+            anteriores = self.faixas_de.get((e, destino), [])
+            if anteriores and anteriores[0] in possiveis:
+                faixas_origem = anteriores
+            elif possiveis:
+                faixas_origem = [rnd.choice(possiveis)]
+
+        return [
+            ("marcar_folga", e, origem, False),
+            ("marcar_folga", e, destino, True),
+            ("atribuir", e, destino, []),
+            ("atribuir", e, origem, faixas_origem),
+        ]
+
+    def propor_troca_turno(self, rnd):
+        d = rnd.randrange(len(self.dias))
+        a = rnd.randrange(len(self.funcionarios))
+        b = rnd.randrange(len(self.funcionarios))
+        faixas_a = self.faixas_de.get((a, d), [])
+        faixas_b = self.faixas_de.get((b, d), [])
+        if (self.fixos[a] | self.fixos[b]) & (1 << d):
+            return None
+        if len(faixas_a) != 1 or len(faixas_b) != 1 or faixas_a == faixas_b:
+            return None
+        if faixas_b[0] not in self.disponiveis[a]:
+            return None
+        if faixas_a[0] not in self.disponiveis[b]:
+            return None
+        return [("atribuir", a, d, faixas_b), ("atribuir", b, d, faixas_a)]
+
+    # Resultado
+
+    def linhas_escalas(self):
+        linhas = [
+            {
+                "funcionario_id": self.funcionarios[e],
+                "faixa_horario_id": self.faixas[f].id,
+                "data": self.dias[d],
+            }
+            for (e, d), faixas in sorted(self.faixas_de.items())
+            for f in faixas
+        ]
+        linhas.extend(
+            {"funcionario_id": func_id, "faixa_horario_id": faixa_id, "data": data}
+            for func_id, faixa_id, data in self.escalas_externas
+        )
+        return linhas
+
+    def linhas_folgas(self):
+        modelados = set(self.funcionarios)
+        linhas = [
+            {"funcionario_id": self.funcionarios[e], "data": self.dias[d]}
+            for e in range(len(self.funcionarios))
+            for d in _bits(self.folga[e])
+        ]
+        # Folgas de funcionários fora do modelo (inativos) ficam como estão
+        for data in self.dias:
+            for func_id in self.contexto.folgas_por_data.get(data, ()):
+                if func_id not in modelados:
+                    linhas.append({"funcionario_id": func_id, "data": data})
+        return linhas
+
+
+def otimizar(modelo, iteracoes=20000, tempo_segundos=None, semente=0):
+    """
+    Simulated annealing sobre o modelo. Termina com o modelo no melhor estado
+    encontrado e retorna estatísticas da execução.
+    """
+    rnd = random.Random(semente)
+    movimentos = [
+        modelo.propor_troca_faixa,
+        modelo.propor_folga_na_semana,
+        modelo.propor_troca_turno,
+    ]
+    prazo = None if tempo_segundos is None else time.monotonic() + tempo_segundos
+
+    custo = modelo.custo()
+    melhor = custo
+    # Inversas dos movimentos aceitos desde o melhor estado
+    desde_o_melhor = []
+    executadas = 0
+    aceitos = 0
+
+    if modelo.funcionarios and modelo.dias:
+        for iteracao in range(iteracoes):
+            if prazo is not None and iteracao % 256 == 0:
+                if time.monotonic() >= prazo:
+                    break
+            executadas += 1
+
+            temperatura = TEMPERATURA_INICIAL * (
+                TEMPERATURA_FINAL / TEMPERATURA_INICIAL
+            ) ** (iteracao / iteracoes)
+
+            operacoes = rnd.choice(movimentos)(rnd)
+            if not operacoes:
+                continue
+
+            inversas = modelo.aplicar(operacoes)
+            delta = modelo.custo() - custo
+            if delta <= 0 or rnd.random() < math.exp(-delta / temperatura):
+                custo += delta
+                aceitos += 1
+                if custo < melhor:
+                    melhor = custo
+                    desde_o_melhor = []
+                else:
+                    desde_o_melhor.append(inversas)
+            else:
+                modelo.aplicar(inversas)
+
+    # Voltar ao melhor estado (também desfaz movimentos neutros no fim)
+    for inversas in reversed(desde_o_melhor):
+        modelo.aplicar(inversas)
+
+    return {"iteracoes": executadas, "movimentos_aceitos": aceitos}
+
+
+def otimizar_periodo(
+    admin_id, ano, mes, iteracoes=20000, tempo_segundos=None, semente=0
+):
+    """
+    Otimiza as escalas e folgas já gravadas do mês da empresa e grava só o
+    que mudou. Retorna as contagens de alertas antes e depois.
+    """
+    inicio = time.perf_counter()
+    contexto = SchedulingContext.para_periodo(admin_id, ano, mes)
+
+    escalas = (
+        db.session.query(
+            EscalaDiaria.funcionario_id,
+            EscalaDiaria.faixa_horario_id,
+            EscalaDiaria.data,
+        )
+        .join(Funcionario)
+        .filter(
+            Funcionario.admin_id == admin_id,
+            EscalaDiaria.data >= contexto.primeiro_dia,
+            EscalaDiaria.data <= contexto.ultimo_dia,
+        )
+        .all()
+    )
+
+    faixas_inativas = FaixaHorario.query.filter_by(admin_id=admin_id, ativo=False).all()
+
+    modelo = ModeloPeriodo(contexto, escalas, faixas_inativas)
+    alertas_antes = modelo.alertas()
+
+    estatisticas = otimizar(modelo, iteracoes, tempo_segundos, semente)
+
+    dias = list(contexto.dias())
+    gravacao = GravacaoEmLote()
+    try:
+        escalas_gravadas = gravacao.sincronizar_escalas(
+            admin_id, dias, modelo.linhas_escalas()
+        )
+        folgas_gravadas = gravacao.sincronizar_folgas(
+            admin_id, dias, modelo.linhas_folgas()
+        )
+        gravacao.confirmar()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return {
+        "alertas_antes": alertas_antes,
+        "alertas_depois": modelo.alertas(),
+        "iteracoes": estatisticas["iteracoes"],
+        "movimentos_aceitos": estatisticas["movimentos_aceitos"],
+        "escalas": escalas_gravadas,
+        "folgas": folgas_gravadas,
+        "tempo_s": round(time.perf_counter() - inicio, 3),
+    }
@@ -0,0 +1,143 @@
+"""
+Índice de cobertura de horários por união de intervalos
+
+Os horários das faixas viram intervalos [início, fim) em minutos a partir
+da 00:00 do dia; uma faixa que cruza a meia-noite termina depois de 1440
+(19:00-01:00 vira 1140-1500), então as faixas do setor, que vão até 01:00,
+cabem no eixo 0-1560 sem quebrar em dois pedaços. Os intervalos de um dia
+são unidos uma vez em uma lista ordenada de intervalos disjuntos; "o
+intervalo está todo coberto?" é uma busca binária.
+
+Os mesmos números ficam gravados em FaixaHorario (minuto_inicio,
+minuto_fim, cruza_meia_noite, mascara_horas, ver horario_da_faixa), para
+que geração e alertas não precisem ler os horários em texto.
+"""
+
+from bisect import bisect_right
+
+
+def intervalo_em_minutos(hora_inicio, hora_fim):
+    """
+    (início, fim) em minutos do intervalo "HH:MM"-"HH:MM"; se o fim não é
+    depois do início, o intervalo cruza a meia-noite
+    """
+    inicio = _minutos(hora_inicio)
+    fim = _minutos(hora_fim)
+    if fim <= inicio:
+        fim += 24 * 60
+    return inicio, fim
+
+
+def _minutos(hora_str):
+    h, m = hora_str.split(":")
+    return int(h) * 60 + int(m)
+
+
+def intervalo_do_gerador(inicio, fim):
+    """
+    (início, fim) de intervalo_em_minutos() na contagem do gerador: os
+    horários antes das 02:00 ficam no dia seguinte (mesma regra de
+    escala_generator._avaliar_combinacao). Uma faixa que começa de madrugada
+    (00:00-06:00) fica com o fim antes do início e não cobre nada; é assim
+    que a pontuação e as prioridades das faixas sempre a contaram.
+    """
+    return _no_dia_do_gerador(inicio), _no_dia_do_gerador(fim % (24 * 60))
+
+
+def _no_dia_do_gerador(minutos):
+    return minutos + 24 * 60 if minutos < 120 else minutos
+
+
+def mascara_horas(hora_inicio, hora_fim):
+    """
+    Bitmask das horas do dia (bit h = hora h) contadas na pontuação do
+    gerador: uma hora a cada 60 minutos a partir do início, no intervalo de
+    intervalo_do_gerador()
+    """
+    inicio, fim = intervalo_do_gerador(*intervalo_em_minutos(hora_inicio, hora_fim))
+    mascara = 0
+    for minuto in range(inicio, fim, 60):
+        mascara |= 1 << ((minuto // 60) % 24)
+    return mascara
+
+
+def horario_da_faixa(hora_inicio, hora_fim):
+    """
+    Valores das colunas pré-calculadas de FaixaHorario para o horário
+    "HH:MM"-"HH:MM": minuto_inicio, minuto_fim, cruza_meia_noite e
+    mascara_horas
+    """
+    inicio, fim = intervalo_em_minutos(hora_inicio, hora_fim)
+    return {
+        "minuto_inicio": inicio,
+        "minuto_fim": fim,
+        "cruza_meia_noite": fim > 24 * 60,
+        "mascara_horas": mascara_horas(hora_inicio, hora_fim),
+    }
+
+
+class IndiceCobertura:
+    """
+    União de intervalos [início, fim) em minutos, guardada como intervalos
+    disjuntos ordenados (listas paralelas inicios/fins). Intervalos que se
+    encostam (11:00-13:00 e 13:00-15:00) viram um só.
+    """
+
+    def __init__(self, intervalos):
+        self.inicios = []
+        self.fins = []
+        for inicio, fim in sorted(intervalos):
+            if fim <= inicio:
+                continue
+            if self.fins and inicio <= self.fins[-1]:
+                self.fins[-1] = max(self.fins[-1], fim)
+            else:
+                self.inicios.append(inicio)
+                self.fins.append(fim)
+
+    @classmethod
+    def dos_horarios(cls, horarios):
+        """
+        Índice de uma lista de (hora_inicio, hora_fim) em "HH:MM"
+        """
+        return cls(
+            intervalo_em_minutos(hora_inicio, hora_fim)
+            for hora_inicio, hora_fim in horarios
+        )
+
+    @classmethod
+    def das_faixas(cls, faixas):
+        """
+        Índice das faixas (FaixaHorario ou equivalente com minuto_inicio e
+        minuto_fim)
+        """
+        return cls((faixa.minuto_inicio, faixa.minuto_fim) for faixa in faixas)
+
+    def __bool__(self):
+        return bool(self.inicios)
+
+    def cobre(self, inicio, fim):
+        """
+        [inicio, fim) está inteiro dentro da união. O(log n).
+        """
+        if fim <= inicio:
+            return True
+        i = bisect_right(self.inicios, inicio) - 1
+        return i >= 0 and self.fins[i] >= fim
+
+    def cobre_horario(self, hora_inicio, hora_fim):
+        return self.cobre(*intervalo_em_minutos(hora_inicio, hora_fim))
+
+    def cobre_faixa(self, faixa):
+        return self.cobre(faixa.minuto_inicio, faixa.minuto_fim)
+
+    def minutos_cobertos(self, inicio, fim):
+        """
+        Quantos minutos de [inicio, fim) estão dentro da união
+        """
+        total = 0
+        i = max(bisect_right(self.inicios, inicio) - 1, 0)
+        while i < len(self.inicios) and self.inicios[i] < fim:
+            total += max(0, min(fim, self.fins[i]) - max(inicio, self.inicios[i]))
+            i += 1
+        return total
@@ -0,0 +1,203 @@
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+import pytest
+from flask import Flask
+
+import alertas
+from consultas import medir_consultas
+from migracoes import executar_migracoes
+from models import (
+    db,
+    Admin,
+    Funcionario,
+    FaixaHorario,
+    DisponibilidadeFuncionario,
+    Ferias,
+    DiaBloqueado,
+)
+
+# O app de app.py (fixture app_web) nunca usa o escalas.db local. A pasta
+# é apagada ao fim da sessão de testes.
+_pasta_banco = tempfile.TemporaryDirectory(prefix="escalas_testes_")
+os.environ["ESCALAS_DATABASE_URI"] = (
+    f"sqlite:///{os.path.join(_pasta_banco.name, 'app.db')}"
+)
+
+# Scripts de verificação manual (rodam contra o escalas.db local e apenas
+# imprimem resultados), não são coletados pelo pytest
+collect_ignore = [
+    "test_alertas.py",
+    "test_cobertura.py",
+    "test_combinacoes.py",
+    "test_fds.py",
+    "test_nova_faixa.py",
+    "test_semana_vs_fds.py",
+]
+
+# Mesmas faixas de popular_dados_exemplo.py: (início, fim, semana, fds)
+FAIXAS_EXEMPLO = [
+    ("05:00", "11:00", True, False),
+    ("07:00", "13:00", True, False),
+    ("11:00", "17:00", True, False),
+    ("15:00", "21:00", True, False),
+    ("17:00", "23:00", True, False),
+    ("19:00", "01:00", True, False),
+    ("07:00", "13:00", False, True),
+    ("13:00", "19:00", False, True),
+    ("19:00", "01:00", False, True),
+]
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'escalas.db'}"
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        executar_migracoes()
+        yield app
+        db.session.remove()
+
+    # Os períodos com alertas gravados ficam em memória no processo; cada
+    # teste usa outro banco
+    alertas.esquecer_periodos_materializados()
+
+
+@pytest.fixture
+def criar_cenario(app):
+    """
+    Cria um admin com as faixas de exemplo e funcionários aleatórios
+    (semente fixa). Retorna o id do admin.
+    """
+
+    def criar(n_funcionarios, semente=1, faixas_por_funcionario=3):
+        rnd = random.Random(semente)
+
+        admin = Admin(nome="Admin", email=f"admin{semente}@empresa.com")
+        admin.definir_senha("admin123")
+        db.session.add(admin)
+        db.session.commit()
+
+        faixas = []
+        for ordem, (inicio, fim, semana, fds) in enumerate(FAIXAS_EXEMPLO, 1):
+            faixa = FaixaHorario(
+                admin_id=admin.id,
+                hora_inicio=inicio,
+                hora_fim=fim,
+                ordem=ordem,
+                ativo_semana=semana,
+                ativo_fds=fds,
+            )
+            db.session.add(faixa)
+            faixas.append(faixa)
+        db.session.commit()
+
+        preferencias = ["segunda", "terca", "quarta", "quinta", "sexta", None]
+        for i in range(n_funcionarios):
+            func = Funcionario(
+                nome=f"Funcionário {i + 1}",
+                preferencia_folga=rnd.choice(preferencias),
+                horario_inicio="05:00",
+                horario_fim="13:00",
+                admin_id=admin.id,
+            )
+            db.session.add(func)
+            db.session.flush()
+
+            for faixa in rnd.sample(faixas, faixas_por_funcionario):
+                db.session.add(
+                    DisponibilidadeFuncionario(
+                        funcionario_id=func.id, faixa_horario_id=faixa.id
+                    )
+                )
+
+            if rnd.random() < 0.2:
+                inicio = date(2026, 1, 12) + timedelta(days=rnd.randint(0, 25))
+                db.session.add(
+                    Ferias(
+                        funcionario_id=func.id,
+                        data_inicio=inicio,
+                        data_fim=inicio + timedelta(days=rnd.randint(1, 10)),
+                    )
+                )
+
+        db.session.add(DiaBloqueado(admin_id=admin.id, data=date(2026, 1, 20)))
+        db.session.commit()
+
+        return admin.id
+
+    return criar
+
+
+@pytest.fixture
+def contar_consultas(app):
+    """
+    contar_consultas(funcao, *args): número de SELECTs executados pela função
+    """
+
+    def contar(funcao, *args):
+        with medir_consultas() as rastreador:
+            funcao(*args)
+        return len(rastreador.selects)
+
+    return contar
+
+
+@pytest.fixture
+def app_web(app):
+    """
+    O app de app.py (com as rotas), sobre um banco vazio. Dados criados
+    dentro de "with app_web.app_context():" (criar_cenario inclusive) vão
+    para o banco dele; cada requisição do test client abre o próprio
+    contexto, com uma sessão nova, como em produção.
+    """
+    from app import app as app_web
+
+    with app_web.app_context():
+        db.drop_all()
+        db.create_all()
+        executar_migracoes()
+
+    yield app_web
+
+
+@pytest.fixture
+def cliente_admin(app_web):
+    """
+    cliente_admin(admin_id): test client já logado como o admin
+    """
+
+    def criar(admin_id):
+        cliente = app_web.test_client()
+        with cliente.session_transaction() as sessao:
+            sessao["_user_id"] = str(admin_id)
+            sessao["_fresh"] = True
+        return cliente
+
+    return criar
+
+
+@pytest.fixture
+def orcamento_consultas(app_web):
+    """
+    orcamento_consultas(cliente, url, limite): faz o GET, confere o status
+    200 e que a rota não passou de limite consultas SQL. Retorna o número
+    de consultas.
+    """
+
+    def verificar(cliente, url, limite):
+        with medir_consultas() as rastreador:
+            resposta = cliente.get(url)
+        assert resposta.status_code == 200, (url, resposta.status_code)
+        assert rastreador.total <= limite, (
+            f"{url} fez {rastreador.total} consultas (orçamento: {limite}):\n"
+            + "\n".join(rastreador.consultas)
+        )
+        return rastreador.total
+
+    return verificar
@@ -0,0 +1,166 @@
+"""
+Contagem de consultas SQL e tempo de banco por requisição
+
+Um listener nos eventos before/after_cursor_execute de todos os Engines
+soma as consultas no RastreadorConsultas ativo (um por requisição, ou o de
+medir_consultas()). No app:
+
+  - em modo debug as respostas trazem X-Consultas-SQL e X-Tempo-SQL-ms
+  - /admin/metrics mostra os totais por rota desde o início do processo
+
+Os testes usam medir_consultas() (ver a fixture orcamento_consultas do
+conftest) para garantir que uma rota não passe do número de consultas
+declarado.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_rastreador_atual = ContextVar("rastreador_consultas", default=None)
+
+
+class RastreadorConsultas:
+    """Consultas executadas (SQL) e tempo total no banco, em segundos"""
+
+    def __init__(self):
+        self.consultas = []
+        self.tempo = 0.0
+
+    @property
+    def total(self):
+        return len(self.consultas)
+
+    @property
+    def selects(self):
+        return [
+            sql for sql in self.consultas if sql.lstrip().upper().startswith("SELECT")
+        ]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    if _rastreador_atual.get() is not None:
+        conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+    rastreador = _rastreador_atual.get()
+    if rastreador is not None and conn.info.get("inicio_consulta"):
+        rastreador.tempo += time.perf_counter() - conn.info["inicio_consulta"].pop()
+        rastreador.consultas.append(statement)
+
+
+@event.listens_for(Engine, "handle_error")
+def _consulta_com_erro(contexto):
+    # Consulta que falhou não chega ao after_cursor_execute: descarta o
+    # início dela para não deixar a pilha da conexão desalinhada
+    conn = contexto.connection
+    if conn is not None and conn.info.get("inicio_consulta"):
+        conn.info["inicio_consulta"].pop()
+
+
+def _iniciar_medicao():
+    externo = _rastreador_atual.get()
+    rastreador = RastreadorConsultas()
+    return rastreador, (_rastreador_atual.set(rastreador), externo)
+
+
+def _encerrar_medicao(rastreador, estado):
+    token, externo = estado
+    _rastreador_atual.reset(token)
+    # Medições aninhadas (uma requisição dentro de medir_consultas() nos
+    # testes) também contam para a de fora
+    if externo is not None:
+        externo.consultas.extend(rastreador.consultas)
+        externo.tempo += rastreador.tempo
+
+
+@contextmanager
+def medir_consultas():
+    """
+    with medir_consultas() as rastreador: ... conta as consultas do bloco
+    """
+    rastreador, estado = _iniciar_medicao()
+    try:
+        yield rastreador
+    finally:
+        _encerrar_medicao(rastreador, estado)
+
+
+class MetricasRotas:
+    """
+    Totais por rota (endpoint): requisições, consultas, tempo de banco e o
+    maior número de consultas de uma requisição
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, rota, rastreador):
+        with self._trava:
+            metricas = self._rotas.setdefault(
+                rota,
+                {
+                    "requisicoes": 0,
+                    "consultas": 0,
+                    "max_consultas": 0,
+                    "tempo_sql_ms": 0.0,
+                },
+            )
+            metricas["requisicoes"] += 1
+            metricas["consultas"] += rastreador.total
+            metricas["max_consultas"] = max(metricas["max_consultas"], rastreador.total)
+            metricas["tempo_sql_ms"] += rastreador.tempo * 1000
+
+    def para_dict(self):
+        with self._trava:
+            return {
+                rota: {
+                    **metricas,
+                    "tempo_sql_ms": round(metricas["tempo_sql_ms"], 2),
+                    "media_consultas": round(
+                        metricas["consultas"] / metricas["requisicoes"], 1
+                    ),
+                }
+                for rota, metricas in sorted(self._rotas.items())
+            }
+
+    def limpar(self):
+        with self._trava:
+            self._rotas.clear()
+
+
+metricas_rotas = MetricasRotas()
+
+
+def instalar_rastreador(app):
+    """Mede as consultas de cada requisição do app"""
+
+    @app.before_request
+    def _medir_requisicao():
+        g.consultas_sql, g._medicao_consultas = _iniciar_medicao()
+
+    @app.after_request
+    def _registrar_medicao(resposta):
+        rastreador = g.get("consultas_sql")
+        if rastreador is None:
+            return resposta
+        metricas_rotas.registrar(request.endpoint or request.path, rastreador)
+        if app.debug:
+            resposta.headers["X-Consultas-SQL"] = str(rastreador.total)
+            resposta.headers["X-Tempo-SQL-ms"] = f"{rastreador.tempo * 1000:.2f}"
+        return resposta
+
+    @app.teardown_request
+    def _encerrar_medicao_requisicao(erro=None):
+        estado = g.pop("_medicao_consultas", None)
+        if estado is not None:
+            _encerrar_medicao(g.consultas_sql, estado)
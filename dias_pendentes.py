@@ -0,0 +1,174 @@
+"""
+Registro dos dias cuja escala precisa ser recalculada
+
+Alterações de folgas, férias, dias bloqueados e disponibilidades marcam os
+pares (admin, data) afetados; regenerar_dias_pendentes (escala_generator)
+recalcula só esses dias.
+
+As marcas ficam na tabela dia_pendente, compartilhada por todos os
+processos. Durante o flush elas são anotadas na sessão (session.info) e,
+antes do commit, gravadas na mesma transação da alteração: um rollback
+descarta as duas.
+"""
+
+from datetime import date
+
+from sqlalchemy import delete, event, insert, select
+from sqlalchemy.orm import Session, object_session
+
+from models import (
+    db,
+    Funcionario,
+    Folga,
+    Ferias,
+    DiaBloqueado,
+    DisponibilidadeFuncionario,
+    EscalaDiaria,
+    DiaPendente,
+)
+from alteracoes import (
+    admin_do_funcionario,
+    enviar_alteracoes,
+    intervalo_de_datas,
+    valores_do_atributo,
+)
+
+# Chave das marcas em session.info: {"dias": {admin_id: datas},
+# "disponibilidades": {funcionario_id: admin_id}}
+PENDENTES = "dias_pendentes"
+
+
+def _pendentes(session):
+    return session.info.setdefault(PENDENTES, {"dias": {}, "disponibilidades": {}})
+
+
+def marcar_dias(session, admin_id, datas):
+    """
+    Anota na sessão as datas do admin; são gravadas no commit
+    """
+    if admin_id is None:
+        return
+    _pendentes(session)["dias"].setdefault(admin_id, set()).update(datas)
+
+
+def dias_pendentes(admin_id):
+    """
+    Datas pendentes do admin, em ordem
+    """
+    return list(
+        db.session.execute(
+            select(DiaPendente.data)
+            .where(DiaPendente.admin_id == admin_id)
+            .order_by(DiaPendente.data)
+        ).scalars()
+    )
+
+
+def limpar_dias(admin_id, datas):
+    """
+    Desmarca as datas do admin na transação da sessão (não faz commit)
+    """
+    datas = list(datas)
+    if datas:
+        db.session.execute(
+            delete(DiaPendente).where(
+                DiaPendente.admin_id == admin_id, DiaPendente.data.in_(datas)
+            )
+        )
+
+
+@event.listens_for(Folga, "after_insert")
+@event.listens_for(Folga, "after_update")
+@event.listens_for(Folga, "after_delete")
+def _folga_alterada(mapper, connection, folga):
+    for funcionario_id in set(valores_do_atributo(folga, "funcionario_id")):
+        marcar_dias(
+            object_session(folga),
+            admin_do_funcionario(connection, funcionario_id),
+            valores_do_atributo(folga, "data"),
+        )
+
+
+@event.listens_for(Ferias, "after_insert")
+@event.listens_for(Ferias, "after_update")
+@event.listens_for(Ferias, "after_delete")
+def _ferias_alteradas(mapper, connection, ferias):
+    datas = set()
+    for inicio in valores_do_atributo(ferias, "data_inicio"):
+        for fim in valores_do_atributo(ferias, "data_fim"):
+            datas.update(intervalo_de_datas(inicio, fim))
+
+    for funcionario_id in set(valores_do_atributo(ferias, "funcionario_id")):
+        marcar_dias(
+            object_session(ferias),
+            admin_do_funcionario(connection, funcionario_id),
+            datas,
+        )
+
+
+@event.listens_for(DiaBloqueado, "after_insert")
+@event.listens_for(DiaBloqueado, "after_update")
+@event.listens_for(DiaBloqueado, "after_delete")
+def _dia_bloqueado_alterado(mapper, connection, dia_bloqueado):
+    for admin_id in set(valores_do_atributo(dia_bloqueado, "admin_id")):
+        marcar_dias(
+            object_session(dia_bloqueado),
+            admin_id,
+            valores_do_atributo(dia_bloqueado, "data"),
+        )
+
+
+@event.listens_for(DisponibilidadeFuncionario, "after_insert")
+@event.listens_for(DisponibilidadeFuncionario, "after_update")
+@event.listens_for(DisponibilidadeFuncionario, "after_delete")
+def _disponibilidade_alterada(mapper, connection, disponibilidade):
+    # Disponibilidade vale para todos os dias: os dias com escala são
+    # buscados uma vez no commit, para todos os funcionários alterados
+    alterados = _pendentes(object_session(disponibilidade))["disponibilidades"]
+    for funcionario_id in set(valores_do_atributo(disponibilidade, "funcionario_id")):
+        if funcionario_id not in alterados:
+            alterados[funcionario_id] = admin_do_funcionario(connection, funcionario_id)
+
+
+@event.listens_for(Session, "before_commit")
+def _gravar_pendentes(session):
+    enviar_alteracoes(session)
+    pendentes = session.info.pop(PENDENTES, None)
+    if not pendentes:
+        return
+
+    dias = pendentes["dias"]
+    admins = set(pendentes["disponibilidades"].values()) - {None}
+    if admins:
+        # Dias com escala já gerada a partir de hoje (escalas passadas não
+        # são recalculadas)
+        for admin_id, data in session.execute(
+            select(Funcionario.admin_id, EscalaDiaria.data)
+            .join(Funcionario)
+            .where(Funcionario.admin_id.in_(admins), EscalaDiaria.data >= date.today())
+            .distinct()
+        ):
+            dias.setdefault(admin_id, set()).add(data)
+
+    for admin_id, datas in dias.items():
+        if not datas:
+            continue
+        # A transação já tem escrita (a alteração), então no SQLite nenhum
+        # outro processo grava entre a leitura e a inserção
+        existentes = set(
+            session.execute(
+                select(DiaPendente.data).where(
+                    DiaPendente.admin_id == admin_id, DiaPendente.data.in_(datas)
+                )
+            ).scalars()
+        )
+        novas = [
+            {"admin_id": admin_id, "data": data} for data in sorted(datas - existentes)
+        ]
+        if novas:
+            session.execute(insert(DiaPendente), novas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_pendentes(session):
+    session.info.pop(PENDENTES, None)
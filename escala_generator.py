@@ -1,20 +1,36 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 from models import (
     db,
     Funcionario,
     Folga,
     DiaBloqueado,
     Ferias,
-    FaixaHorario,
     DisponibilidadeFuncionario,
     EscalaDiaria,
     Alerta,
 )
+from scheduling_context import SchedulingContext
+from pontuacao import (
+    calcular_prioridade_faixas,
+    compilar_faixas,
+    descontar_horas_descobertas,
+    mascara_horas_operacao,
+)
+from realocacao import realocar_folga
+from fluxo import FluxoCustoMinimo
+from perfil import gravar_perfil, novo_perfil
+from persistencia import GravacaoEmLote, linhas_folgas
+from dias_pendentes import dias_pendentes, limpar_dias
 import calendar
+import multiprocessing
+import os
+import time
+from collections import namedtuple
 from itertools import combinations, permutations
 
 
-def gerar_sugestao_escalas(admin_id, ano, mes):
+def gerar_sugestao_escalas(admin_id, ano, mes, perfil=False):
     """
     Gera uma sugestão de escalas para o mês especificado seguindo as regras:
     - Ninguém folga em dias bloqueados
@@ -23,118 +39,65 @@ def gerar_sugestao_escalas(admin_id, ano, mes):
     - Respeitar férias
     - Considerar preferências de folga
     - Mês da empresa: dia 12 de um mês até dia 11 do próximo
+
+    Com perfil=True o resultado traz o tempo de cada fase (ver perfil.py).
     """
+    perfil = novo_perfil(
+        perfil, "gerar_sugestao_escalas", admin_id=admin_id, ano=ano, mes=mes
+    )
 
-    # Buscar funcionários do admin
-    funcionarios = Funcionario.query.filter_by(admin_id=admin_id, ativo=True).all()
+    # Carregar funcionários, férias e dias bloqueados do período
+    with perfil.fase("carregar_contexto"):
+        contexto = SchedulingContext.para_periodo(admin_id, ano, mes)
+    funcionarios = contexto.funcionarios
 
     if not funcionarios:
         raise Exception("Nenhum funcionário cadastrado")
 
-    # Calcular primeiro e último dia do mês da empresa (dia 12 ao dia 11)
-    primeiro_dia = datetime(ano, mes, 12).date()
+    primeiro_dia = contexto.primeiro_dia
+    ultimo_dia = contexto.ultimo_dia
 
-    # Próximo mês para pegar até dia 11
-    if mes == 12:
-        proximo_mes = 1
-        proximo_ano = ano + 1
-    else:
-        proximo_mes = mes + 1
-        proximo_ano = ano
-
-    ultimo_dia = datetime(proximo_ano, proximo_mes, 11).date()
-
-    # Apagar todas as folgas existentes neste período
-    folgas_existentes = (
-        Folga.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Folga.data >= primeiro_dia,
-            Folga.data <= ultimo_dia,
+    with perfil.fase("fins_de_semana"):
+        # Coletar todos os fins de semana disponíveis no período
+        fins_de_semana_disponiveis = coletar_fins_de_semana(
+            primeiro_dia, ultimo_dia, contexto.dias_bloqueados
         )
-        .all()
-    )
-
-    for folga in folgas_existentes:
-        db.session.delete(folga)
-
-    db.session.commit()
-
-    # Buscar dias bloqueados
-    dias_bloqueados = DiaBloqueado.query.filter(
-        DiaBloqueado.admin_id == admin_id,
-        DiaBloqueado.data >= primeiro_dia,
-        DiaBloqueado.data <= ultimo_dia,
-    ).all()
-
-    dias_bloqueados_set = set(db.data for db in dias_bloqueados)
 
-    # Buscar férias
-    ferias = (
-        Ferias.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Ferias.data_fim >= primeiro_dia,
-            Ferias.data_inicio <= ultimo_dia,
+        # Distribuir fins de semana entre funcionários para maximizar cobertura
+        fins_de_semana_por_funcionario = distribuir_fins_de_semana(
+            funcionarios, fins_de_semana_disponiveis, contexto.ferias_por_funcionario
         )
-        .all()
-    )
 
-    # Criar dicionário de férias por funcionário
-    ferias_por_funcionario = {}
-    for feria in ferias:
-        if feria.funcionario_id not in ferias_por_funcionario:
-            ferias_por_funcionario[feria.funcionario_id] = []
-        ferias_por_funcionario[feria.funcionario_id].append(
-            {"inicio": feria.data_inicio, "fim": feria.data_fim}
+    # Gerar as folgas de todos os funcionários de uma vez (mesmas regras de
+    # gerar_folgas_funcionario, sobre as matrizes do contexto)
+    with perfil.fase("folgas"):
+        novas_folgas = contexto.matriz.gerar_folgas(
+            [funcionario.preferencia_folga for funcionario in funcionarios],
+            fins_de_semana_por_funcionario,
         )
 
-    novas_folgas = []
-
-    # Coletar todos os fins de semana disponíveis no período
-    fins_de_semana_disponiveis = coletar_fins_de_semana(
-        primeiro_dia, ultimo_dia, dias_bloqueados_set
-    )
-
-    # Distribuir fins de semana entre funcionários para maximizar cobertura
-    fins_de_semana_por_funcionario = distribuir_fins_de_semana(
-        funcionarios, fins_de_semana_disponiveis, ferias_por_funcionario
-    )
-
-    # Para cada funcionário, gerar folgas
-    for funcionario in funcionarios:
-        fim_de_semana_atribuido = fins_de_semana_por_funcionario.get(funcionario.id)
-
-        folgas_geradas = gerar_folgas_funcionario(
-            funcionario,
-            primeiro_dia,
-            ultimo_dia,
-            dias_bloqueados_set,
-            ferias_por_funcionario.get(funcionario.id, []),
-            fim_de_semana_atribuido,
-        )
-        novas_folgas.extend(folgas_geradas)
-
-    # Salvar novas folgas
-    for folga_data in novas_folgas:
-        # Verificar se já existe
-        folga_existente = Folga.query.filter_by(
-            funcionario_id=folga_data["funcionario_id"], data=folga_data["data"]
-        ).first()
-
-        if not folga_existente:
-            nova_folga = Folga(
-                funcionario_id=folga_data["funcionario_id"], data=folga_data["data"]
-            )
-            db.session.add(nova_folga)
-
-    db.session.commit()
-
-    return {
+    # Substituir as folgas do período em uma única transação
+    gravacao = GravacaoEmLote()
+    try:
+        with perfil.fase("apagar_folgas"):
+            gravacao.apagar_periodo(Folga, admin_id, primeiro_dia, ultimo_dia)
+        with perfil.fase("inserir_folgas"):
+            gravacao.inserir(Folga, linhas_folgas(novas_folgas))
+        with perfil.fase("commit"):
+            gravacao.confirmar()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    resultado = {
         "sucesso": True,
         "folgas_criadas": len(novas_folgas),
         "funcionarios": len(funcionarios),
+        "persistencia": gravacao.relatorio(),
     }
+    if perfil.ativo:
+        resultado["perfil"] = gravar_perfil(perfil)
+    return resultado
 
 
 def coletar_fins_de_semana(primeiro_dia, ultimo_dia, dias_bloqueados):
@@ -168,50 +131,56 @@ def distribuir_fins_de_semana(
 ):
     """
     Distribui fins de semana entre funcionários para garantir que todos tenham um fim de semana
-    Permite até 2 funcionários por fim de semana se necessário
-    """
-    distribuicao = {}
-    fins_de_semana_alocados = {i: [] for i in range(len(fins_de_semana_disponiveis))}
 
-    # Se tem mais funcionários que fins de semana, alguns vão compartilhar
-    max_por_fds = 1 if len(funcionarios) <= len(fins_de_semana_disponiveis) else 2
-
-    # Primeira passada: tentar dar um fim de semana para cada funcionário
-    for func in funcionarios:
-        # Encontrar um fim de semana onde este funcionário não está de férias
-        # e que ainda tem vaga
-        alocado = False
-
-        for idx, (sabado, domingo) in enumerate(fins_de_semana_disponiveis):
-            # Verificar se já tem o máximo de pessoas neste fim de semana
-            if len(fins_de_semana_alocados[idx]) >= max_por_fds:
-                continue
+    Emparelhamento funcionários x fins de semana resolvido como fluxo de
+    custo mínimo (ver fluxo.FluxoCustoMinimo): só há aresta para os fins de
+    semana fora das férias do funcionário, e a k-ésima pessoa de um mesmo
+    fim de semana custa k. O fluxo máximo de menor custo dá um fim de semana
+    ao maior número possível de funcionários e, entre essas distribuições, a
+    mais equilibrada (menor soma dos quadrados das folgas por fim de semana).
+    """
+    if not fins_de_semana_disponiveis:
+        return {}
+
+    total_funcionarios = len(funcionarios)
+    total_fins = len(fins_de_semana_disponiveis)
+    fonte = total_funcionarios + total_fins
+    sumidouro = fonte + 1
+    fluxo = FluxoCustoMinimo(sumidouro + 1)
+
+    arestas = {}
+    interessados = [0] * total_fins
+    for i, func in enumerate(funcionarios):
+        fluxo.adicionar_aresta(fonte, i, 1, 0)
+        ferias_func = ferias_por_funcionario.get(func.id, [])
+        for w, (sabado, domingo) in enumerate(fins_de_semana_disponiveis):
+            if not esta_em_ferias(sabado, ferias_func) and not esta_em_ferias(
+                domingo, ferias_func
+            ):
+                arestas[i, w] = fluxo.adicionar_aresta(i, total_funcionarios + w, 1, 0)
+                interessados[w] += 1
 
-            # Verificar se funcionário está de férias
-            ferias_func = ferias_por_funcionario.get(func.id, [])
-            em_ferias = False
-            for feria in ferias_func:
-                if (
-                    feria["inicio"] <= sabado <= feria["fim"]
-                    or feria["inicio"] <= domingo <= feria["fim"]
-                ):
-                    em_ferias = True
-                    break
+    # Custo crescente por pessoa a mais no mesmo fim de semana
+    for w, total in enumerate(interessados):
+        for k in range(total):
+            fluxo.adicionar_aresta(total_funcionarios + w, sumidouro, 1, k)
 
-            if not em_ferias:
-                distribuicao[func.id] = (sabado, domingo)
-                fins_de_semana_alocados[idx].append(func.id)
-                alocado = True
-                break
+    fluxo.resolver(fonte, sumidouro)
 
-        # Se não conseguiu alocar (todos fins de semana conflitam com férias),
-        # forçar alocação no primeiro fim de semana com vaga
-        if not alocado:
-            for idx, (sabado, domingo) in enumerate(fins_de_semana_disponiveis):
-                if len(fins_de_semana_alocados[idx]) < max_por_fds:
-                    distribuicao[func.id] = (sabado, domingo)
-                    fins_de_semana_alocados[idx].append(func.id)
-                    break
+    distribuicao = {}
+    carga = [0] * total_fins
+    for (i, w), aresta in arestas.items():
+        if fluxo.fluxo(aresta):
+            distribuicao[funcionarios[i].id] = fins_de_semana_disponiveis[w]
+            carga[w] += 1
+
+    # Férias em todos os fins de semana: fica com o menos ocupado (a folga
+    # cai nas férias e não é gravada, ver gerar_folgas_funcionario)
+    for func in funcionarios:
+        if func.id not in distribuicao:
+            w = carga.index(min(carga))
+            distribuicao[func.id] = fins_de_semana_disponiveis[w]
+            carga[w] += 1
 
     return distribuicao
 
@@ -325,383 +294,356 @@ def esta_em_ferias(data, ferias):
     return False
 
 
-def _calcular_prioridade_faixas(faixas, data, eh_fds):
-    """
-    Calcula prioridade das faixas baseada na cobertura recebida de outras faixas.
-    Faixas que recebem MENOS cobertura de outras têm MAIOR prioridade.
-    Retorna lista de tuplas (faixa, prioridade) ordenada por prioridade (menor número = mais prioritária).
+def gerar_escalas_com_faixas_horario(
+    admin_id,
+    ano,
+    mes,
+    paralelo=False,
+    processos=None,
+    progresso=None,
+    orcamento_segundos=None,
+    otimizacao=None,
+    perfil=False,
+):
     """
-    from datetime import time
-
-    def str_to_minutes(hora_str):
-        """Converte hora em string para minutos desde meia-noite"""
-        h, m = hora_str.split(":")
-        minutos = int(h) * 60 + int(m)
-        # Apenas horários de madrugada (01:00-05:00) são considerados do dia seguinte
-        # Para detectar, verificar se é menor que 6h (360 minutos) E se há faixas que terminam tarde
-        # Solução mais simples: apenas 01:00 deve ser ajustado (horário que cruza meia-noite)
-        if minutos < 120:  # Apenas 00:00 e 01:00 (menos de 2h = madrugada)
-            minutos += 24 * 60
-        return minutos
-
-    faixas_ativas = [
-        f for f in faixas if (eh_fds and f.ativo_fds) or (not eh_fds and f.ativo_semana)
-    ]
-
-    prioridades = []
-
-    for faixa in faixas_ativas:
-        inicio_faixa = str_to_minutes(faixa.hora_inicio)
-        fim_faixa = str_to_minutes(faixa.hora_fim)
-        duracao_faixa = fim_faixa - inicio_faixa
-
-        # Calcular quanto desta faixa é coberto POR OUTRAS faixas (considerando união)
-        minutos_faixa = set(range(inicio_faixa, fim_faixa))
-        minutos_cobertos_por_outras = set()
-
-        for outra_faixa in faixas_ativas:
-            if outra_faixa.id == faixa.id:
-                continue
-
-            inicio_outra = str_to_minutes(outra_faixa.hora_inicio)
-            fim_outra = str_to_minutes(outra_faixa.hora_fim)
-            minutos_outra = set(range(inicio_outra, fim_outra))
-
-            # Adicionar à cobertura apenas os minutos que fazem parte DA FAIXA ATUAL
-            minutos_cobertos_por_outras.update(minutos_faixa & minutos_outra)
-
-        # Calcular percentual da faixa que é coberto por outras
-        if duracao_faixa > 0:
-            percentual_coberto = (
-                len(minutos_cobertos_por_outras) / duracao_faixa
-            ) * 90  # Ajuste de escala para 0-90%
-        else:
-            percentual_coberto = 0
-
-        # Prioridade: quanto MENOS coberto por outras, MENOR o número (mais prioritária)
-        # 0% coberto = prioridade 0 (máxima), 100% coberto = prioridade 100 (mínima)
-        prioridade = percentual_coberto
+    Gera escalas diárias alocando funcionários nas faixas de horário.
+    Prioriza faixas menos cobertas por sobreposição.
 
-        prioridades.append((faixa, prioridade, percentual_coberto))
+    Com paralelo=True, os dias são resolvidos em um pool de processos
+    (processos=None usa um por CPU). O resultado é o mesmo da execução serial.
 
-    # Ordenar por prioridade (menor número = mais importante = menos coberto)
-    prioridades.sort(key=lambda x: x[1])
+    progresso, se informado, é chamado com (dias_resolvidos, total_dias) à
+    medida que os dias são resolvidos.
 
-    return [(f, p) for f, p, _ in prioridades]
+    orcamento_segundos limita o tempo de busca do mês: cada dia recebe o
+    que sobrou dividido pelos dias restantes e, se o tempo acabar, fica com
+    a melhor alocação encontrada (ver "otimalidade" no resultado).
 
+    otimizacao (True ou dict com iteracoes/tempo_segundos/semente) roda em
+    seguida a busca local do período (busca_local.otimizar_periodo). Se
+    ela falhar, as escalas geradas continuam gravadas e "busca_local" traz
+    {"sucesso": False, "erro": mensagem}.
 
-def gerar_escalas_com_faixas_horario(admin_id, ano, mes):
+    perfil=True mede cada fase e o tempo de cada dia; o resultado traz o
+    perfil em "perfil" e ele também vai para o log (ver perfil.py).
     """
-    Gera escalas diárias alocando funcionários nas faixas de horário.
-    Prioriza faixas menos cobertas por sobreposição.
-    """
-    # Buscar faixas de horário do admin
-    faixas = (
-        FaixaHorario.query.filter_by(admin_id=admin_id, ativo=True)
-        .order_by(FaixaHorario.ordem)
-        .all()
+    perfil = novo_perfil(
+        perfil,
+        "gerar_escalas_com_faixas_horario",
+        admin_id=admin_id,
+        ano=ano,
+        mes=mes,
+        paralelo=paralelo,
     )
 
-    if not faixas:
-        raise Exception("Nenhuma faixa de horário cadastrada")
+    # Carregar faixas, funcionários, disponibilidades, folgas, férias e dias
+    # bloqueados do período de uma só vez
+    with perfil.fase("carregar_contexto"):
+        contexto = SchedulingContext.para_periodo(admin_id, ano, mes)
+    primeiro_dia = contexto.primeiro_dia
+    ultimo_dia = contexto.ultimo_dia
 
-    # Buscar funcionários ativos
-    funcionarios = Funcionario.query.filter_by(admin_id=admin_id, ativo=True).all()
+    if not contexto.faixas:
+        raise Exception("Nenhuma faixa de horário cadastrada")
 
-    if not funcionarios:
+    if not contexto.funcionarios:
         raise Exception("Nenhum funcionário cadastrado")
 
-    # Calcular período
-    primeiro_dia = datetime(ano, mes, 12).date()
-    if mes == 12:
-        proximo_mes = 1
-        proximo_ano = ano + 1
-    else:
-        proximo_mes = mes + 1
-        proximo_ano = ano
-    ultimo_dia = datetime(proximo_ano, proximo_mes, 11).date()
-
-    # Apagar escalas diárias existentes do período
-    # Buscar IDs das escalas para deletar (não pode usar delete com join)
-    escalas_para_deletar = (
-        db.session.query(EscalaDiaria.id)
-        .join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            EscalaDiaria.data >= primeiro_dia,
-            EscalaDiaria.data <= ultimo_dia,
-        )
-        .all()
-    )
-
-    if escalas_para_deletar:
-        ids_para_deletar = [e.id for e in escalas_para_deletar]
-        EscalaDiaria.query.filter(EscalaDiaria.id.in_(ids_para_deletar)).delete(
-            synchronize_session=False
-        )
-
-    db.session.commit()
-
     # Gerar folgas automaticamente antes de criar as escalas
-    # Apagar folgas existentes do período
-    folgas_existentes = (
-        Folga.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Folga.data >= primeiro_dia,
-            Folga.data <= ultimo_dia,
+    with perfil.fase("fins_de_semana"):
+        # Coletar fins de semana disponíveis
+        fins_de_semana_disponiveis = coletar_fins_de_semana(
+            primeiro_dia, ultimo_dia, contexto.dias_bloqueados
         )
-        .all()
-    )
-
-    for folga in folgas_existentes:
-        db.session.delete(folga)
-
-    db.session.commit()
-
-    # Buscar dias bloqueados
-    dias_bloqueados = DiaBloqueado.query.filter(
-        DiaBloqueado.admin_id == admin_id,
-        DiaBloqueado.data >= primeiro_dia,
-        DiaBloqueado.data <= ultimo_dia,
-    ).all()
 
-    dias_bloqueados_set = set(db.data for db in dias_bloqueados)
-
-    # Buscar férias para geração de folgas
-    ferias_para_folgas = (
-        Ferias.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Ferias.data_fim >= primeiro_dia,
-            Ferias.data_inicio <= ultimo_dia,
+        # Distribuir fins de semana entre funcionários
+        fins_de_semana_por_funcionario = distribuir_fins_de_semana(
+            contexto.funcionarios,
+            fins_de_semana_disponiveis,
+            contexto.ferias_por_funcionario,
         )
-        .all()
-    )
 
-    # Criar dicionário de férias por funcionário para geração de folgas
-    ferias_por_funcionario = {}
-    for feria in ferias_para_folgas:
-        if feria.funcionario_id not in ferias_por_funcionario:
-            ferias_por_funcionario[feria.funcionario_id] = []
-        ferias_por_funcionario[feria.funcionario_id].append(
-            {"inicio": feria.data_inicio, "fim": feria.data_fim}
+    with perfil.fase("folgas"):
+        # Gerar folgas de todos os funcionários (vetorizado, ver MatrizEscala)
+        novas_folgas = contexto.matriz.gerar_folgas(
+            [func.preferencia_folga for func in contexto.funcionarios],
+            fins_de_semana_por_funcionario,
         )
 
-    # Coletar fins de semana disponíveis
-    fins_de_semana_disponiveis = coletar_fins_de_semana(
-        primeiro_dia, ultimo_dia, dias_bloqueados_set
-    )
-
-    # Distribuir fins de semana entre funcionários
-    fins_de_semana_por_funcionario = distribuir_fins_de_semana(
-        funcionarios, fins_de_semana_disponiveis, ferias_por_funcionario
-    )
+        # As folgas do período passam a ser as recém-geradas
+        contexto.definir_folgas(novas_folgas)
 
-    # Gerar folgas para cada funcionário
-    for func in funcionarios:
-        fim_de_semana_atribuido = fins_de_semana_por_funcionario.get(func.id)
-
-        folgas_func = gerar_folgas_funcionario(
-            func,
-            primeiro_dia,
-            ultimo_dia,
-            dias_bloqueados_set,
-            ferias_por_funcionario.get(func.id, []),
-            fim_de_semana_atribuido,
-        )
+    # Encontrar a melhor alocação de cada dia do período
+    total_dias = (ultimo_dia - primeiro_dia).days + 1
+    if progresso:
+        progresso(0, total_dias)
 
-        # Salvar folgas no banco
-        for folga_data in folgas_func:
-            nova_folga = Folga(
-                funcionario_id=folga_data["funcionario_id"],
-                data=folga_data["data"],
+    if paralelo:
+        # Os dias são resolvidos nos processos do pool: só o total da busca
+        with perfil.fase("busca_combinacoes"):
+            alocacoes = _alocar_dias_em_paralelo(
+                contexto, processos, progresso, orcamento_segundos
             )
-            db.session.add(nova_folga)
+    else:
+        alocacoes = []
+        fim_orcamento = None
+        if orcamento_segundos is not None:
+            fim_orcamento = time.monotonic() + orcamento_segundos
+
+        for data_atual in contexto.dias():
+            # Verificar se é fim de semana
+            eh_fds = data_atual.weekday() in [5, 6]  # Sábado=5, Domingo=6
+
+            # Calcular prioridade das faixas para este dia
+            with perfil.fase("prioridades"):
+                faixas_priorizadas = calcular_prioridade_faixas(
+                    contexto.faixas, data_atual, eh_fds
+                )
 
-    db.session.commit()
+            # Fatia do orçamento: o tempo restante dividido pelos dias que faltam
+            prazo = None
+            if fim_orcamento is not None:
+                agora = time.monotonic()
+                prazo = agora + (fim_orcamento - agora) / (total_dias - len(alocacoes))
 
-    # Buscar folgas e férias do período
-    folgas = (
-        Folga.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Folga.data >= primeiro_dia,
-            Folga.data <= ultimo_dia,
-        )
-        .all()
-    )
+            with perfil.fase("busca_combinacoes"):
+                inicio_dia = time.perf_counter() if perfil.ativo else None
+                melhor_alocacao = _encontrar_melhor_alocacao_dia(
+                    faixas_priorizadas, contexto, data_atual, prazo
+                )
+                if perfil.ativo:
+                    perfil.registrar_dia(data_atual, time.perf_counter() - inicio_dia)
+            alocacoes.append((data_atual, melhor_alocacao))
+            if progresso:
+                progresso(len(alocacoes), total_dias)
+
+    # Gravar folgas e escalas do período em uma única transação: uma
+    # falha no meio não deixa o mês gerado pela metade
+    linhas_escalas = [
+        {"funcionario_id": func_id, "faixa_horario_id": faixa.id, "data": data_atual}
+        for data_atual, melhor_alocacao in alocacoes
+        for func_id, faixa in melhor_alocacao
+    ]
 
-    ferias = (
-        Ferias.query.join(Funcionario)
-        .filter(
-            Funcionario.admin_id == admin_id,
-            Ferias.data_fim >= primeiro_dia,
-            Ferias.data_inicio <= ultimo_dia,
-        )
-        .all()
-    )
+    gravacao = GravacaoEmLote()
+    try:
+        with perfil.fase("gravar_escalas"):
+            escalas = gravacao.sincronizar_escalas(
+                admin_id, contexto.dias(), linhas_escalas
+            )
+        with perfil.fase("apagar_folgas"):
+            gravacao.apagar_periodo(Folga, admin_id, primeiro_dia, ultimo_dia)
+        with perfil.fase("inserir_folgas"):
+            gravacao.inserir(Folga, linhas_folgas(novas_folgas))
+        # O período inteiro acabou de ser recalculado
+        limpar_dias(admin_id, contexto.dias())
+        # Inclui o recálculo dos alertas do período (alertas.py)
+        with perfil.fase("commit"):
+            gravacao.confirmar()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    resultado = {
+        "sucesso": True,
+        "mensagem": "Escalas geradas com sucesso",
+        "escalas": escalas,
+        "persistencia": gravacao.relatorio(),
+        "memo_alocacoes": {
+            "acertos": contexto.memo_acertos,
+            "falhas": contexto.memo_falhas,
+        },
+        "otimalidade": {
+            "dias_otimos": total_dias - len(contexto.dias_interrompidos),
+            "dias_interrompidos": [
+                data.isoformat() for data in sorted(contexto.dias_interrompidos)
+            ],
+        },
+    }
 
-    # Criar dicionário de folgas por data e funcionário
-    folgas_dict = {}
-    for folga in folgas:
-        data_str = folga.data.strftime("%Y-%m-%d")
-        if data_str not in folgas_dict:
-            folgas_dict[data_str] = []
-        folgas_dict[data_str].append(folga.funcionario_id)
+    if otimizacao:
+        from busca_local import otimizar_periodo
+
+        opcoes = otimizacao if isinstance(otimizacao, dict) else {}
+        # A geração já foi gravada: uma falha da busca local fica no
+        # resultado em vez de desfazer o sucesso da geração
+        with perfil.fase("busca_local"):
+            try:
+                resultado["busca_local"] = otimizar_periodo(
+                    admin_id,
+                    ano,
+                    mes,
+                    **{
+                        chave: opcoes[chave]
+                        for chave in ("iteracoes", "tempo_segundos", "semente")
+                        if chave in opcoes
+                    },
+                )
+            except Exception as e:
+                db.session.rollback()
+                resultado["busca_local"] = {"sucesso": False, "erro": str(e)}
 
-    # Criar dicionário de férias por funcionário
-    ferias_dict = {}
-    for feria in ferias:
-        if feria.funcionario_id not in ferias_dict:
-            ferias_dict[feria.funcionario_id] = []
-        ferias_dict[feria.funcionario_id].append(
-            {"inicio": feria.data_inicio, "fim": feria.data_fim}
-        )
+    if perfil.ativo:
+        resultado["perfil"] = gravar_perfil(perfil)
+
+    return resultado
 
-    # Para cada dia do período
-    data_atual = primeiro_dia
-    while data_atual <= ultimo_dia:
-        data_str = data_atual.strftime("%Y-%m-%d")
-        funcionarios_de_folga = folgas_dict.get(data_str, [])
-
-        # Verificar se é fim de semana
-        eh_fds = data_atual.weekday() in [5, 6]  # Sábado=5, Domingo=6
-
-        # Calcular prioridade das faixas para este dia
-        faixas_priorizadas = _calcular_prioridade_faixas(faixas, data_atual, eh_fds)
-        # arr = open("log.txt", "a")
-        # arr.write(f"Data: {data_atual} - Faixas priorizadas: {faixas_priorizadas}\n")
-        # arr.close()
-
-        # Encontrar melhor alocação para este dia
-        melhor_alocacao = _encontrar_melhor_alocacao_dia(
-            faixas_priorizadas,
-            funcionarios,
-            funcionarios_de_folga,
-            ferias_dict,
-            data_atual,
-            admin_id,
-        )
 
-        # Aplicar a melhor alocação
-        for func_id, faixa in melhor_alocacao:
-            escala = EscalaDiaria(
-                funcionario_id=func_id,
-                faixa_horario_id=faixa.id,
-                data=data_atual,
+def regenerar_dias(admin_id, datas):
+    """
+    Recalcula a alocação só das datas informadas, com as folgas, férias e
+    disponibilidades atuais. As folgas não são regeradas e as escalas dos
+    outros dias ficam intactas. Cada dia recebe a mesma alocação que teria
+    numa geração completa com essas folgas.
+    """
+    # Agrupar as datas por mês da empresa
+    datas_por_periodo = {}
+    for data in sorted(set(datas)):
+        periodo = SchedulingContext.periodo_da_data(data)
+        if periodo not in datas_por_periodo:
+            datas_por_periodo[periodo] = []
+        datas_por_periodo[periodo].append(data)
+
+    linhas_escalas = []
+    for (ano, mes), datas_periodo in datas_por_periodo.items():
+        contexto = SchedulingContext.para_periodo(admin_id, ano, mes)
+
+        for data_atual in datas_periodo:
+            eh_fds = data_atual.weekday() in [5, 6]
+            faixas_priorizadas = calcular_prioridade_faixas(
+                contexto.faixas, data_atual, eh_fds
+            )
+            melhor_alocacao = _encontrar_melhor_alocacao_dia(
+                faixas_priorizadas, contexto, data_atual
+            )
+            linhas_escalas.extend(
+                {
+                    "funcionario_id": func_id,
+                    "faixa_horario_id": faixa.id,
+                    "data": data_atual,
+                }
+                for func_id, faixa in melhor_alocacao
             )
-            db.session.add(escala)
 
-        data_atual += timedelta(days=1)
+    datas_regeneradas = [
+        data for datas_periodo in datas_por_periodo.values() for data in datas_periodo
+    ]
 
-    db.session.commit()
+    gravacao = GravacaoEmLote()
+    try:
+        escalas = gravacao.sincronizar_escalas(
+            admin_id, datas_regeneradas, linhas_escalas
+        )
+        limpar_dias(admin_id, datas_regeneradas)
+        gravacao.confirmar()
+    except Exception:
+        db.session.rollback()
+        raise
 
     return {
         "sucesso": True,
-        "mensagem": "Escalas geradas com sucesso",
+        "dias_regenerados": [data.isoformat() for data in datas_regeneradas],
+        "escalas": escalas,
+        "persistencia": gravacao.relatorio(),
     }
 
 
+def regenerar_dias_pendentes(admin_id):
+    """
+    Recalcula os dias marcados por alterações de folgas, férias, dias
+    bloqueados e disponibilidades (ver dias_pendentes)
+    """
+    return regenerar_dias(admin_id, dias_pendentes(admin_id))
+
+
 def _encontrar_melhor_alocacao_dia(
-    faixas_priorizadas,
-    todos_funcionarios,
-    funcionarios_de_folga,
-    ferias_dict,
-    data_atual,
-    admin_id,
+    faixas_priorizadas, contexto, data_atual, prazo=None
 ):
     """
-    Gera todas as combinações possíveis de alocação para o dia e escolhe a melhor.
+    Busca a melhor combinação de alocação para o dia (branch-and-bound).
     Depois aloca funcionários restantes em faixas onde têm disponibilidade.
     Retorna lista de tuplas (funcionario_id, faixa).
+
+    Com prazo (time.monotonic()), usa a melhor combinação encontrada até
+    ele; o dia é registrado em contexto.dias_interrompidos se a busca não
+    terminou.
     """
-    # Buscar disponibilidades de todos os funcionários para todas as faixas
-    disponibilidades_por_faixa = {}
+    disponibilidades_por_faixa = _disponibilidades_do_dia(
+        faixas_priorizadas, contexto, data_atual
+    )
 
-    for faixa, prioridade in faixas_priorizadas:
-        disponibilidades = (
-            DisponibilidadeFuncionario.query.filter_by(faixa_horario_id=faixa.id)
-            .join(Funcionario)
-            .filter(Funcionario.ativo == True, Funcionario.admin_id == admin_id)
-            .all()
+    # Buscar a melhor combinação (branch-and-bound). Dias com o mesmo
+    # problema reaproveitam a combinação já calculada no período.
+    assinatura, funcionarios = _assinatura_problema_dia(
+        faixas_priorizadas, disponibilidades_por_faixa, data_atual
+    )
+    combinacao_rotulada = contexto.alocacao_memorizada(assinatura)
+    if combinacao_rotulada is None:
+        melhor_combinacao, otima = _buscar_melhor_combinacao_com_prazo(
+            faixas_priorizadas, disponibilidades_por_faixa, data_atual, prazo
         )
-
-        funcionarios_disponiveis = []
-        for disp in disponibilidades:
-            func_id = disp.funcionario_id
-
-            # Verificar se não está de folga
-            if func_id in funcionarios_de_folga:
-                continue
-
-            # Verificar se não está de férias
-            if func_id in ferias_dict:
-                em_ferias = False
-                for feria in ferias_dict[func_id]:
-                    if feria["inicio"] <= data_atual <= feria["fim"]:
-                        em_ferias = True
-                        break
-                if em_ferias:
-                    continue
-
-            funcionarios_disponiveis.append(func_id)
-
-        disponibilidades_por_faixa[faixa] = funcionarios_disponiveis
-
-    # Gerar todas as combinações possíveis
-    combinacoes = _gerar_combinacoes_alocacao(
-        faixas_priorizadas, disponibilidades_por_faixa
+        if otima:
+            rotulos = {func_id: i for i, func_id in enumerate(funcionarios)}
+            indices = {faixa: i for i, (faixa, _) in enumerate(faixas_priorizadas)}
+            contexto.memorizar_alocacao(
+                assinatura,
+                [
+                    (rotulos[func_id], indices[faixa])
+                    for func_id, faixa in melhor_combinacao
+                ],
+            )
+        else:
+            contexto.dias_interrompidos.append(data_atual)
+    else:
+        melhor_combinacao = [
+            (funcionarios[rotulo], faixas_priorizadas[indice][0])
+            for rotulo, indice in combinacao_rotulada
+        ]
+
+    return _completar_alocacao_dia(
+        melhor_combinacao,
+        faixas_priorizadas,
+        disponibilidades_por_faixa,
+        contexto,
+        data_atual,
     )
 
-    # Se não há combinações possíveis, retorna vazio
-    if not combinacoes:
-        return []
 
-    # Avaliar cada combinação e escolher a melhor
-    melhor_combinacao = None
-    melhor_pontuacao = -1
+def _disponibilidades_do_dia(faixas_priorizadas, contexto, data_atual):
+    """
+    Funcionários disponíveis (sem folga nem férias) para cada faixa
+    """
+    disponibilidades_por_faixa = {}
 
-    for combinacao in combinacoes:
-        pontuacao = _avaliar_combinacao(combinacao, faixas_priorizadas, data_atual)
-        # arr = open("log.txt", "a")
-        # arr.write(
-        #    f"Data: {data_atual} - Combinacao: {combinacao} - Pontuacao: {pontuacao}\n"
-        # )
-        # arr.close()
+    for faixa, prioridade in faixas_priorizadas:
+        disponibilidades_por_faixa[faixa] = contexto.funcionarios_disponiveis(
+            faixa, data_atual
+        )
 
-        if pontuacao > melhor_pontuacao:
-            melhor_pontuacao = pontuacao
-            melhor_combinacao = combinacao
+    return disponibilidades_por_faixa
 
-    if not melhor_combinacao:
-        melhor_combinacao = []
 
+def _completar_alocacao_dia(
+    melhor_combinacao,
+    faixas_priorizadas,
+    disponibilidades_por_faixa,
+    contexto,
+    data_atual,
+):
+    """
+    Aloca os funcionários que sobraram na primeira faixa (por prioridade)
+    onde têm disponibilidade
+    """
     # Registrar funcionários já alocados
     funcionarios_alocados = set(func_id for func_id, _ in melhor_combinacao)
 
     # Encontrar funcionários disponíveis que sobraram
-    funcionarios_disponiveis_restantes = []
-    for func in todos_funcionarios:
-        # Verificar se já está alocado
-        if func.id in funcionarios_alocados:
-            continue
-
-        # Verificar se está de folga
-        if func.id in funcionarios_de_folga:
-            continue
-
-        # Verificar se está de férias
-        if func.id in ferias_dict:
-            em_ferias = False
-            for feria in ferias_dict[func.id]:
-                if feria["inicio"] <= data_atual <= feria["fim"]:
-                    em_ferias = True
-                    break
-            if em_ferias:
-                continue
-
-        funcionarios_disponiveis_restantes.append(func.id)
+    # (sem folga nem férias e ainda não alocados)
+    funcionarios_disponiveis_restantes = [
+        func_id
+        for func_id in contexto.funcionarios_presentes(data_atual)
+        if func_id not in funcionarios_alocados
+    ]
 
     # Adicionar funcionários restantes nas faixas onde têm disponibilidade
     permitir_multiplos_por_faixa = True  # manter 1 funcionário por faixa neste momento
@@ -717,42 +659,254 @@ def _encontrar_melhor_alocacao_dia(
     return melhor_combinacao
 
 
+def _contexto_processos():
+    """
+    Processos do pool iniciados sem fork: a geração roda em uma thread do
+    RegistroTarefas, dentro do processo do Flask, e um fork copiaria travas
+    seguradas por outras threads
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _alocar_dias_em_paralelo(
+    contexto, processos=None, progresso=None, orcamento_segundos=None
+):
+    """
+    Resolve os dias do período em um pool de processos. Cada problema
+    distinto (pela assinatura) é enviado uma única vez, em formato compacto;
+    o preenchimento com os funcionários restantes é feito aqui.
+    Retorna lista de (data, alocação) na ordem dos dias.
+
+    Com orcamento_segundos, cada problema recebe uma fatia igual do tempo
+    total de todos os processos.
+    """
+    dias = []
+    problemas = {}
+    for data_atual in contexto.dias():
+        eh_fds = data_atual.weekday() in [5, 6]
+        faixas_priorizadas = calcular_prioridade_faixas(
+            contexto.faixas, data_atual, eh_fds
+        )
+        disponibilidades_por_faixa = _disponibilidades_do_dia(
+            faixas_priorizadas, contexto, data_atual
+        )
+        assinatura, funcionarios = _assinatura_problema_dia(
+            faixas_priorizadas, disponibilidades_por_faixa, data_atual
+        )
+        dias.append(
+            (
+                data_atual,
+                faixas_priorizadas,
+                disponibilidades_por_faixa,
+                assinatura,
+                funcionarios,
+            )
+        )
+        if assinatura in problemas:
+            contexto.memo_acertos += 1
+            problemas[assinatura][2] += 1
+        else:
+            contexto.memo_falhas += 1
+            # [problema compacto, funcionários dos rótulos, dias com a assinatura]
+            problemas[assinatura] = [
+                _serializar_problema_dia(
+                    faixas_priorizadas, disponibilidades_por_faixa, data_atual
+                ),
+                funcionarios,
+                1,
+            ]
+
+    processos = processos or os.cpu_count() or 1
+    assinaturas = list(problemas)
+    fatia = None
+    if orcamento_segundos is not None and assinaturas:
+        fatia = min(
+            orcamento_segundos, orcamento_segundos * processos / len(assinaturas)
+        )
+    compactos = [problemas[assinatura][0] + (fatia,) for assinatura in assinaturas]
+
+    combinacoes = {}
+    with ProcessPoolExecutor(
+        max_workers=processos, mp_context=_contexto_processos()
+    ) as executor:
+        resultados = executor.map(
+            _resolver_problema_dia,
+            compactos,
+            chunksize=max(1, len(compactos) // (processos * 4)),
+        )
+        dias_resolvidos = 0
+        for assinatura, (resultado, otima) in zip(assinaturas, resultados):
+            rotulos = {func_id: i for i, func_id in enumerate(problemas[assinatura][1])}
+            combinacoes[assinatura] = [
+                (rotulos[func_id], indice) for func_id, indice in resultado
+            ]
+            if otima:
+                contexto.memorizar_alocacao(assinatura, combinacoes[assinatura])
+            # Todos os dias com esta assinatura ficam resolvidos
+            dias_resolvidos += problemas[assinatura][2]
+            if progresso:
+                progresso(dias_resolvidos, len(dias))
+
+    alocacoes = []
+    for (
+        data_atual,
+        faixas_priorizadas,
+        disponibilidades_por_faixa,
+        assinatura,
+        funcionarios,
+    ) in dias:
+        if assinatura not in contexto.alocacoes_memorizadas:
+            contexto.dias_interrompidos.append(data_atual)
+        melhor_combinacao = [
+            (funcionarios[rotulo], faixas_priorizadas[indice][0])
+            for rotulo, indice in combinacoes[assinatura]
+        ]
+        alocacoes.append(
+            (
+                data_atual,
+                _completar_alocacao_dia(
+                    melhor_combinacao,
+                    faixas_priorizadas,
+                    disponibilidades_por_faixa,
+                    contexto,
+                    data_atual,
+                ),
+            )
+        )
+
+    return alocacoes
+
+
+# Faixa do problema compacto enviado aos processos do pool
+FaixaProblema = namedtuple("FaixaProblema", ["id", "mascara_horas"])
+
+
+def _serializar_problema_dia(faixas_priorizadas, disponibilidades_por_faixa, data):
+    """
+    Problema do dia só com tipos simples, para enviar a outro processo:
+    (data, ((id, máscara de horas, prioridade), ...), (candidatos por faixa, ...))
+    """
+    return (
+        data,
+        tuple(
+            (faixa.id, faixa.mascara_horas, prioridade)
+            for faixa, prioridade in faixas_priorizadas
+        ),
+        tuple(
+            tuple(disponibilidades_por_faixa.get(faixa, []))
+            for faixa, _ in faixas_priorizadas
+        ),
+    )
+
+
+def _resolver_problema_dia(problema):
+    """
+    Executado nos processos do pool: resolve um problema compacto, mais a
+    fatia de tempo em segundos (ou None), e retorna (combinação, otima), com
+    a combinação como lista de (funcionario_id, índice da faixa)
+    """
+    data, faixas, candidatos, fatia = problema
+    prazo = None if fatia is None else time.monotonic() + fatia
+    faixas_priorizadas = [
+        (FaixaProblema(faixa_id, mascara_horas), prioridade)
+        for faixa_id, mascara_horas, prioridade in faixas
+    ]
+    indices = {faixa: i for i, (faixa, _) in enumerate(faixas_priorizadas)}
+    disponibilidades_por_faixa = {
+        faixa: list(lista) for (faixa, _), lista in zip(faixas_priorizadas, candidatos)
+    }
+
+    combinacao, otima = _buscar_melhor_combinacao_com_prazo(
+        faixas_priorizadas, disponibilidades_por_faixa, data, prazo
+    )
+    return [(func_id, indices[faixa]) for func_id, faixa in combinacao], otima
+
+
+def _assinatura_problema_dia(
+    faixas_priorizadas, disponibilidades_por_faixa, data_atual
+):
+    """
+    Chave que identifica o problema resolvido por _buscar_melhor_combinacao,
+    sem depender de quais funcionários estão disponíveis, só de como eles se
+    repetem entre as faixas. Retorna (assinatura, funcionarios), onde
+    funcionarios[i] é o ID que recebeu o rótulo i na assinatura.
+
+    Cada faixa guarda só os primeiros k candidatos, sendo k - 1 o número de
+    outras faixas que disputam algum funcionário com ela: essas faixas usam
+    no máximo k - 1 dos primeiros k candidatos, então sempre sobra um que
+    vem antes na ordem da busca e empata na pontuação com qualquer
+    candidato posterior. A combinação escolhida nunca vai além dessa posição.
+    """
+    eh_fds = data_atual.weekday() in [5, 6]
+    listas = [
+        disponibilidades_por_faixa.get(faixa, []) for faixa, _ in faixas_priorizadas
+    ]
+    conjuntos = [set(lista) for lista in listas]
+
+    rotulos = {}
+    funcionarios = []
+    faixas_assinatura = []
+    for i, lista in enumerate(listas):
+        concorrentes = sum(
+            1
+            for j, outro in enumerate(conjuntos)
+            if j != i and not conjuntos[i].isdisjoint(outro)
+        )
+        candidatos = []
+        for func_id in lista[: concorrentes + 1]:
+            if func_id not in rotulos:
+                rotulos[func_id] = len(funcionarios)
+                funcionarios.append(func_id)
+            candidatos.append(rotulos[func_id])
+        faixas_assinatura.append((faixas_priorizadas[i][0].id, tuple(candidatos)))
+
+    return (eh_fds, tuple(faixas_assinatura)), funcionarios
+
+
 def _gerar_combinacoes_alocacao(faixas_priorizadas, disponibilidades_por_faixa):
     """
-    Gera todas as combinações válidas de alocação.
+    Gera (sob demanda) todas as combinações válidas de alocação.
     Cada funcionário pode trabalhar no máximo 1 turno por dia.
-    """
 
-    def gerar_recursivo(index, alocacao_atual, funcionarios_usados):
+    As combinações são produzidas uma a uma, na mesma ordem de sempre; o
+    prefixo da alocação é uma lista encadeada compartilhada entre os ramos e
+    o conjunto de funcionários usados é desfeito ao voltar de cada ramo, então
+    a memória fica proporcional ao número de faixas.
+    """
+    total_faixas = len(faixas_priorizadas)
+    funcionarios_usados = set()
+
+    def montar_combinacao(prefixo):
+        # prefixo = ((func_id, faixa), prefixo_anterior) ou None
+        combinacao = []
+        while prefixo is not None:
+            par, prefixo = prefixo
+            combinacao.append(par)
+        combinacao.reverse()
+        return combinacao
+
+    def gerar_recursivo(index, prefixo):
         # Caso base: percorremos todas as faixas
-        if index >= len(faixas_priorizadas):
-            return [alocacao_atual[:]]  # Retorna cópia da alocação atual
+        if index >= total_faixas:
+            yield montar_combinacao(prefixo)
+            return
 
         faixa, _ = faixas_priorizadas[index]
         funcionarios_disponiveis = disponibilidades_por_faixa.get(faixa, [])
 
-        todas_combinacoes = []
-
         # Opção 1: Não alocar ninguém nesta faixa (deixar descoberta)
-        todas_combinacoes.extend(
-            gerar_recursivo(index + 1, alocacao_atual, funcionarios_usados)
-        )
+        yield from gerar_recursivo(index + 1, prefixo)
 
         # Opção 2: Alocar um funcionário disponível que ainda não foi usado
         for func_id in funcionarios_disponiveis:
             if func_id not in funcionarios_usados:
-                nova_alocacao = alocacao_atual + [(func_id, faixa)]
-                novos_usados = funcionarios_usados | {func_id}
-                todas_combinacoes.extend(
-                    gerar_recursivo(index + 1, nova_alocacao, novos_usados)
-                )
-
-        return todas_combinacoes
+                funcionarios_usados.add(func_id)
+                yield from gerar_recursivo(index + 1, ((func_id, faixa), prefixo))
+                funcionarios_usados.discard(func_id)
 
-    # Gerar todas as combinações
-    todas = gerar_recursivo(0, [], set())
-
-    return todas
+    return gerar_recursivo(0, None)
 
 
 def _avaliar_combinacao(combinacao, faixas_priorizadas, data_atual):
@@ -830,185 +984,176 @@ def _avaliar_combinacao(combinacao, faixas_priorizadas, data_atual):
     return pontuacao
 
 
-def realocar_horarios_por_folga(data, funcionario_id_folga, admin_id):
+def _melhor_combinacao_exaustiva(
+    faixas_priorizadas, disponibilidades_por_faixa, data_atual
+):
     """
-    Quando um funcionário entra de folga, realoca os horários
-    garantindo que todas as faixas fiquem cobertas
+    Avalia todas as combinações com _avaliar_combinacao e retorna a melhor.
+    As combinações são pontuadas à medida que são geradas, guardando apenas
+    a melhor. Referência usada para validar _buscar_melhor_combinacao.
     """
-    # Buscar escalas deste funcionário neste dia
-    escalas = EscalaDiaria.query.filter_by(
-        funcionario_id=funcionario_id_folga, data=data
-    ).all()
-
-    # Para cada escala (faixa de horário) que ele estava alocado
-    for escala in escalas:
-        faixa = escala.faixa_horario
-
-        # Buscar funcionários disponíveis para esta faixa
-        disponibilidades = (
-            DisponibilidadeFuncionario.query.filter_by(faixa_horario_id=faixa.id)
-            .join(Funcionario)
-            .filter(
-                Funcionario.ativo == True,
-                Funcionario.admin_id == admin_id,
-                Funcionario.id != funcionario_id_folga,
-            )
-            .all()
-        )
-
-        # Buscar folgas e férias deste dia
-        folgas = (
-            Folga.query.join(Funcionario)
-            .filter(Funcionario.admin_id == admin_id, Folga.data == data)
-            .all()
-        )
-
-        ferias = (
-            Ferias.query.join(Funcionario)
-            .filter(
-                Funcionario.admin_id == admin_id,
-                Ferias.data_inicio <= data,
-                Ferias.data_fim >= data,
-            )
-            .all()
-        )
-
-        funcionarios_de_folga = [f.funcionario_id for f in folgas]
-        funcionarios_de_ferias = [f.funcionario_id for f in ferias]
-        funcionarios_indisponiveis = set(funcionarios_de_folga + funcionarios_de_ferias)
+    melhor_combinacao = []
+    melhor_pontuacao = -1
 
-        # Buscar funcionários já alocados neste dia
-        funcionarios_ja_alocados = set(
-            [e.funcionario_id for e in EscalaDiaria.query.filter_by(data=data).all()]
-        )
+    for combinacao in _gerar_combinacoes_alocacao(
+        faixas_priorizadas, disponibilidades_por_faixa
+    ):
+        pontuacao = _avaliar_combinacao(combinacao, faixas_priorizadas, data_atual)
 
-        # Encontrar substituto
-        substituto = None
-        for disp in disponibilidades:
-            func_id = disp.funcionario_id
-            if func_id not in funcionarios_indisponiveis:
-                # Preferir alguém que já está trabalhando neste dia (remanejamento)
-                if func_id in funcionarios_ja_alocados:
-                    substituto = func_id
-                    break
+        if pontuacao > melhor_pontuacao:
+            melhor_pontuacao = pontuacao
+            melhor_combinacao = combinacao
 
-        # Se não encontrou ninguém já trabalhando, pegar qualquer disponível
-        if not substituto:
-            for disp in disponibilidades:
-                func_id = disp.funcionario_id
-                if func_id not in funcionarios_indisponiveis:
-                    substituto = func_id
-                    break
+    return melhor_combinacao
 
-        # Atualizar escala
-        if substituto:
-            escala.funcionario_id = substituto
-        else:
-            # Se não encontrou ninguém, remover a escala (faixa ficará descoberta)
-            db.session.delete(escala)
 
-    db.session.commit()
+def _buscar_melhor_combinacao(
+    faixas_priorizadas, disponibilidades_por_faixa, data_atual
+):
+    """
+    Encontra a combinação de maior pontuação segundo _avaliar_combinacao sem
+    enumerar todas as combinações (branch-and-bound).
+    """
+    combinacao, _ = _buscar_melhor_combinacao_com_prazo(
+        faixas_priorizadas, disponibilidades_por_faixa, data_atual
+    )
+    return combinacao
 
 
-def _horario_coberto_por_outras_faixas(data, faixa_vazia, todas_faixas):
+def _buscar_melhor_combinacao_com_prazo(
+    faixas_priorizadas, disponibilidades_por_faixa, data_atual, prazo=None
+):
     """
-    Verifica se o período de uma faixa vazia está totalmente coberto por outras faixas.
-    Retorna True se o período está coberto, False caso contrário.
+    Branch-and-bound com prazo opcional (valor de time.monotonic()).
+    Retorna (combinação, otima): se o prazo acabar antes de a busca terminar,
+    devolve a melhor combinação encontrada até então e otima=False.
+
+    Percorre as faixas na mesma ordem de _gerar_combinacoes_alocacao (primeiro
+    deixar descoberta, depois cada funcionário disponível) e descarta ramos
+    cujo limite superior não supera a melhor combinação encontrada. Como só
+    troca a melhor combinação quando a pontuação é estritamente maior,
+    retorna a mesma combinação que a avaliação exaustiva.
+
+    Uma alocação gulosa inicial (primeiro candidato livre de cada faixa) dá
+    uma boa resposta desde o início e ajuda a podar: ramos que não alcançam
+    nem a pontuação gulosa são descartados. Empates com ela continuam sendo
+    explorados, para que a combinação final seja a mesma da busca completa.
     """
-    from datetime import datetime, time
-
-    # Converter strings de hora para objetos time
-    def str_to_time(hora_str):
-        h, m = hora_str.split(":")
-        return time(int(h), int(m))
+    eh_fds = data_atual.weekday() in [5, 6]
+    mascara_operacao = mascara_horas_operacao(eh_fds)
+
+    faixas_compiladas = compilar_faixas(faixas_priorizadas)
+    total_faixas = len(faixas_compiladas)
+    faixas = [fc.faixa for fc in faixas_compiladas]
+    mascaras = [fc.mascara_horas for fc in faixas_compiladas]
+    pontos_cobertura = [fc.pontos_cobertura for fc in faixas_compiladas]
+    penalidades = [fc.penalidade for fc in faixas_compiladas]
+    candidatos = [disponibilidades_por_faixa.get(faixa, []) for faixa in faixas]
+
+    # A primeira combinação enumerada (todas descobertas) vale 0
+    melhor = {"pontuacao": 0, "combinacao": []}
+    alocacao = []
+    funcionarios_usados = set()
+    estado = {"nos": 0, "interrompida": False}
+
+    def pontuar(pontuacao_parcial, total_alocados, mascara_coberta):
+        # Mesma sequência de operações de _avaliar_combinacao
+        return descontar_horas_descobertas(
+            pontuacao_parcial + total_alocados * 100, mascara_operacao, mascara_coberta
+        )
 
-    inicio_vazio = str_to_time(faixa_vazia.hora_inicio)
-    fim_vazio = str_to_time(faixa_vazia.hora_fim)
+    # Alocação gulosa
+    gulosa = []
+    usados_gulosa = set()
+    pontuacao_gulosa = 0
+    mascara_gulosa = 0
+    for i in range(total_faixas):
+        livre = next((c for c in candidatos[i] if c not in usados_gulosa), None)
+        if livre is None:
+            pontuacao_gulosa -= penalidades[i]
+        else:
+            gulosa.append((livre, faixas[i]))
+            usados_gulosa.add(livre)
+            pontuacao_gulosa += pontos_cobertura[i]
+            mascara_gulosa |= mascaras[i]
+    pontuacao_gulosa = pontuar(pontuacao_gulosa, len(gulosa), mascara_gulosa)
+
+    def limite_superior(index, pontuacao_parcial, mascara_coberta):
+        # Considera coberta toda faixa restante que ainda tem algum candidato
+        # livre. As parcelas são somadas na mesma ordem da pontuação final,
+        # então o limite nunca fica abaixo de uma folha deste ramo, nem por
+        # arredondamento.
+        total_alocados = len(alocacao)
+        for i in range(index, total_faixas):
+            if any(c not in funcionarios_usados for c in candidatos[i]):
+                pontuacao_parcial += pontos_cobertura[i]
+                total_alocados += 1
+                mascara_coberta |= mascaras[i]
+            else:
+                pontuacao_parcial -= penalidades[i]
+        return pontuar(pontuacao_parcial, total_alocados, mascara_coberta)
+
+    def buscar(index, pontuacao_parcial, mascara_coberta):
+        if estado["interrompida"]:
+            return
+
+        # Consultar o relógio no primeiro nó e depois a cada 256
+        estado["nos"] += 1
+        if prazo is not None and estado["nos"] % 256 == 1:
+            if time.monotonic() >= prazo:
+                estado["interrompida"] = True
+                return
+
+        if index >= total_faixas:
+            if not alocacao:
+                return
+            pontuacao = pontuar(pontuacao_parcial, len(alocacao), mascara_coberta)
+            if pontuacao > melhor["pontuacao"]:
+                melhor["pontuacao"] = pontuacao
+                melhor["combinacao"] = alocacao[:]
+            return
+
+        # Nenhuma combinação deste ramo pode superar a melhor encontrada
+        limite = limite_superior(index, pontuacao_parcial, mascara_coberta)
+        if limite <= melhor["pontuacao"] or limite < pontuacao_gulosa:
+            return
+
+        faixa = faixas[index]
 
-    # Buscar todas as escalas do dia (exceto da faixa vazia)
-    escalas_dia = (
-        EscalaDiaria.query.filter_by(data=data)
-        .filter(EscalaDiaria.faixa_horario_id != faixa_vazia.id)
-        .all()
-    )
+        # Opção 1: Não alocar ninguém nesta faixa (deixar descoberta)
+        buscar(index + 1, pontuacao_parcial - penalidades[index], mascara_coberta)
 
-    if not escalas_dia:
-        return False  # Não há outras faixas alocadas
-
-    # Coletar todos os períodos cobertos
-    periodos_cobertos = []
-    for escala in escalas_dia:
-        faixa = escala.faixa_horario
-        inicio = str_to_time(faixa.hora_inicio)
-        fim = str_to_time(faixa.hora_fim)
-        periodos_cobertos.append((inicio, fim))
-
-    # Ordenar períodos por hora de início
-    periodos_cobertos.sort()
-
-    # Verificar se os períodos cobrem completamente a faixa vazia
-    # Considera que horários podem cruzar meia-noite (ex: 19:00-01:00)
-    if fim_vazio < inicio_vazio:  # Faixa vazia cruza meia-noite
-        # Precisa cobrir de inicio_vazio até 23:59:59 E de 00:00:00 até fim_vazio
-        cobre_noite = False
-        cobre_manha = False
-
-        for inicio_c, fim_c in periodos_cobertos:
-            if fim_c < inicio_c:  # Período coberto também cruza meia-noite
-                if inicio_c <= inicio_vazio and fim_c >= fim_vazio:
-                    return True  # Um único período cobre tudo
-            else:  # Período coberto não cruza meia-noite
-                if inicio_c <= inicio_vazio:
-                    cobre_noite = True
-                if fim_c >= fim_vazio:
-                    cobre_manha = True
-
-        return cobre_noite and cobre_manha
-
-    else:  # Faixa vazia não cruza meia-noite
-        cobertura_atual = None
-
-        for inicio_c, fim_c in periodos_cobertos:
-            # Verificar períodos que cruzam meia-noite (ex: 19:00-01:00 cobre 17:00-23:00)
-            if fim_c < inicio_c:  # Período coberto cruza meia-noite
-                # Exemplo: 19:00-01:00 cruza meia-noite
-                # Verifica sobreposição com: 19:00-23:59 E 00:00-01:00
-
-                # Verifica se a faixa vazia (17:00-23:00) sobrepõe com 19:00-23:59
-                if inicio_c <= fim_vazio and fim_vazio > inicio_c:
-                    if cobertura_atual is None:
-                        cobertura_atual = fim_vazio  # 19:00 cobre até 23:59
-                    else:
-                        cobertura_atual = max(cobertura_atual, fim_vazio)
-
-                # Verifica se a faixa vazia sobrepõe com 00:00-01:00 (apenas se faixa vazia encostar na meia-noite)
-                if inicio_vazio < time(0, 0) or (
-                    inicio_vazio == time(0, 0) and fim_vazio > time(0, 0)
-                ):
-                    # Faixa vazia começa em ou antes da meia-noite
-                    if fim_c > time(0, 0):
-                        if cobertura_atual is None:
-                            cobertura_atual = fim_c
-                        else:
-                            cobertura_atual = max(cobertura_atual, fim_c)
+        # Opção 2: Alocar um funcionário disponível que ainda não foi usado
+        nova_mascara = mascara_coberta | mascaras[index]
+        for func_id in candidatos[index]:
+            if func_id in funcionarios_usados:
                 continue
+            alocacao.append((func_id, faixa))
+            funcionarios_usados.add(func_id)
+            buscar(index + 1, pontuacao_parcial + pontos_cobertura[index], nova_mascara)
+            funcionarios_usados.discard(func_id)
+            alocacao.pop()
 
-            # Período coberto não cruza meia-noite
-            # Verificar se este período se sobrepõe com a faixa vazia
-            if fim_c < inicio_vazio or inicio_c > fim_vazio:
-                continue  # Não há sobreposição
+    buscar(0, 0, 0)
 
-            # Há sobreposição - verificar se estende a cobertura
-            if cobertura_atual is None:
-                if inicio_c <= inicio_vazio:
-                    cobertura_atual = fim_c
-            else:
-                # Se o novo período começa antes do fim da cobertura atual (sobreposição)
-                if inicio_c <= cobertura_atual:
-                    cobertura_atual = max(cobertura_atual, fim_c)
+    if estado["interrompida"]:
+        if gulosa and pontuacao_gulosa > melhor["pontuacao"]:
+            return gulosa, False
+        return melhor["combinacao"], False
 
-        # Verificar se a cobertura alcançou o fim da faixa vazia
-        return cobertura_atual is not None and cobertura_atual >= fim_vazio
+    return melhor["combinacao"], True
+
+
+def realocar_horarios_por_folga(data, funcionario_id_folga, admin_id):
+    """
+    Quando um funcionário entra de folga, realoca os horários
+    garantindo que todas as faixas fiquem cobertas
+
+    As faixas dele são preenchidas por cadeias curtas de substituições,
+    pontuadas como na geração (ver realocacao.realocar_folga); o que não
+    puder ser coberto fica descoberto e a escala é removida.
+    """
+    return realocar_folga(data, funcionario_id_folga, admin_id)
 
 
 def verificar_alertas_escalas(admin_id, ano, mes):
@@ -1018,134 +1163,6 @@ def verificar_alertas_escalas(admin_id, ano, mes):
     2. Faixas de horário sem cobertura (considerando sobreposição)
     Retorna lista de dicionários com informações dos alertas.
     """
-    # Calcular período
-    primeiro_dia = datetime(ano, mes, 12).date()
-    if mes == 12:
-        proximo_mes = 1
-        proximo_ano = ano + 1
-    else:
-        proximo_mes = mes + 1
-        proximo_ano = ano
-    ultimo_dia = datetime(proximo_ano, proximo_mes, 11).date()
-
-    alertas_lista = []
-
-    # 1. Verificar excesso de dias consecutivos
-    funcionarios = Funcionario.query.filter_by(admin_id=admin_id, ativo=True).all()
-
-    for func in funcionarios:
-        dias_consecutivos = 0
-        max_consecutivos = 0
-        data_inicio_sequencia = None
-
-        data_atual = primeiro_dia
-        while data_atual <= ultimo_dia:
-            # Verificar se está trabalhando neste dia
-            escalas = EscalaDiaria.query.filter_by(
-                funcionario_id=func.id, data=data_atual
-            ).first()
-
-            # Verificar se está de folga ou férias
-            folga = Folga.query.filter_by(
-                funcionario_id=func.id, data=data_atual
-            ).first()
-
-            ferias = Ferias.query.filter(
-                Ferias.funcionario_id == func.id,
-                Ferias.data_inicio <= data_atual,
-                Ferias.data_fim >= data_atual,
-            ).first()
-
-            if escalas and not folga and not ferias:
-                # Está trabalhando
-                if dias_consecutivos == 0:
-                    data_inicio_sequencia = data_atual
-                dias_consecutivos += 1
-                if dias_consecutivos > max_consecutivos:
-                    max_consecutivos = dias_consecutivos
-            else:
-                # Não está trabalhando
-                if dias_consecutivos > 6:
-                    # Adicionar alerta à lista
-                    alertas_lista.append(
-                        {
-                            "tipo": "excesso_dias",
-                            "severidade": "alerta",
-                            "mensagem": f'{func.nome} trabalhou {dias_consecutivos} dias consecutivos (de {data_inicio_sequencia.strftime("%d/%m")} a {(data_atual - timedelta(days=1)).strftime("%d/%m")})',
-                            "data_referencia": data_inicio_sequencia,
-                            "funcionario_id": func.id,
-                            "funcionario_nome": func.nome,
-                        }
-                    )
-
-                dias_consecutivos = 0
-
-            data_atual += timedelta(days=1)
-
-        # Verificar se terminou com sequência longa
-        if dias_consecutivos > 6:
-            alertas_lista.append(
-                {
-                    "tipo": "excesso_dias",
-                    "severidade": "alerta",
-                    "mensagem": f'{func.nome} trabalhou {dias_consecutivos} dias consecutivos (de {data_inicio_sequencia.strftime("%d/%m")} a {ultimo_dia.strftime("%d/%m")})',
-                    "data_referencia": data_inicio_sequencia,
-                    "funcionario_id": func.id,
-                    "funcionario_nome": func.nome,
-                }
-            )
-
-    # 2. Verificar falta de cobertura
-    faixas = FaixaHorario.query.filter_by(admin_id=admin_id, ativo=True).all()
-
-    data_atual = primeiro_dia
-    while data_atual <= ultimo_dia:
-        # Verificar se é fim de semana (sábado=5, domingo=6)
-        eh_fds = data_atual.weekday() in [5, 6]
-
-        for faixa in faixas:
-            # Verificar se faixa está ativa neste tipo de dia
-            if eh_fds and not faixa.ativo_fds:
-                continue
-            if not eh_fds and not faixa.ativo_semana:
-                continue
-
-            # Verificar se há funcionários disponíveis para esta faixa
-            funcionarios_disponiveis = (
-                DisponibilidadeFuncionario.query.filter_by(faixa_horario_id=faixa.id)
-                .join(Funcionario)
-                .filter(Funcionario.ativo == True)
-                .count()
-            )
-
-            # Se não há nenhum funcionário disponível para esta faixa, não gerar alerta
-            # if funcionarios_disponiveis == 0:
-            #    continue    # Gerar alerta
-
-            # Verificar se há alguém alocado
-            escala = EscalaDiaria.query.filter_by(
-                faixa_horario_id=faixa.id, data=data_atual
-            ).first()
-
-            if not escala:
-                # Verificar se o horário está coberto por outras faixas
-                if _horario_coberto_por_outras_faixas(data_atual, faixa, faixas):
-                    continue  # Está coberto, não gerar alerta
-
-                # Sem cobertura e não está coberto por outras faixas!
-                tipo_dia = "fim de semana" if eh_fds else "dia de semana"
-                alertas_lista.append(
-                    {
-                        "tipo": "sem_cobertura",
-                        "severidade": "critico",
-                        "mensagem": f'Faixa {faixa.hora_inicio}-{faixa.hora_fim} sem cobertura no dia {data_atual.strftime("%d/%m/%Y")} ({tipo_dia})',
-                        "data_referencia": data_atual,
-                        "faixa_horario_id": faixa.id,
-                        "faixa_hora_inicio": faixa.hora_inicio,
-                        "faixa_hora_fim": faixa.hora_fim,
-                    }
-                )
-
-        data_atual += timedelta(days=1)
+    from alertas import calcular_alertas
 
-    return alertas_lista
+    return calcular_alertas(admin_id, *SchedulingContext.limites_periodo(ano, mes))
@@ -0,0 +1,100 @@
+"""
+Fluxo de custo mínimo em grafo dirigido com capacidades inteiras
+
+Caminhos mínimos sucessivos: cada rodada procura, com Dijkstra sobre os
+custos reduzidos pelos potenciais dos vértices, o caminho mais barato da
+fonte ao sumidouro no grafo residual e empurra por ele o máximo possível.
+Com custos iniciais não negativos o resultado é o fluxo máximo de menor
+custo, em tempo polinomial (O(F · A log V) para um fluxo total F).
+"""
+
+import heapq
+
+INFINITO = float("inf")
+
+
+class FluxoCustoMinimo:
+    """
+    Grafo de vértices 0..total_vertices-1. As arestas ficam em listas
+    paralelas (destino, capacidade residual, custo); a aresta a e a sua
+    reversa residual são a e a ^ 1.
+    """
+
+    def __init__(self, total_vertices):
+        self.saidas = [[] for _ in range(total_vertices)]
+        self.destino = []
+        self.capacidade = []
+        self.custo = []
+        self._capacidade_original = []
+
+    def adicionar_aresta(self, origem, destino, capacidade, custo):
+        """
+        Aresta origem -> destino; retorna o índice usado em fluxo()
+        """
+        aresta = len(self.destino)
+        for de, para, cap, c in (
+            (origem, destino, capacidade, custo),
+            (destino, origem, 0, -custo),
+        ):
+            self.saidas[de].append(len(self.destino))
+            self.destino.append(para)
+            self.capacidade.append(cap)
+            self.custo.append(c)
+            self._capacidade_original.append(cap)
+        return aresta
+
+    def fluxo(self, aresta):
+        return self._capacidade_original[aresta] - self.capacidade[aresta]
+
+    def resolver(self, fonte, sumidouro):
+        """
+        Fluxo máximo de custo mínimo da fonte ao sumidouro. Retorna
+        (fluxo, custo).
+        """
+        total_vertices = len(self.saidas)
+        potencial = [0] * total_vertices
+        fluxo_total = 0
+        custo_total = 0
+
+        while True:
+            distancia = [INFINITO] * total_vertices
+            anterior = [-1] * total_vertices
+            distancia[fonte] = 0
+            fila = [(0, fonte)]
+            while fila:
+                d, v = heapq.heappop(fila)
+                if d > distancia[v]:
+                    continue
+                for aresta in self.saidas[v]:
+                    if self.capacidade[aresta] <= 0:
+                        continue
+                    w = self.destino[aresta]
+                    nova = d + self.custo[aresta] + potencial[v] - potencial[w]
+                    if nova < distancia[w]:
+                        distancia[w] = nova
+                        anterior[w] = aresta
+                        heapq.heappush(fila, (nova, w))
+
+            if distancia[sumidouro] == INFINITO:
+                break
+            for v in range(total_vertices):
+                if distancia[v] < INFINITO:
+                    potencial[v] += distancia[v]
+
+            # Gargalo do caminho e aumento do fluxo
+            empurrar = INFINITO
+            v = sumidouro
+            while v != fonte:
+                aresta = anterior[v]
+                empurrar = min(empurrar, self.capacidade[aresta])
+                v = self.destino[aresta ^ 1]
+            v = sumidouro
+            while v != fonte:
+                aresta = anterior[v]
+                self.capacidade[aresta] -= empurrar
+                self.capacidade[aresta ^ 1] += empurrar
+                custo_total += empurrar * self.custo[aresta]
+                v = self.destino[aresta ^ 1]
+            fluxo_total += empurrar
+
+        return fluxo_total, custo_total
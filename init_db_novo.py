@@ -5,6 +5,7 @@ ATENÇÃO: Este script apaga o banco existente!
 
 from app import app
 from models import db
+from migracoes import executar_migracoes
 import os
 
 
@@ -18,6 +19,7 @@ def recriar_banco():
 
         # Criar todas as tabelas
         db.create_all()
+        executar_migracoes()
         print("✓ Banco de dados recriado com sucesso!")
         print("\nNovas tabelas criadas:")
         print("  - admin")
@@ -0,0 +1,338 @@
+"""
+Modelo da escala de um período em arrays NumPy
+
+Funcionários, dias e faixas viram índices (na ordem do SchedulingContext) e
+o estado do período fica em matrizes compactas:
+
+- disponibilidade: funcionário x faixa (bool)
+- folga, ferias, ausente: funcionário x dia (bool); bloqueado: dia (bool)
+- alocacao: funcionário x dia -> índice da faixa (SEM_FAIXA = sem escala)
+
+Um ano com 500 funcionários e 20 faixas ocupa menos de 1 MB. A conversão
+de e para o ORM fica nas bordas: de_contexto carrega os dados já lidos pelo
+contexto e linhas_folgas/linhas_escalas devolvem dicts no formato da
+gravação em lote (persistencia).
+"""
+
+from datetime import timedelta
+
+import numpy as np
+
+# Valor de alocacao para quem não tem escala no dia
+SEM_FAIXA = -1
+
+# Mesmo mapeamento de gerar_folgas_funcionario (escala_generator)
+DIAS_PREFERENCIA = {
+    "domingo": 6,
+    "segunda": 0,
+    "terca": 1,
+    "quarta": 2,
+    "quinta": 3,
+    "sexta": 4,
+    "sabado": 5,
+}
+
+
+class MatrizEscala:
+    """
+    Estado do período em arrays, com as operações do gerador (folgas,
+    candidatos por faixa, sequências de trabalho) feitas sobre linhas e
+    colunas inteiras em vez de dict a dict
+    """
+
+    def __init__(self, funcionario_ids, faixa_ids, primeiro_dia, ultimo_dia):
+        self.funcionario_ids = np.asarray(funcionario_ids, dtype=np.int64)
+        self.faixa_ids = np.asarray(faixa_ids, dtype=np.int64)
+        self.indice_funcionario = {
+            func_id: i for i, func_id in enumerate(funcionario_ids)
+        }
+        self.indice_faixa = {faixa_id: k for k, faixa_id in enumerate(faixa_ids)}
+
+        self.primeiro_dia = primeiro_dia
+        self.ultimo_dia = ultimo_dia
+        total_dias = (ultimo_dia - primeiro_dia).days + 1
+        self.dias = [primeiro_dia + timedelta(days=d) for d in range(total_dias)]
+        self.dia_da_semana = np.array(
+            [data.weekday() for data in self.dias], dtype=np.int8
+        )
+
+        # Semanas de segunda a domingo: índice da semana de cada dia e o
+        # primeiro dia de cada semana (para reduceat)
+        domingos = self.dia_da_semana == 6
+        self.semana = np.concatenate(([0], np.cumsum(domingos[:-1])))
+        self.inicio_semanas = np.flatnonzero(np.diff(self.semana, prepend=-1))
+
+        total_funcionarios = len(funcionario_ids)
+        self.disponibilidade = np.zeros(
+            (total_funcionarios, len(faixa_ids)), dtype=bool
+        )
+        # Candidatos de cada faixa na ordem das disponibilidades no banco
+        # (a ordem define a busca da melhor alocação)
+        self.candidatos_por_faixa = [np.zeros(0, dtype=np.intp) for _ in faixa_ids]
+
+        self.folga = np.zeros((total_funcionarios, total_dias), dtype=bool)
+        self.ferias = np.zeros((total_funcionarios, total_dias), dtype=bool)
+        self.ausente = np.zeros((total_funcionarios, total_dias), dtype=bool)
+        self.bloqueado = np.zeros(total_dias, dtype=bool)
+        self.alocacao = np.full(
+            (total_funcionarios, total_dias), SEM_FAIXA, dtype=np.int16
+        )
+
+    @classmethod
+    def de_contexto(cls, contexto):
+        """
+        Matriz com os funcionários e faixas ativos do contexto, suas
+        disponibilidades, férias, folgas e dias bloqueados
+        """
+        matriz = cls(
+            [func.id for func in contexto.funcionarios],
+            [faixa.id for faixa in contexto.faixas],
+            contexto.primeiro_dia,
+            contexto.ultimo_dia,
+        )
+        matriz.definir_disponibilidades(contexto.disponibilidades_por_faixa)
+        matriz.definir_bloqueados(contexto.dias_bloqueados)
+        matriz.definir_ferias(contexto.ferias_por_funcionario)
+        matriz.definir_folgas(
+            {"funcionario_id": func_id, "data": data}
+            for data, func_ids in contexto.folgas_por_data.items()
+            for func_id in func_ids
+        )
+        return matriz
+
+    def indice_dia(self, data):
+        """
+        Índice da data no período (None fora dele)
+        """
+        d = (data - self.primeiro_dia).days
+        if 0 <= d < len(self.dias):
+            return d
+        return None
+
+    def nbytes(self):
+        """
+        Memória ocupada pelos arrays do modelo
+        """
+        return sum(
+            array.nbytes
+            for array in (
+                self.disponibilidade,
+                self.folga,
+                self.ferias,
+                self.ausente,
+                self.bloqueado,
+                self.alocacao,
+            )
+        )
+
+    # Carga dos dados
+
+    def definir_disponibilidades(self, disponibilidades_por_faixa):
+        """
+        disponibilidades_por_faixa: faixa_id -> IDs dos funcionários, em ordem
+        """
+        self.disponibilidade[:] = False
+        for faixa_id, func_ids in disponibilidades_por_faixa.items():
+            k = self.indice_faixa.get(faixa_id)
+            if k is None:
+                continue
+            indices = [
+                self.indice_funcionario[func_id]
+                for func_id in func_ids
+                if func_id in self.indice_funcionario
+            ]
+            self.candidatos_por_faixa[k] = np.array(indices, dtype=np.intp)
+            self.disponibilidade[indices, k] = True
+
+    def definir_bloqueados(self, datas):
+        self.bloqueado[:] = False
+        indices = [d for d in map(self.indice_dia, datas) if d is not None]
+        self.bloqueado[indices] = True
+
+    def definir_ferias(self, ferias_por_funcionario):
+        """
+        ferias_por_funcionario: funcionario_id -> lista de {"inicio", "fim"}
+        """
+        self.ferias[:] = False
+        for func_id, periodos in ferias_por_funcionario.items():
+            i = self.indice_funcionario.get(func_id)
+            if i is None:
+                continue
+            for periodo in periodos:
+                inicio = max((periodo["inicio"] - self.primeiro_dia).days, 0)
+                fim = (periodo["fim"] - self.primeiro_dia).days
+                if fim < inicio:
+                    continue
+                self.ferias[i, inicio : fim + 1] = True
+        np.logical_or(self.folga, self.ferias, out=self.ausente)
+
+    def definir_folgas(self, folgas):
+        """
+        Substitui as folgas (dicts funcionario_id/data). Funcionários fora da
+        matriz e datas fora do período são ignorados.
+        """
+        funcionarios = []
+        dias = []
+        for folga in folgas:
+            i = self.indice_funcionario.get(folga["funcionario_id"])
+            d = self.indice_dia(folga["data"])
+            if i is not None and d is not None:
+                funcionarios.append(i)
+                dias.append(d)
+
+        self.folga[:] = False
+        self.folga[funcionarios, dias] = True
+        np.logical_or(self.folga, self.ferias, out=self.ausente)
+
+    def definir_escalas(self, escalas):
+        """
+        Substitui a alocação por tuplas (funcionario_id, faixa_horario_id,
+        data). Com mais de uma escala no dia, fica a última.
+        """
+        self.alocacao[:] = SEM_FAIXA
+        for func_id, faixa_id, data in escalas:
+            i = self.indice_funcionario.get(func_id)
+            k = self.indice_faixa.get(faixa_id)
+            d = self.indice_dia(data)
+            if i is not None and k is not None and d is not None:
+                self.alocacao[i, d] = k
+
+    # Consultas
+
+    def candidatos(self, k, d):
+        """
+        Índices dos funcionários disponíveis para a faixa k que não estão
+        ausentes no dia d, na ordem das disponibilidades
+        """
+        candidatos = self.candidatos_por_faixa[k]
+        return candidatos[~self.ausente[candidatos, d]]
+
+    def presentes(self, d):
+        """
+        Índices dos funcionários sem folga nem férias no dia d
+        """
+        return np.flatnonzero(~self.ausente[:, d])
+
+    def trabalho(self):
+        """
+        funcionário x dia: tem escala e não está de folga nem de férias
+        """
+        return (self.alocacao != SEM_FAIXA) & ~self.ausente
+
+    def sequencias_de_trabalho(self, limite):
+        """
+        Sequências de dias trabalhados seguidos com mais de limite dias:
+        arrays (funcionário, primeiro dia, comprimento), por funcionário e
+        data de início
+        """
+        trabalho = self.trabalho().astype(np.int8)
+        bordas = np.diff(
+            np.pad(trabalho, ((0, 0), (1, 1))), axis=1
+        )  # +1 onde começa, -1 logo depois do fim
+
+        funcionarios, inicios = np.nonzero(bordas == 1)
+        _, fins = np.nonzero(bordas == -1)
+        comprimentos = fins - inicios
+
+        longas = comprimentos > limite
+        return funcionarios[longas], inicios[longas], comprimentos[longas]
+
+    # Folgas
+
+    def gerar_folgas(self, preferencias, fins_de_semana_por_funcionario):
+        """
+        Mesmas folgas de gerar_folgas_funcionario para todos os funcionários
+        de uma vez. preferencias: preferencia_folga de cada funcionário, na
+        ordem da matriz; fins_de_semana_por_funcionario: funcionario_id ->
+        (sábado, domingo), de distribuir_fins_de_semana.
+
+        Define as folgas da matriz e retorna os dicts funcionario_id/data na
+        ordem da geração funcionário a funcionário.
+        """
+        livre = ~self.ferias
+        semana = self.semana
+        inicios = self.inicio_semanas
+
+        # Fim de semana completo, se nenhum dos dois dias for de férias
+        fim_de_semana = np.zeros_like(self.folga)
+        for func_id, (sabado, domingo) in fins_de_semana_por_funcionario.items():
+            i = self.indice_funcionario.get(func_id)
+            if i is None:
+                continue
+            dias = [self.indice_dia(sabado), self.indice_dia(domingo)]
+            if livre[i, dias].all():
+                fim_de_semana[i, dias] = True
+        semana_com_folga = np.logical_or.reduceat(fim_de_semana, inicios, axis=1)
+
+        # Dia de preferência (no máximo um por semana), fora de bloqueio/férias
+        dia_preferido = np.array(
+            [DIAS_PREFERENCIA.get(preferencia, -1) for preferencia in preferencias],
+            dtype=np.int8,
+        )
+        permitido = livre & ~self.bloqueado
+        preferido = permitido & (self.dia_da_semana == dia_preferido[:, None])
+        semana_com_preferido = np.logical_or.reduceat(preferido, inicios, axis=1)
+
+        # Sem o dia de preferência, só folga em semana com dia bloqueado: o
+        # primeiro dia permitido da semana
+        semana_com_bloqueio = np.logical_or.reduceat(self.bloqueado, inicios)
+        sem_preferido = ~semana_com_folga & ~semana_com_preferido & semana_com_bloqueio
+        acumulado = np.cumsum(permitido, axis=1)
+        antes_da_semana = acumulado[:, inicios] - permitido[:, inicios]
+        primeiro_permitido = permitido & (acumulado - antes_da_semana[:, semana] == 1)
+
+        semanais = (preferido & ~semana_com_folga[:, semana]) | (
+            primeiro_permitido & sem_preferido[:, semana]
+        )
+
+        self.folga = fim_de_semana | semanais
+        np.logical_or(self.folga, self.ferias, out=self.ausente)
+
+        # Por funcionário: primeiro o fim de semana, depois as semanais
+        funcionarios = np.concatenate(
+            (np.nonzero(fim_de_semana)[0], np.nonzero(semanais)[0])
+        )
+        dias = np.concatenate((np.nonzero(fim_de_semana)[1], np.nonzero(semanais)[1]))
+        ordem = np.argsort(funcionarios, kind="stable")
+
+        return [
+            {"funcionario_id": func_id, "data": self.dias[d]}
+            for func_id, d in zip(
+                self.funcionario_ids[funcionarios[ordem]].tolist(),
+                dias[ordem].tolist(),
+            )
+        ]
+
+    # Saída para a gravação
+
+    def linhas_folgas(self):
+        """
+        Linhas funcionario_id/data das folgas, por data e funcionário
+        """
+        dias, funcionarios = np.nonzero(self.folga.T)
+        return [
+            {"funcionario_id": func_id, "data": self.dias[d]}
+            for d, func_id in zip(
+                dias.tolist(), self.funcionario_ids[funcionarios].tolist()
+            )
+        ]
+
+    def linhas_escalas(self):
+        """
+        Linhas funcionario_id/faixa_horario_id/data da alocação, por data e
+        funcionário
+        """
+        dias, funcionarios = np.nonzero(self.alocacao.T != SEM_FAIXA)
+        faixas = self.alocacao[funcionarios, dias]
+        return [
+            {
+                "funcionario_id": func_id,
+                "faixa_horario_id": faixa_id,
+                "data": self.dias[d],
+            }
+            for d, func_id, faixa_id in zip(
+                dias.tolist(),
+                self.funcionario_ids[funcionarios].tolist(),
+                self.faixa_ids[faixas].tolist(),
+            )
+        ]
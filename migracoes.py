@@ -0,0 +1,139 @@
+"""
+Migrações do banco aplicadas na inicialização, depois do db.create_all()
+
+O create_all só cria tabelas que não existem; colunas e dados novos em
+tabelas de bancos já em uso ficam a cargo das funções de MIGRACOES. Cada
+uma recebe a conexão, roda uma vez por banco (as aplicadas ficam na tabela
+migracao) e precisa funcionar tanto em um banco antigo quanto em um recém
+criado pelo create_all.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    DateTime,
+    MetaData,
+    String,
+    Table,
+    func,
+    inspect,
+    select,
+)
+
+from cobertura import horario_da_faixa
+from models import db
+
+_metadata = MetaData()
+
+migracao = Table(
+    "migracao",
+    _metadata,
+    Column("nome", String(100), primary_key=True),
+    Column("aplicada_em", DateTime, nullable=False),
+)
+
+
+def _minutos_faixa_horario(conexao):
+    """
+    Colunas com o horário pré-calculado das faixas (minuto_inicio,
+    minuto_fim, cruza_meia_noite, mascara_horas), preenchidas a partir de
+    hora_inicio/hora_fim
+    """
+    tabela = db.metadata.tables["faixa_horario"]
+    existentes = {
+        coluna["name"] for coluna in inspect(conexao).get_columns(tabela.name)
+    }
+    for nome in ("minuto_inicio", "minuto_fim", "cruza_meia_noite", "mascara_horas"):
+        if nome not in existentes:
+            tipo = tabela.c[nome].type.compile(dialect=conexao.dialect)
+            conexao.exec_driver_sql(
+                f"ALTER TABLE {tabela.name} ADD COLUMN {nome} {tipo}"
+            )
+
+    linhas = conexao.execute(
+        select(tabela.c.id, tabela.c.hora_inicio, tabela.c.hora_fim).where(
+            tabela.c.minuto_inicio.is_(None)
+        )
+    ).all()
+    for faixa_id, hora_inicio, hora_fim in linhas:
+        conexao.execute(
+            tabela.update()
+            .where(tabela.c.id == faixa_id)
+            .values(**horario_da_faixa(hora_inicio, hora_fim))
+        )
+
+
+def _remover_folgas_duplicadas(conexao):
+    """
+    Apaga as folgas repetidas (mesmo funcionário e dia), mantendo a mais
+    antiga; retorna quantas foram apagadas
+    """
+    folga = db.metadata.tables["folga"]
+    mantidas = (
+        select(func.min(folga.c.id))
+        .group_by(folga.c.funcionario_id, folga.c.data)
+        .scalar_subquery()
+    )
+    return conexao.execute(folga.delete().where(folga.c.id.not_in(mantidas))).rowcount
+
+
+def _indices_tabelas_principais(conexao):
+    """
+    Índices declarados nos modelos das tabelas lidas por período (escalas,
+    folgas, férias, disponibilidades e dias bloqueados), inclusive a
+    unicidade de (funcionario_id, data) em folga
+    """
+    _remover_folgas_duplicadas(conexao)
+    for nome_tabela in (
+        "escala_diaria",
+        "folga",
+        "ferias",
+        "disponibilidade_funcionario",
+        "dia_bloqueado",
+    ):
+        for indice in db.metadata.tables[nome_tabela].indexes:
+            indice.create(conexao, checkfirst=True)
+    # Estatísticas para o planejador do SQLite escolher entre os índices
+    if conexao.dialect.name == "sqlite":
+        conexao.exec_driver_sql("ANALYZE")
+
+
+def _indice_alerta(conexao):
+    """
+    Índice (admin_id, data_referencia) da tabela alerta, lida por período
+    em alertas.alertas_do_periodo. Bancos anteriores já têm a tabela, então
+    o create_all não cria o índice.
+    """
+    for indice in db.metadata.tables["alerta"].indexes:
+        indice.create(conexao, checkfirst=True)
+    if conexao.dialect.name == "sqlite":
+        conexao.exec_driver_sql("ANALYZE alerta")
+
+
+# (nome, função), na ordem em que devem ser aplicadas
+MIGRACOES = [
+    ("0001_minutos_faixa_horario", _minutos_faixa_horario),
+    ("0002_indices_tabelas_principais", _indices_tabelas_principais),
+    ("0003_indice_alerta", _indice_alerta),
+]
+
+
+def executar_migracoes():
+    """
+    Aplica as migrações pendentes (dentro do app context) e retorna os
+    nomes das aplicadas
+    """
+    aplicadas = []
+    with db.engine.begin() as conexao:
+        _metadata.create_all(conexao)
+        feitas = set(conexao.execute(select(migracao.c.nome)).scalars())
+        for nome, funcao in MIGRACOES:
+            if nome in feitas:
+                continue
+            funcao(conexao)
+            conexao.execute(
+                migracao.insert().values(nome=nome, aplicada_em=datetime.utcnow())
+            )
+            aplicadas.append(nome)
+    return aplicadas
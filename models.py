@@ -1,8 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
+from cobertura import horario_da_faixa
+
 db = SQLAlchemy()
 
 
@@ -75,6 +78,13 @@ class Funcionario(db.Model):
 
 class Folga(db.Model):
     __tablename__ = "folga"
+    __table_args__ = (
+        # Uma folga por funcionário e dia; também atende às leituras do
+        # período pelos funcionários do admin
+        db.Index("uq_folga_funcionario_data", "funcionario_id", "data", unique=True),
+        # Folgas de um período sem filtro de funcionário (exportação do PDF)
+        db.Index("ix_folga_data", "data"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     funcionario_id = db.Column(
@@ -89,6 +99,13 @@ class Folga(db.Model):
 
 class Ferias(db.Model):
     __tablename__ = "ferias"
+    __table_args__ = (
+        # Férias que cruzam um período (data_fim >= início e data_inicio <=
+        # fim): a varredura começa no início do período e deixa o histórico
+        # de fora
+        db.Index("ix_ferias_fim_inicio", "data_fim", "data_inicio"),
+        db.Index("ix_ferias_funcionario", "funcionario_id", "data_inicio"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     funcionario_id = db.Column(
@@ -106,6 +123,7 @@ class Ferias(db.Model):
 
 class DiaBloqueado(db.Model):
     __tablename__ = "dia_bloqueado"
+    __table_args__ = (db.Index("ix_dia_bloqueado_admin_data", "admin_id", "data"),)
 
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey("admin.id"), nullable=False)
@@ -125,6 +143,13 @@ class FaixaHorario(db.Model):
     admin_id = db.Column(db.Integer, db.ForeignKey("admin.id"), nullable=False)
     hora_inicio = db.Column(db.String(5), nullable=False)  # '05:00'
     hora_fim = db.Column(db.String(5), nullable=False)  # '11:00'
+    # Horário pré-calculado a partir de hora_inicio/hora_fim (preenchido ao
+    # atribuir os horários, ver cobertura.horario_da_faixa); os textos
+    # continuam sendo os exibidos
+    minuto_inicio = db.Column(db.Integer)  # 300
+    minuto_fim = db.Column(db.Integer)  # 660; 1500 para '19:00'-'01:00'
+    cruza_meia_noite = db.Column(db.Boolean)
+    mascara_horas = db.Column(db.Integer)  # Bit h = hora h
     ordem = db.Column(db.Integer, default=0)  # Para ordenação
     ativo = db.Column(db.Boolean, default=True)
     ativo_semana = db.Column(db.Boolean, default=True)  # Ativa em dias de semana
@@ -142,6 +167,15 @@ class FaixaHorario(db.Model):
         "EscalaDiaria", backref="faixa_horario", lazy=True, cascade="all, delete-orphan"
     )
 
+    @validates("hora_inicio", "hora_fim")
+    def _atualizar_minutos(self, chave, valor):
+        hora_inicio = valor if chave == "hora_inicio" else self.hora_inicio
+        hora_fim = valor if chave == "hora_fim" else self.hora_fim
+        if hora_inicio and hora_fim:
+            for coluna, minutos in horario_da_faixa(hora_inicio, hora_fim).items():
+                setattr(self, coluna, minutos)
+        return valor
+
     def __repr__(self):
         return f"<FaixaHorario {self.hora_inicio}-{self.hora_fim}>"
 
@@ -150,6 +184,14 @@ class DisponibilidadeFuncionario(db.Model):
     """Define quais faixas de horário cada funcionário pode trabalhar"""
 
     __tablename__ = "disponibilidade_funcionario"
+    __table_args__ = (
+        # Disponíveis de cada faixa; funcionario_id no índice evita ler a
+        # tabela para montar disponibilidades_por_faixa
+        db.Index(
+            "ix_disponibilidade_faixa_funcionario", "faixa_horario_id", "funcionario_id"
+        ),
+        db.Index("ix_disponibilidade_funcionario", "funcionario_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     funcionario_id = db.Column(
@@ -168,6 +210,15 @@ class EscalaDiaria(db.Model):
     """Define qual funcionário está em qual faixa de horário em cada dia"""
 
     __tablename__ = "escala_diaria"
+    __table_args__ = (
+        # Escalas de um período ou de um dia, por faixa
+        db.Index("ix_escala_diaria_data_faixa", "data", "faixa_horario_id"),
+        # Escalas dos funcionários do admin (leituras e substituição do
+        # período) e do funcionário em um dia
+        db.Index("ix_escala_diaria_funcionario_data", "funcionario_id", "data"),
+        # Remoção das escalas de uma faixa (cascade)
+        db.Index("ix_escala_diaria_faixa", "faixa_horario_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     funcionario_id = db.Column(
@@ -193,6 +244,10 @@ class Alerta(db.Model):
     """Alertas do sistema (falta de cobertura, excesso de dias trabalhados, etc)"""
 
     __tablename__ = "alerta"
+    __table_args__ = (
+        # Leitura dos alertas de um período (alertas_do_periodo)
+        db.Index("ix_alerta_admin_data", "admin_id", "data_referencia"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     admin_id = db.Column(db.Integer, db.ForeignKey("admin.id"), nullable=False)
@@ -216,3 +271,46 @@ class Alerta(db.Model):
 
     def __repr__(self):
         return f"<Alerta {self.tipo} - {self.mensagem[:30]}>"
+
+
+class DiaPendente(db.Model):
+    """
+    Dia cuja escala precisa ser recalculada por causa de alterações de
+    folgas, férias, dias bloqueados ou disponibilidades (ver dias_pendentes)
+    """
+
+    __tablename__ = "dia_pendente"
+    __table_args__ = (
+        db.Index("uq_dia_pendente_admin_data", "admin_id", "data", unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey("admin.id"), nullable=False)
+    data = db.Column(db.Date, nullable=False)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DiaPendente {self.data}>"
+
+
+class PeriodoAlertas(db.Model):
+    """
+    Período (admin, dia 12 inicial) cujos alertas já foram calculados por
+    inteiro na tabela alerta; a partir daí eles são mantidos a cada commit
+    (ver alertas.py)
+    """
+
+    __tablename__ = "periodo_alertas"
+    __table_args__ = (
+        db.Index(
+            "uq_periodo_alertas_admin_inicio", "admin_id", "primeiro_dia", unique=True
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    admin_id = db.Column(db.Integer, db.ForeignKey("admin.id"), nullable=False)
+    primeiro_dia = db.Column(db.Date, nullable=False)
+    criado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<PeriodoAlertas {self.primeiro_dia}>"
@@ -0,0 +1,109 @@
+"""
+Tempo por fase da geração de escalas
+
+A geração recebe um PerfilGeracao (perfil=True nas funções do gerador) e
+marca as fases com "with perfil.fase(nome):"; fases com o mesmo nome
+acumulam. Sem perfil, as funções usam PERFIL_DESLIGADO, cujos métodos não
+fazem nada, então o custo é só o de entrar e sair de um contexto vazio.
+
+Os perfis também são acrescentados, um por linha, ao arquivo JSON-lines de
+ARQUIVO_LOG (variável de ambiente ESCALAS_PERFIL_LOG).
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+ARQUIVO_LOG = os.environ.get("ESCALAS_PERFIL_LOG", "perfil_geracao.jsonl")
+
+_trava_log = threading.Lock()
+
+
+class PerfilGeracao:
+    """
+    Tempos de uma execução: fases nomeadas (na ordem em que aparecem) e
+    tempo de resolução de cada dia
+    """
+
+    ativo = True
+
+    def __init__(self, funcao, **dados):
+        self.funcao = funcao
+        self.dados = dados
+        self.fases = {}
+        self.dias = {}
+        self._inicio = time.perf_counter()
+        self.total = None
+
+    @contextmanager
+    def fase(self, nome):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.fases[nome] = self.fases.get(nome, 0.0) + (
+                time.perf_counter() - inicio
+            )
+
+    def registrar_dia(self, data, segundos):
+        self.dias[data] = segundos
+
+    def encerrar(self):
+        self.total = time.perf_counter() - self._inicio
+        return self
+
+    def para_dict(self):
+        total = self.total
+        if total is None:
+            total = time.perf_counter() - self._inicio
+        perfil = {
+            "funcao": self.funcao,
+            **self.dados,
+            "total_s": round(total, 4),
+            "fases_s": {nome: round(s, 4) for nome, s in self.fases.items()},
+        }
+        if self.dias:
+            perfil["dias_s"] = {
+                data.isoformat(): round(s, 4) for data, s in sorted(self.dias.items())
+            }
+            mais_lento = max(self.dias, key=self.dias.get)
+            perfil["dia_mais_lento"] = mais_lento.isoformat()
+        return perfil
+
+
+class _PerfilDesligado:
+    ativo = False
+
+    def fase(self, nome):
+        return nullcontext()
+
+    def registrar_dia(self, data, segundos):
+        pass
+
+
+PERFIL_DESLIGADO = _PerfilDesligado()
+
+
+def novo_perfil(ligado, funcao, **dados):
+    """PerfilGeracao se ligado, senão PERFIL_DESLIGADO"""
+    return PerfilGeracao(funcao, **dados) if ligado else PERFIL_DESLIGADO
+
+
+def gravar_perfil(perfil, arquivo=None):
+    """
+    Encerra o perfil e acrescenta uma linha ao log; retorna o dicionário
+    gravado. Falhas de escrita não interrompem a geração.
+    """
+    registro = {
+        "registrado_em": datetime.now().isoformat(timespec="seconds"),
+        **perfil.encerrar().para_dict(),
+    }
+    try:
+        with _trava_log, open(arquivo or ARQUIVO_LOG, "a") as log:
+            log.write(json.dumps(registro, default=str) + "\n")
+    except OSError as e:
+        print(f"Não foi possível gravar o perfil da geração: {e}")
+    return registro
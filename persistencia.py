@@ -0,0 +1,199 @@
+"""
+Gravação em lote das folgas e escalas geradas
+"""
+
+import time
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select
+
+from alteracoes import marcar_alteracoes
+from models import db, Funcionario, Folga, EscalaDiaria
+
+# Linhas por INSERT executemany; limita a memória do driver em equipes grandes
+TAMANHO_LOTE = 1000
+
+
+class GravacaoEmLote:
+    """
+    Executa DELETEs por conjunto e INSERTs em lote (Core, executemany) na
+    transação da sessão, contando as linhas e o tempo gasto. Não faz commit:
+    quem chama decide quando confirmar ou desfazer a transação.
+    """
+
+    def __init__(self, tamanho_lote=TAMANHO_LOTE):
+        self.tamanho_lote = tamanho_lote
+        self.linhas_apagadas = {}
+        self.linhas_inseridas = {}
+        self.tempo = 0.0
+
+    def apagar_periodo(self, modelo, admin_id, primeiro_dia, ultimo_dia):
+        """
+        Apaga as linhas de Folga/EscalaDiaria dos funcionários do admin no
+        período, em uma única instrução
+        """
+        tabela = modelo.__table__
+        _marcar_alertas(
+            modelo,
+            admin_id,
+            (
+                primeiro_dia + timedelta(days=d)
+                for d in range((ultimo_dia - primeiro_dia).days + 1)
+            ),
+        )
+        return self._apagar(
+            modelo,
+            admin_id,
+            tabela.c.data >= primeiro_dia,
+            tabela.c.data <= ultimo_dia,
+        )
+
+    def _apagar(self, modelo, admin_id, *condicoes):
+        tabela = modelo.__table__
+        funcionarios_admin = select(Funcionario.id).where(
+            Funcionario.admin_id == admin_id
+        )
+        instrucao = delete(tabela).where(
+            tabela.c.funcionario_id.in_(funcionarios_admin), *condicoes
+        )
+
+        inicio = time.perf_counter()
+        resultado = db.session.execute(instrucao)
+        self.tempo += time.perf_counter() - inicio
+
+        self.linhas_apagadas[tabela.name] = (
+            self.linhas_apagadas.get(tabela.name, 0) + resultado.rowcount
+        )
+        return resultado.rowcount
+
+    def inserir(self, modelo, linhas):
+        """
+        Insere a lista de dicts (colunas -> valores) em lotes de tamanho_lote
+        """
+        tabela = modelo.__table__
+
+        inicio = time.perf_counter()
+        for i in range(0, len(linhas), self.tamanho_lote):
+            db.session.execute(insert(tabela), linhas[i : i + self.tamanho_lote])
+        self.tempo += time.perf_counter() - inicio
+
+        self.linhas_inseridas[tabela.name] = self.linhas_inseridas.get(
+            tabela.name, 0
+        ) + len(linhas)
+        return len(linhas)
+
+    def sincronizar_escalas(self, admin_id, datas, linhas):
+        """
+        Deixa as escalas do admin nas datas iguais às linhas (dicts
+        funcionario_id/faixa_horario_id/data) aplicando só a diferença:
+        apaga as que sumiram, insere as novas e mantém as que não mudaram
+        (com os mesmos IDs). Retorna as contagens adicionadas/removidas/mantidas.
+        """
+        return self._sincronizar(
+            EscalaDiaria,
+            ("funcionario_id", "faixa_horario_id", "data"),
+            admin_id,
+            datas,
+            linhas,
+        )
+
+    def sincronizar_folgas(self, admin_id, datas, linhas):
+        """
+        Mesmo que sincronizar_escalas, para folgas (funcionario_id/data)
+        """
+        return self._sincronizar(
+            Folga, ("funcionario_id", "data"), admin_id, datas, linhas
+        )
+
+    def _sincronizar(self, modelo, colunas, admin_id, datas, linhas):
+        tabela = modelo.__table__
+        datas = list(datas)
+        _marcar_alertas(modelo, admin_id, datas)
+
+        inicio = time.perf_counter()
+        existentes = db.session.execute(
+            select(tabela.c.id, *(tabela.c[coluna] for coluna in colunas))
+            .join(Funcionario, Funcionario.id == tabela.c.funcionario_id)
+            .where(Funcionario.admin_id == admin_id, tabela.c.data.in_(datas))
+            .order_by(tabela.c.id)
+        ).all()
+        self.tempo += time.perf_counter() - inicio
+
+        desejadas = set(tuple(linha[coluna] for coluna in colunas) for linha in linhas)
+
+        mantidas = set()
+        ids_removidos = []
+        for linha_id, *chave in existentes:
+            chave = tuple(chave)
+            # Linhas repetidas no banco: mantém a primeira
+            if chave in desejadas and chave not in mantidas:
+                mantidas.add(chave)
+            else:
+                ids_removidos.append(linha_id)
+
+        inicio = time.perf_counter()
+        for i in range(0, len(ids_removidos), self.tamanho_lote):
+            db.session.execute(
+                delete(tabela).where(
+                    tabela.c.id.in_(ids_removidos[i : i + self.tamanho_lote])
+                )
+            )
+        self.tempo += time.perf_counter() - inicio
+        self.linhas_apagadas[tabela.name] = self.linhas_apagadas.get(
+            tabela.name, 0
+        ) + len(ids_removidos)
+
+        novas = []
+        presentes = set(mantidas)
+        for linha in linhas:
+            chave = tuple(linha[coluna] for coluna in colunas)
+            if chave not in presentes:
+                presentes.add(chave)
+                novas.append(linha)
+        self.inserir(modelo, novas)
+
+        return {
+            "adicionadas": len(novas),
+            "removidas": len(ids_removidos),
+            "mantidas": len(mantidas),
+        }
+
+    def confirmar(self):
+        """
+        Commit da transação, contabilizado no tempo de gravação
+        """
+        inicio = time.perf_counter()
+        db.session.commit()
+        self.tempo += time.perf_counter() - inicio
+
+    def relatorio(self):
+        return {
+            "linhas_apagadas": dict(self.linhas_apagadas),
+            "linhas_inseridas": dict(self.linhas_inseridas),
+            "tempo_s": round(self.tempo, 4),
+        }
+
+
+def linhas_folgas(folgas):
+    """
+    Linhas para a tabela folga a partir dos dicts de gerar_folgas_funcionario,
+    sem repetir (funcionario_id, data)
+    """
+    vistas = set()
+    linhas = []
+    for folga in folgas:
+        chave = (folga["funcionario_id"], folga["data"])
+        if chave in vistas:
+            continue
+        vistas.add(chave)
+        linhas.append({"funcionario_id": chave[0], "data": chave[1]})
+    return linhas
+
+
+def _marcar_alertas(modelo, admin_id, datas):
+    """
+    A gravação em lote não passa pelos eventos do ORM: marca os alertas do
+    admin nas datas para recálculo no commit (todos os funcionários; a
+    cobertura só muda com escalas)
+    """
+    marcar_alteracoes(db.session, admin_id, datas, cobertura=modelo is EscalaDiaria)
@@ -0,0 +1,184 @@
+"""
+Pontuação das alocações de um dia, compartilhada pela geração
+(escala_generator) e pela realocação de folgas (realocacao)
+
+As faixas recebem prioridade pela cobertura que recebem das outras
+(calcular_prioridade_faixas, em cache por configuração de faixas) e são
+compiladas em FaixaCompilada: máscara de horas e pesos pré-calculados, com
+os quais avaliar_combinacao_compilada dá a mesma pontuação de
+escala_generator._avaliar_combinacao com OR de máscaras e contagem de bits.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from sqlalchemy import event
+
+from models import FaixaHorario
+from cobertura import IndiceCobertura, intervalo_do_gerador
+
+
+def calcular_prioridade_faixas(faixas, data, eh_fds):
+    """
+    Calcula prioridade das faixas baseada na cobertura recebida de outras faixas.
+    Faixas que recebem MENOS cobertura de outras têm MAIOR prioridade.
+    Retorna lista de tuplas (faixa, prioridade) ordenada por prioridade (menor número = mais prioritária).
+
+    O resultado depende apenas das faixas e do tipo de dia, por isso fica em
+    cache por (assinatura das faixas, eh_fds).
+    """
+    faixas_por_id = {faixa.id: faixa for faixa in faixas}
+    prioridades = prioridades_por_assinatura(_assinatura_faixas(faixas), eh_fds)
+
+    return [
+        (faixas_por_id[faixa_id], prioridade) for faixa_id, prioridade in prioridades
+    ]
+
+
+def _assinatura_faixas(faixas):
+    """
+    Identifica a configuração das faixas (ids, horários em minutos e flags
+    de ativação)
+    """
+    return tuple(
+        (
+            faixa.id,
+            faixa.minuto_inicio,
+            faixa.minuto_fim,
+            faixa.ativo,
+            faixa.ativo_semana,
+            faixa.ativo_fds,
+        )
+        for faixa in faixas
+    )
+
+
+@lru_cache(maxsize=128)
+def prioridades_por_assinatura(assinatura, eh_fds):
+    """
+    Prioridades das faixas de uma configuração: tupla de (faixa_id, prioridade)
+    ordenada por prioridade. Cache compartilhado pelo processo, limpo quando
+    alguma FaixaHorario é alterada.
+    """
+    # Horários contados como na pontuação (antes das 02:00 = dia seguinte),
+    # não como na cobertura dos alertas
+    intervalos = {
+        faixa_id: intervalo_do_gerador(minuto_inicio, minuto_fim)
+        for faixa_id, minuto_inicio, minuto_fim, _, ativo_semana, ativo_fds in (
+            assinatura
+        )
+        if (eh_fds and ativo_fds) or (not eh_fds and ativo_semana)
+    }
+
+    prioridades = []
+
+    for faixa_id in intervalos:
+        inicio_faixa, fim_faixa = intervalos[faixa_id]
+        duracao_faixa = fim_faixa - inicio_faixa
+
+        # Calcular quanto desta faixa é coberto POR OUTRAS faixas (considerando união)
+        outras = IndiceCobertura(
+            intervalo
+            for outra_id, intervalo in intervalos.items()
+            if outra_id != faixa_id
+        )
+        minutos_cobertos_por_outras = outras.minutos_cobertos(inicio_faixa, fim_faixa)
+
+        # Calcular percentual da faixa que é coberto por outras
+        if duracao_faixa > 0:
+            percentual_coberto = (
+                minutos_cobertos_por_outras / duracao_faixa
+            ) * 90  # Ajuste de escala para 0-90%
+        else:
+            percentual_coberto = 0
+
+        # Prioridade: quanto MENOS coberto por outras, MENOR o número (mais prioritária)
+        # 0% coberto = prioridade 0 (máxima), 100% coberto = prioridade 100 (mínima)
+        prioridades.append((faixa_id, percentual_coberto))
+
+    # Ordenar por prioridade (menor número = mais importante = menos coberto)
+    prioridades.sort(key=lambda x: x[1])
+
+    return tuple(prioridades)
+
+
+@event.listens_for(FaixaHorario, "after_insert")
+@event.listens_for(FaixaHorario, "after_update")
+@event.listens_for(FaixaHorario, "after_delete")
+def _invalidar_cache_prioridades(mapper, connection, faixa):
+    prioridades_por_assinatura.cache_clear()
+
+
+def mascara_horas_operacao(eh_fds):
+    """
+    Bitmask das horas em que o setor precisa estar coberto:
+    semana 5h-1h, FDS 7h-1h.
+    """
+    hora_inicio = 7 if eh_fds else 5
+    hora_fim = 1  # Próximo dia
+    mascara = 0
+    for hora in list(range(hora_inicio, 24)) + list(range(0, hora_fim + 1)):
+        mascara |= 1 << hora
+    return mascara
+
+
+# Faixa pronta para pontuação: horas cobertas (bitmask) e os pesos usados
+# por escala_generator._avaliar_combinacao quando a faixa é coberta ou fica
+# descoberta
+FaixaCompilada = namedtuple(
+    "FaixaCompilada", ["faixa", "mascara_horas", "pontos_cobertura", "penalidade"]
+)
+
+
+def compilar_faixas(faixas_priorizadas):
+    """
+    Compila a lista de (faixa, prioridade) em FaixaCompilada, na mesma ordem.
+    As horas vêm de FaixaHorario.mascara_horas (mesma contagem de
+    escala_generator._avaliar_combinacao, ver cobertura.mascara_horas).
+    """
+    return [
+        FaixaCompilada(
+            faixa,
+            faixa.mascara_horas,
+            # Mesmas expressões de _avaliar_combinacao, para os mesmos floats
+            (100 - prioridade) * 100,
+            (100 - prioridade) * 50,
+        )
+        for faixa, prioridade in faixas_priorizadas
+    ]
+
+
+def descontar_horas_descobertas(pontuacao, mascara_operacao, mascara_coberta):
+    """
+    Aplica a penalidade de -1000 por hora de operação descoberta
+    """
+    # Subtrai hora a hora, como em _avaliar_combinacao, para que o float
+    # resultante seja idêntico
+    for _ in range((mascara_operacao & ~mascara_coberta).bit_count()):
+        pontuacao -= 1000
+    return pontuacao
+
+
+def avaliar_combinacao_compilada(combinacao, faixas_compiladas, mascara_operacao):
+    """
+    Mesma pontuação de escala_generator._avaliar_combinacao usando as faixas
+    compiladas: OR das máscaras de horas, contagem de bits contra o horário
+    de operação e soma dos pesos pré-calculados.
+    """
+    if not combinacao:
+        return 0
+
+    faixas_alocadas = {faixa.id for _, faixa in combinacao}
+
+    pontuacao = 0
+    mascara_coberta = 0
+    for faixa_compilada in faixas_compiladas:
+        if faixa_compilada.faixa.id in faixas_alocadas:
+            pontuacao += faixa_compilada.pontos_cobertura
+            mascara_coberta |= faixa_compilada.mascara_horas
+        else:
+            pontuacao -= faixa_compilada.penalidade
+
+    pontuacao += len(combinacao) * 100
+
+    return descontar_horas_descobertas(pontuacao, mascara_operacao, mascara_coberta)
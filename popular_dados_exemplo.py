@@ -16,7 +16,20 @@ from models import (
     DiaBloqueado,
 )
 from escala_generator import gerar_escalas_com_faixas_horario
-from datetime import datetime
+from scheduling_context import SchedulingContext
+from datetime import datetime, timedelta
+import random
+
+PREFERENCIAS = [
+    "segunda",
+    "terca",
+    "quarta",
+    "quinta",
+    "sexta",
+    "sabado",
+    "domingo",
+    None,
+]
 
 
 def popular_dados_exemplo():
@@ -248,6 +261,92 @@ def popular_dados_exemplo():
             print(f"✗ Erro ao gerar escalas: {e}")
 
 
+def faixas_sinteticas(n_faixas):
+    """
+    n_faixas faixas de 6h com inícios espalhados entre 05:00 e 19:00 (a
+    última termina à 01:00); as de índice par também funcionam no fim de
+    semana
+    """
+    faixas = []
+    for i in range(n_faixas):
+        inicio = 5 * 60 + (14 * 60 * i // max(n_faixas - 1, 1)) // 30 * 30
+        fim = (inicio + 6 * 60) % (24 * 60)
+        faixas.append(
+            {
+                "hora_inicio": f"{inicio // 60:02d}:{inicio % 60:02d}",
+                "hora_fim": f"{fim // 60:02d}:{fim % 60:02d}",
+                "ordem": i + 1,
+                "ativo_semana": True,
+                "ativo_fds": i % 2 == 0,
+            }
+        )
+    return faixas
+
+
+def popular_dados_sinteticos(
+    n_funcionarios,
+    n_faixas=9,
+    densidade_ferias=0.2,
+    semente=1,
+    ano=2026,
+    mes=1,
+    faixas_por_funcionario=3,
+):
+    """
+    Cria um admin com dados sintéticos reproduzíveis (mesma semente, mesmos
+    dados), para benchmarks e testes em escala. Usa o app context e o banco
+    atuais; retorna o id do admin.
+
+    Cada funcionário pode cobrir faixas_por_funcionario faixas sorteadas e,
+    com probabilidade densidade_ferias, tem férias de 1 a 14 dias começando
+    dentro do período (ano, mes).
+    """
+    rnd = random.Random(semente)
+    primeiro_dia, ultimo_dia = SchedulingContext.limites_periodo(ano, mes)
+
+    admin = Admin(nome="Sintético", email=f"sintetico{semente}@empresa.com")
+    admin.definir_senha("admin123")
+    db.session.add(admin)
+    db.session.flush()
+
+    faixas = [FaixaHorario(admin_id=admin.id, **f) for f in faixas_sinteticas(n_faixas)]
+    db.session.add_all(faixas)
+
+    funcionarios = [
+        Funcionario(
+            nome=f"Funcionário {i + 1}",
+            preferencia_folga=rnd.choice(PREFERENCIAS),
+            horario_inicio="05:00",
+            horario_fim="13:00",
+            admin_id=admin.id,
+        )
+        for i in range(n_funcionarios)
+    ]
+    db.session.add_all(funcionarios)
+    db.session.flush()
+
+    total_dias = (ultimo_dia - primeiro_dia).days
+    for func in funcionarios:
+        for faixa in rnd.sample(faixas, min(faixas_por_funcionario, n_faixas)):
+            db.session.add(
+                DisponibilidadeFuncionario(
+                    funcionario_id=func.id, faixa_horario_id=faixa.id
+                )
+            )
+        if rnd.random() < densidade_ferias:
+            inicio = primeiro_dia + timedelta(days=rnd.randint(0, total_dias))
+            db.session.add(
+                Ferias(
+                    funcionario_id=func.id,
+                    data_inicio=inicio,
+                    data_fim=inicio + timedelta(days=rnd.randint(0, 13)),
+                )
+            )
+
+    db.session.commit()
+    return admin.id
+
+
 if __name__ == "__main__":
     popular_dados_exemplo()
     print("\n✓ Processo concluído!")
@@ -0,0 +1,178 @@
+"""
+Realocação das escalas de um dia quando um funcionário entra de folga
+
+O dia é carregado uma vez (SchedulingContext de um dia só e as escalas do
+dia) e as faixas que o funcionário deixou vagas são preenchidas por cadeias
+curtas de substituições: A cobre a faixa vaga; se A estava em outra faixa,
+B cobre a faixa de A, e assim por diante, até um funcionário que não
+estava trabalhando no dia ou até PROFUNDIDADE_MAXIMA trocas. Cada
+alocação possível do dia é pontuada com a mesma função objetivo da
+geração (_avaliar_combinacao, na versão compilada) e fica a de maior
+pontuação, com menos trocas em caso de empate.
+
+Para a pontuação só importa quais faixas ficam ocupadas e quantos
+funcionários trabalham, então em cada elo da cadeia basta tentar um
+candidato por faixa de origem (e um que estava livre).
+"""
+
+from models import db, Funcionario, EscalaDiaria
+from scheduling_context import SchedulingContext
+from pontuacao import (
+    avaliar_combinacao_compilada,
+    calcular_prioridade_faixas,
+    compilar_faixas,
+    mascara_horas_operacao,
+)
+
+# Trocas em uma cadeia de substituições (a faixa vaga mais as faixas que
+# cada substituto deixa para trás)
+PROFUNDIDADE_MAXIMA = 3
+
+
+class RealocacaoDia:
+    """
+    Escalas de um dia como postos [funcionario_id, faixa_id] (um por
+    EscalaDiaria; funcionario_id None = posto vago), com os candidatos de
+    cada faixa (disponíveis e presentes no dia, na ordem do banco)
+    """
+
+    def __init__(self, contexto, data, escalas):
+        self.data = data
+        eh_fds = data.weekday() in [5, 6]
+
+        self.faixas = {faixa.id: faixa for faixa in contexto.faixas}
+        self.faixas_compiladas = compilar_faixas(
+            calcular_prioridade_faixas(contexto.faixas, data, eh_fds)
+        )
+        self.mascara_operacao = mascara_horas_operacao(eh_fds)
+        self.candidatos = {
+            faixa.id: contexto.funcionarios_disponiveis(faixa, data)
+            for faixa in contexto.faixas
+        }
+
+        self.escalas = list(escalas)
+        self.postos = [
+            [escala.funcionario_id, escala.faixa_horario_id] for escala in self.escalas
+        ]
+        self.posto_do_funcionario = {}
+        for p, (func_id, _) in enumerate(self.postos):
+            self.posto_do_funcionario.setdefault(func_id, p)
+
+    def pontuar(self):
+        return avaliar_combinacao_compilada(
+            [
+                (func_id, self.faixas[faixa_id])
+                for func_id, faixa_id in self.postos
+                if func_id is not None and faixa_id in self.faixas
+            ],
+            self.faixas_compiladas,
+            self.mascara_operacao,
+        )
+
+    def liberar(self, funcionario_id):
+        """
+        Esvazia os postos do funcionário e o tira dos candidatos; retorna
+        os índices dos postos
+        """
+        vagas = [
+            p for p, (func_id, _) in enumerate(self.postos) if func_id == funcionario_id
+        ]
+        for p in vagas:
+            self.postos[p][0] = None
+        self.posto_do_funcionario.pop(funcionario_id, None)
+        for faixa_id, candidatos in self.candidatos.items():
+            if funcionario_id in candidatos:
+                self.candidatos[faixa_id] = [
+                    func_id for func_id in candidatos if func_id != funcionario_id
+                ]
+        return vagas
+
+    def _melhor_cadeia(self, vaga, profundidade, movidos):
+        """
+        Melhor forma de preencher o posto vago: (pontuação, trocas), com as
+        trocas como lista de (posto, funcionario_id ou None) a aplicar em
+        ordem. Deixar o posto vago também é uma opção.
+        """
+        melhor = (self.pontuar(), [])
+        if profundidade == 0:
+            return melhor
+
+        origens_tentadas = set()
+        for func_id in self.candidatos.get(self.postos[vaga][1], []):
+            if func_id in movidos:
+                continue
+            origem = self.posto_do_funcionario.get(func_id)
+            faixa_origem = None if origem is None else self.postos[origem][1]
+            if faixa_origem in origens_tentadas:
+                continue
+            origens_tentadas.add(faixa_origem)
+
+            self.postos[vaga][0] = func_id
+            if origem is None:
+                opcao = (self.pontuar(), [(vaga, func_id)])
+            else:
+                self.postos[origem][0] = None
+                pontuacao, trocas = self._melhor_cadeia(
+                    origem, profundidade - 1, movidos | {func_id}
+                )
+                opcao = (pontuacao, [(vaga, func_id), (origem, None)] + trocas)
+                self.postos[origem][0] = func_id
+            self.postos[vaga][0] = None
+
+            if (opcao[0], -len(opcao[1])) > (melhor[0], -len(melhor[1])):
+                melhor = opcao
+
+        return melhor
+
+    def preencher(self, vaga, profundidade=PROFUNDIDADE_MAXIMA):
+        """
+        Aplica a melhor cadeia para o posto vago; retorna as trocas
+        """
+        _, trocas = self._melhor_cadeia(vaga, profundidade, frozenset())
+        for p, func_id in trocas:
+            anterior = self.postos[p][0]
+            if anterior is not None and self.posto_do_funcionario.get(anterior) == p:
+                del self.posto_do_funcionario[anterior]
+            self.postos[p][0] = func_id
+            if func_id is not None:
+                self.posto_do_funcionario[func_id] = p
+        return trocas
+
+    def gravar(self):
+        """
+        Leva os postos para as EscalaDiaria da sessão (posto vago = escala
+        removida)
+        """
+        for escala, (func_id, _) in zip(self.escalas, self.postos):
+            if func_id is None:
+                db.session.delete(escala)
+            elif escala.funcionario_id != func_id:
+                escala.funcionario_id = func_id
+
+
+def realocar_folga(data, funcionario_id_folga, admin_id):
+    """
+    Preenche as faixas do funcionário que entrou de folga no dia (ver o
+    docstring do módulo) e grava as alterações. Retorna o número de
+    escalas alteradas ou removidas.
+    """
+    contexto = SchedulingContext(admin_id, data, data)
+    escalas = (
+        EscalaDiaria.query.join(Funcionario)
+        .filter(Funcionario.admin_id == admin_id, EscalaDiaria.data == data)
+        .order_by(EscalaDiaria.id)
+        .all()
+    )
+    dia = RealocacaoDia(contexto, data, escalas)
+
+    for vaga in dia.liberar(funcionario_id_folga):
+        dia.preencher(vaga)
+
+    alteradas = sum(
+        1
+        for escala, (func_id, _) in zip(dia.escalas, dia.postos)
+        if escala.funcionario_id != func_id
+    )
+    dia.gravar()
+    db.session.commit()
+    return alteradas
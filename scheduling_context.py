@@ -0,0 +1,240 @@
+"""
+Contexto em memória para a geração de escalas de um período
+"""
+
+from datetime import datetime, timedelta
+
+from matriz_escala import MatrizEscala
+from models import (
+    db,
+    Funcionario,
+    Folga,
+    DiaBloqueado,
+    Ferias,
+    FaixaHorario,
+    DisponibilidadeFuncionario,
+)
+
+
+class SchedulingContext:
+    """
+    Dados de um admin no período da empresa (dia 12 ao dia 11), carregados
+    com poucas consultas no início da geração. As funções do gerador consultam
+    o contexto em vez da sessão do banco.
+    """
+
+    def __init__(self, admin_id, primeiro_dia, ultimo_dia):
+        self.admin_id = admin_id
+        self.primeiro_dia = primeiro_dia
+        self.ultimo_dia = ultimo_dia
+
+        # Faixas de horário ativas, na ordem definida pelo admin
+        self.faixas = (
+            FaixaHorario.query.filter_by(admin_id=admin_id, ativo=True)
+            .order_by(FaixaHorario.ordem)
+            .all()
+        )
+
+        # Funcionários ativos
+        self.funcionarios = Funcionario.query.filter_by(
+            admin_id=admin_id, ativo=True
+        ).all()
+
+        # Disponibilidades dos funcionários ativos, por faixa
+        disponibilidades = (
+            db.session.query(
+                DisponibilidadeFuncionario.faixa_horario_id,
+                DisponibilidadeFuncionario.funcionario_id,
+            )
+            .join(Funcionario)
+            .filter(Funcionario.ativo == True, Funcionario.admin_id == admin_id)
+            .order_by(DisponibilidadeFuncionario.id)
+            .all()
+        )
+
+        self.disponibilidades_por_faixa = {}
+        for faixa_id, func_id in disponibilidades:
+            if faixa_id not in self.disponibilidades_por_faixa:
+                self.disponibilidades_por_faixa[faixa_id] = []
+            self.disponibilidades_por_faixa[faixa_id].append(func_id)
+
+        # Dias bloqueados
+        dias_bloqueados = DiaBloqueado.query.filter(
+            DiaBloqueado.admin_id == admin_id,
+            DiaBloqueado.data >= primeiro_dia,
+            DiaBloqueado.data <= ultimo_dia,
+        ).all()
+
+        self.dias_bloqueados = set(d.data for d in dias_bloqueados)
+
+        # Férias por funcionário
+        ferias = (
+            Ferias.query.join(Funcionario)
+            .filter(
+                Funcionario.admin_id == admin_id,
+                Ferias.data_fim >= primeiro_dia,
+                Ferias.data_inicio <= ultimo_dia,
+            )
+            .all()
+        )
+
+        self.ferias_por_funcionario = {}
+        for feria in ferias:
+            if feria.funcionario_id not in self.ferias_por_funcionario:
+                self.ferias_por_funcionario[feria.funcionario_id] = []
+            self.ferias_por_funcionario[feria.funcionario_id].append(
+                {"inicio": feria.data_inicio, "fim": feria.data_fim}
+            )
+
+        # Folgas por data
+        folgas = (
+            db.session.query(Folga.funcionario_id, Folga.data)
+            .join(Funcionario)
+            .filter(
+                Funcionario.admin_id == admin_id,
+                Folga.data >= primeiro_dia,
+                Folga.data <= ultimo_dia,
+            )
+            .all()
+        )
+
+        self.folgas_por_data = {}
+        for func_id, data in folgas:
+            if data not in self.folgas_por_data:
+                self.folgas_por_data[data] = set()
+            self.folgas_por_data[data].add(func_id)
+
+        # Mesmos dados em arrays (funcionário x dia, funcionário x faixa)
+        self.matriz = MatrizEscala.de_contexto(self)
+
+        # Melhores alocações já calculadas, por assinatura do problema do dia:
+        # listas de (rótulo do funcionário, índice da faixa na prioridade)
+        self.alocacoes_memorizadas = {}
+        self.memo_acertos = 0
+        self.memo_falhas = 0
+
+        # Dias cuja busca parou no prazo, sem provar que a alocação é ótima
+        self.dias_interrompidos = []
+
+    @classmethod
+    def para_periodo(cls, admin_id, ano, mes):
+        """
+        Cria o contexto do mês da empresa: dia 12 do mês até dia 11 do próximo
+        """
+        return cls(admin_id, *cls.limites_periodo(ano, mes))
+
+    @staticmethod
+    def limites_periodo(ano, mes):
+        """
+        (primeiro_dia, ultimo_dia) do mês da empresa: dia 12 do mês até dia
+        11 do próximo
+        """
+        primeiro_dia = datetime(ano, mes, 12).date()
+        if mes == 12:
+            proximo_mes = 1
+            proximo_ano = ano + 1
+        else:
+            proximo_mes = mes + 1
+            proximo_ano = ano
+        ultimo_dia = datetime(proximo_ano, proximo_mes, 11).date()
+
+        return primeiro_dia, ultimo_dia
+
+    @staticmethod
+    def periodo_da_data(data):
+        """
+        (ano, mes) do mês da empresa que contém a data
+        """
+        if data.day >= 12:
+            return data.year, data.month
+        if data.month == 1:
+            return data.year - 1, 12
+        return data.year, data.month - 1
+
+    def dias(self):
+        """
+        Datas do período, em ordem
+        """
+        data_atual = self.primeiro_dia
+        while data_atual <= self.ultimo_dia:
+            yield data_atual
+            data_atual += timedelta(days=1)
+
+    def definir_folgas(self, folgas):
+        """
+        Substitui as folgas do período (lista de dicts funcionario_id/data,
+        no formato de gerar_folgas_funcionario)
+        """
+        folgas = list(folgas)
+        self.folgas_por_data = {}
+        for folga in folgas:
+            if folga["data"] not in self.folgas_por_data:
+                self.folgas_por_data[folga["data"]] = set()
+            self.folgas_por_data[folga["data"]].add(folga["funcionario_id"])
+        self.matriz.definir_folgas(folgas)
+
+    def ferias_do_funcionario(self, funcionario_id):
+        return self.ferias_por_funcionario.get(funcionario_id, [])
+
+    def esta_de_folga(self, funcionario_id, data):
+        return funcionario_id in self.folgas_por_data.get(data, ())
+
+    def esta_em_ferias(self, funcionario_id, data):
+        i = self.matriz.indice_funcionario.get(funcionario_id)
+        d = self.matriz.indice_dia(data)
+        if i is not None and d is not None:
+            return bool(self.matriz.ferias[i, d])
+
+        # Funcionário inativo ou data fora do período
+        for feria in self.ferias_por_funcionario.get(funcionario_id, []):
+            if feria["inicio"] <= data <= feria["fim"]:
+                return True
+        return False
+
+    def esta_ausente(self, funcionario_id, data):
+        """
+        Funcionário de folga ou de férias na data
+        """
+        return self.esta_de_folga(funcionario_id, data) or self.esta_em_ferias(
+            funcionario_id, data
+        )
+
+    def funcionarios_disponiveis(self, faixa, data):
+        """
+        IDs dos funcionários com disponibilidade para a faixa que não estão
+        de folga nem de férias na data
+        """
+        k = self.matriz.indice_faixa.get(faixa.id)
+        d = self.matriz.indice_dia(data)
+        if k is None or d is None:
+            return [
+                func_id
+                for func_id in self.disponibilidades_por_faixa.get(faixa.id, [])
+                if not self.esta_ausente(func_id, data)
+            ]
+
+        return self.matriz.funcionario_ids[self.matriz.candidatos(k, d)].tolist()
+
+    def funcionarios_presentes(self, data):
+        """
+        IDs dos funcionários ativos sem folga nem férias na data, na ordem de
+        self.funcionarios
+        """
+        return self.matriz.funcionario_ids[
+            self.matriz.presentes(self.matriz.indice_dia(data))
+        ].tolist()
+
+    def alocacao_memorizada(self, assinatura):
+        """
+        Alocação já calculada para um dia com a mesma assinatura (ou None)
+        """
+        alocacao = self.alocacoes_memorizadas.get(assinatura)
+        if alocacao is None:
+            self.memo_falhas += 1
+            return None
+
+        self.memo_acertos += 1
+        return list(alocacao)
+
+    def memorizar_alocacao(self, assinatura, alocacao):
+        self.alocacoes_memorizadas[assinatura] = list(alocacao)
@@ -162,7 +162,11 @@ async function gerarEscala(mes, ano) {
         return;
     }
     
+    const botao = document.querySelector('button[onclick^="gerarEscala"]');
+    const conteudoOriginal = botao ? botao.innerHTML : '';
+    
     try {
+        // A geração roda em segundo plano: a resposta traz a tarefa
         const response = await fetch('/admin/gerar-escala', {
             method: 'POST',
             headers: {
@@ -174,16 +178,45 @@ async function gerarEscala(mes, ano) {
             })
         });
         
-        const result = await response.json();
+        let tarefa = await response.json();
         
-        if (response.ok) {
+        if (!response.ok) {
+            alert(tarefa.erro || 'Erro ao gerar escala');
+            return;
+        }
+        
+        if (botao) botao.disabled = true;
+        
+        // Acompanhar o andamento até terminar
+        while (tarefa.estado === 'pendente' || tarefa.estado === 'executando') {
+            if (botao) {
+                botao.textContent = tarefa.total_dias
+                    ? `Gerando... ${tarefa.dias_resolvidos}/${tarefa.total_dias} dias`
+                    : 'Gerando...';
+            }
+            await new Promise(resolve => setTimeout(resolve, 1000));
+            
+            const consulta = await fetch(`/api/jobs/${tarefa.id}`);
+            tarefa = await consulta.json();
+            if (!consulta.ok) {
+                alert(tarefa.erro || 'Erro ao consultar a geração');
+                return;
+            }
+        }
+        
+        if (tarefa.estado === 'concluida') {
             alert('Escala gerada com sucesso!');
             location.reload();
         } else {
-            alert(result.erro || 'Erro ao gerar escala');
+            alert(tarefa.erro || 'Erro ao gerar escala');
         }
     } catch (error) {
         alert('Erro ao gerar escala: ' + error);
+    } finally {
+        if (botao) {
+            botao.disabled = false;
+            botao.innerHTML = conteudoOriginal;
+        }
     }
 }
 
@@ -0,0 +1,129 @@
+"""
+Geração de escalas em segundo plano
+
+A rota de geração só registra a tarefa e responde com o ID; a geração roda
+em uma thread do pool e o navegador acompanha o progresso em /api/jobs/<id>.
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# Tarefas terminadas ficam disponíveis para consulta por este tempo
+RETENCAO_SEGUNDOS = 3600
+
+
+class TarefaGeracao:
+    """
+    Estado de uma geração: pendente -> executando -> concluida | erro
+    """
+
+    def __init__(self, admin_id, ano, mes):
+        self.id = uuid.uuid4().hex
+        self.admin_id = admin_id
+        self.ano = ano
+        self.mes = mes
+        self.estado = "pendente"
+        self.dias_resolvidos = 0
+        self.total_dias = None
+        self.inicio = time.monotonic()
+        self.fim = None
+        self.resultado = None
+        self.erro = None
+        self.futuro = None
+
+    def atualizar_progresso(self, dias_resolvidos, total_dias):
+        self.dias_resolvidos = dias_resolvidos
+        self.total_dias = total_dias
+
+    @property
+    def terminada(self):
+        return self.estado in ("concluida", "erro")
+
+    def tempo_decorrido(self):
+        return (self.fim or time.monotonic()) - self.inicio
+
+    def para_dict(self):
+        return {
+            "id": self.id,
+            "estado": self.estado,
+            "ano": self.ano,
+            "mes": self.mes,
+            "dias_resolvidos": self.dias_resolvidos,
+            "total_dias": self.total_dias,
+            "tempo_decorrido_s": round(self.tempo_decorrido(), 2),
+            "resultado": self.resultado,
+            "erro": self.erro,
+        }
+
+
+class RegistroTarefas:
+    """
+    Registro em memória das tarefas de geração do processo. Uma nova
+    submissão para o mesmo admin e período enquanto a anterior não terminou
+    devolve a tarefa em andamento em vez de iniciar outra.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="geracao"
+        )
+        self._lock = threading.Lock()
+        self._tarefas = {}
+        self._em_andamento = {}
+
+    def submeter(self, app, funcao, admin_id, ano, mes, **opcoes):
+        """
+        Agenda funcao(admin_id, ano, mes, progresso=..., **opcoes) dentro de
+        um app context. Retorna (tarefa, criada); criada é False quando a
+        submissão foi unida a uma tarefa em andamento.
+        """
+        chave = (admin_id, ano, mes)
+        with self._lock:
+            self._descartar_antigas()
+
+            tarefa_id = self._em_andamento.get(chave)
+            if tarefa_id is not None:
+                return self._tarefas[tarefa_id], False
+
+            tarefa = TarefaGeracao(admin_id, ano, mes)
+            self._tarefas[tarefa.id] = tarefa
+            self._em_andamento[chave] = tarefa.id
+            tarefa.futuro = self._executor.submit(
+                self._executar, app, funcao, tarefa, chave, opcoes
+            )
+            return tarefa, True
+
+    def obter(self, tarefa_id):
+        return self._tarefas.get(tarefa_id)
+
+    def _executar(self, app, funcao, tarefa, chave, opcoes):
+        tarefa.estado = "executando"
+        try:
+            with app.app_context():
+                tarefa.resultado = funcao(
+                    tarefa.admin_id,
+                    tarefa.ano,
+                    tarefa.mes,
+                    progresso=tarefa.atualizar_progresso,
+                    **opcoes,
+                )
+            estado = "concluida"
+        except Exception as e:
+            tarefa.erro = str(e)
+            estado = "erro"
+
+        tarefa.fim = time.monotonic()
+        with self._lock:
+            self._em_andamento.pop(chave, None)
+            tarefa.estado = estado
+
+    def _descartar_antigas(self):
+        agora = time.monotonic()
+        for tarefa_id, tarefa in list(self._tarefas.items()):
+            if tarefa.terminada and agora - tarefa.fim > RETENCAO_SEGUNDOS:
+                del self._tarefas[tarefa_id]
+
+
+registro_tarefas = RegistroTarefas()
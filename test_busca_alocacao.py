@@ -0,0 +1,202 @@
+"""
+Compara a busca branch-and-bound com a avaliação exaustiva de combinações
+"""
+
+import random
+import time
+from collections import namedtuple
+from datetime import date
+
+from cobertura import horario_da_faixa
+from escala_generator import (
+    _assinatura_problema_dia,
+    _avaliar_combinacao,
+    _buscar_melhor_combinacao,
+    _buscar_melhor_combinacao_com_prazo,
+    _gerar_combinacoes_alocacao,
+    _melhor_combinacao_exaustiva,
+)
+from pontuacao import (
+    avaliar_combinacao_compilada,
+    calcular_prioridade_faixas,
+    compilar_faixas,
+    mascara_horas_operacao,
+)
+
+_Faixa = namedtuple(
+    "Faixa",
+    "id hora_inicio hora_fim ativo ativo_semana ativo_fds "
+    "minuto_inicio minuto_fim cruza_meia_noite mascara_horas",
+)
+
+
+def Faixa(id, hora_inicio, hora_fim, ativo, ativo_semana, ativo_fds):
+    """Faixa com as colunas pré-calculadas de FaixaHorario"""
+    return _Faixa(
+        id,
+        hora_inicio,
+        hora_fim,
+        ativo,
+        ativo_semana,
+        ativo_fds,
+        **horario_da_faixa(hora_inicio, hora_fim),
+    )
+
+
+HORARIOS = [
+    ("05:00", "11:00"),
+    ("07:00", "13:00"),
+    ("11:00", "17:00"),
+    ("13:00", "19:00"),
+    ("15:00", "21:00"),
+    ("17:00", "23:00"),
+    ("19:00", "01:00"),
+]
+
+
+def _gerar_dia(rnd, eh_fds):
+    horarios = rnd.sample(HORARIOS, rnd.randint(1, 6))
+    faixas = [
+        Faixa(i + 1, inicio, fim, True, True, True)
+        for i, (inicio, fim) in enumerate(horarios)
+    ]
+    data = date(2026, 1, 17) if eh_fds else date(2026, 1, 14)
+    faixas_priorizadas = calcular_prioridade_faixas(faixas, data, eh_fds)
+
+    funcionarios = list(range(1, rnd.randint(1, 7) + 1))
+    disponibilidades = {
+        faixa: [f for f in funcionarios if rnd.random() < 0.5] for faixa in faixas
+    }
+    return faixas_priorizadas, disponibilidades, data
+
+
+def test_mesma_combinacao_que_avaliacao_exaustiva():
+    rnd = random.Random(42)
+    for caso in range(300):
+        faixas_priorizadas, disponibilidades, data = _gerar_dia(rnd, caso % 3 == 0)
+
+        esperada = _melhor_combinacao_exaustiva(
+            faixas_priorizadas, disponibilidades, data
+        )
+        obtida = _buscar_melhor_combinacao(faixas_priorizadas, disponibilidades, data)
+
+        assert obtida == esperada
+        assert _avaliar_combinacao(
+            obtida, faixas_priorizadas, data
+        ) == _avaliar_combinacao(esperada, faixas_priorizadas, data)
+
+
+def test_sem_candidatos_retorna_vazio():
+    faixas = [Faixa(1, "05:00", "11:00", True, True, True)]
+    data = date(2026, 1, 14)
+    faixas_priorizadas = calcular_prioridade_faixas(faixas, data, False)
+
+    assert _buscar_melhor_combinacao(faixas_priorizadas, {}, data) == []
+
+
+def test_combinacoes_geradas_sob_demanda_na_ordem_original():
+    faixa_a = Faixa(1, "05:00", "11:00", True, True, True)
+    faixa_b = Faixa(2, "11:00", "17:00", True, True, True)
+    faixas_priorizadas = [(faixa_a, 0), (faixa_b, 0)]
+    disponibilidades = {faixa_a: [1, 2], faixa_b: [1]}
+
+    combinacoes = _gerar_combinacoes_alocacao(faixas_priorizadas, disponibilidades)
+
+    assert not isinstance(combinacoes, list)
+    assert list(combinacoes) == [
+        [],
+        [(1, faixa_b)],
+        [(1, faixa_a)],
+        [(2, faixa_a)],
+        [(2, faixa_a), (1, faixa_b)],
+    ]
+
+
+def test_pontuacao_compilada_igual_a_avaliar_combinacao():
+    rnd = random.Random(7)
+    horas = [f"{h:02d}:{m:02d}" for h in range(24) for m in (0, 30)]
+    for caso in range(500):
+        eh_fds = caso % 2 == 0
+        faixas = []
+        for i in range(rnd.randint(1, 8)):
+            if rnd.random() < 0.7:
+                inicio, fim = rnd.choice(HORARIOS)
+            else:
+                inicio, fim = sorted(rnd.sample(horas, 2))
+            faixas.append(Faixa(i + 1, inicio, fim, True, True, True))
+
+        data = date(2026, 1, 17) if eh_fds else date(2026, 1, 14)
+        faixas_priorizadas = calcular_prioridade_faixas(faixas, data, eh_fds)
+        faixas_compiladas = compilar_faixas(faixas_priorizadas)
+        mascara_operacao = mascara_horas_operacao(eh_fds)
+
+        cobertas = [f for f in faixas if rnd.random() < 0.6]
+        combinacao = [(func_id, faixa) for func_id, faixa in enumerate(cobertas, 1)]
+
+        assert avaliar_combinacao_compilada(
+            combinacao, faixas_compiladas, mascara_operacao
+        ) == _avaliar_combinacao(combinacao, faixas_priorizadas, data)
+
+
+def test_mesma_assinatura_mesma_combinacao():
+    rnd = random.Random(11)
+    comparados = 0
+    for caso in range(300):
+        faixas_priorizadas, disponibilidades, data = _gerar_dia(rnd, caso % 3 == 0)
+        assinatura, funcionarios = _assinatura_problema_dia(
+            faixas_priorizadas, disponibilidades, data
+        )
+        combinacao = _buscar_melhor_combinacao(
+            faixas_priorizadas, disponibilidades, data
+        )
+        rotulos = {func_id: i for i, func_id in enumerate(funcionarios)}
+        memorizada = [(rotulos[func_id], faixa) for func_id, faixa in combinacao]
+
+        # Outro dia: funcionários diferentes e candidatos extras no fim das listas
+        originais = sorted(set(f for lista in disponibilidades.values() for f in lista))
+        novos_ids = rnd.sample(range(100, 200), len(originais))
+        troca = dict(zip(originais, novos_ids))
+        extra = 1000
+        outro_dia = {}
+        for faixa, lista in disponibilidades.items():
+            outro_dia[faixa] = [troca[f] for f in lista]
+            for _ in range(rnd.randint(0, 2)):
+                outro_dia[faixa].append(extra)
+                extra += 1
+
+        outra_assinatura, outros_funcionarios = _assinatura_problema_dia(
+            faixas_priorizadas, outro_dia, data
+        )
+        if outra_assinatura != assinatura:
+            continue
+
+        comparados += 1
+        assert [
+            (outros_funcionarios[rotulo], faixa) for rotulo, faixa in memorizada
+        ] == _buscar_melhor_combinacao(faixas_priorizadas, outro_dia, data)
+
+    assert comparados > 50
+
+
+def test_prazo_esgotado_retorna_alocacao_valida_sem_prova():
+    rnd = random.Random(5)
+    for caso in range(100):
+        faixas_priorizadas, disponibilidades, data = _gerar_dia(rnd, caso % 3 == 0)
+
+        otima, provada = _buscar_melhor_combinacao_com_prazo(
+            faixas_priorizadas, disponibilidades, data
+        )
+        parcial, completa = _buscar_melhor_combinacao_com_prazo(
+            faixas_priorizadas, disponibilidades, data, prazo=time.monotonic() - 1
+        )
+
+        assert provada and not completa
+        assert otima == _buscar_melhor_combinacao(
+            faixas_priorizadas, disponibilidades, data
+        )
+        funcionarios = [func_id for func_id, _ in parcial]
+        assert len(funcionarios) == len(set(funcionarios))
+        assert all(func_id in disponibilidades[faixa] for func_id, faixa in parcial)
+        assert _avaliar_combinacao(
+            parcial, faixas_priorizadas, data
+        ) <= _avaliar_combinacao(otima, faixas_priorizadas, data)
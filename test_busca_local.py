@@ -0,0 +1,151 @@
+import random
+from collections import Counter
+
+from models import (
+    db,
+    EscalaDiaria,
+    FaixaHorario,
+    Folga,
+    Funcionario,
+    DisponibilidadeFuncionario,
+)
+from escala_generator import gerar_escalas_com_faixas_horario, verificar_alertas_escalas
+from scheduling_context import SchedulingContext
+from busca_local import ModeloPeriodo, _sequencias_longas, otimizar_periodo
+
+
+def _modelo(admin_id):
+    contexto = SchedulingContext.para_periodo(admin_id, 2026, 1)
+    escalas = [
+        (e.funcionario_id, e.faixa_horario_id, e.data) for e in EscalaDiaria.query.all()
+    ]
+    faixas_inativas = FaixaHorario.query.filter_by(admin_id=admin_id, ativo=False).all()
+    return ModeloPeriodo(contexto, escalas, faixas_inativas)
+
+
+def _alertas_do_banco(admin_id):
+    alertas = Counter(a["tipo"] for a in verificar_alertas_escalas(admin_id, 2026, 1))
+    return {
+        "sem_cobertura": alertas["sem_cobertura"],
+        "excesso_dias": alertas["excesso_dias"],
+        "total": sum(alertas.values()),
+    }
+
+
+def test_modelo_conta_os_mesmos_alertas_que_verificar(criar_cenario):
+    admin_id = criar_cenario(8, semente=2, faixas_por_funcionario=2)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    alertas = _modelo(admin_id).alertas()
+
+    assert alertas == _alertas_do_banco(admin_id)
+    assert alertas["sem_cobertura"] > 0 and alertas["excesso_dias"] > 0
+
+
+def test_custo_incremental_igual_ao_recalculado(criar_cenario):
+    admin_id = criar_cenario(10, semente=3)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    modelo = _modelo(admin_id)
+    rnd = random.Random(1)
+    propostas = [
+        modelo.propor_troca_faixa,
+        modelo.propor_folga_na_semana,
+        modelo.propor_troca_turno,
+    ]
+
+    for passo in range(2000):
+        operacoes = rnd.choice(propostas)(rnd)
+        if not operacoes:
+            continue
+        inversas = modelo.aplicar(operacoes)
+        if passo % 3 == 0:
+            modelo.aplicar(inversas)
+
+    total_dias = len(modelo.dias)
+    total_funcionarios = len(modelo.funcionarios)
+    assert modelo.total_sem_cobertura == sum(
+        modelo._alertas_do_dia(d) for d in range(total_dias)
+    )
+    trabalho = [
+        sum(1 << d for d in range(total_dias) if modelo._trabalha(e, d))
+        for e in range(total_funcionarios)
+    ]
+    assert modelo.trabalho == trabalho
+    assert modelo.total_excesso == sum(_sequencias_longas(m) for m in trabalho)
+    assert modelo.alteracoes == sum(
+        modelo._alterada(e, d)
+        for e in range(total_funcionarios)
+        for d in range(total_dias)
+    )
+
+
+def test_otimizar_periodo_reduz_alertas_e_respeita_regras(criar_cenario):
+    admin_id = criar_cenario(8, semente=2, faixas_por_funcionario=2)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    modelo = _modelo(admin_id)
+    folgas_por_semana = Counter(
+        (f.funcionario_id, modelo.semana[modelo.dias.index(f.data)])
+        for f in Folga.query.all()
+    )
+
+    resultado = otimizar_periodo(admin_id, 2026, 1, iteracoes=5000, semente=1)
+
+    assert resultado["alertas_depois"]["total"] < resultado["alertas_antes"]["total"]
+    assert resultado["alertas_depois"] == _alertas_do_banco(admin_id)
+
+    # Cada funcionário continua com as mesmas folgas por semana, nunca em dia
+    # bloqueado, e só trabalha em faixas em que tem disponibilidade
+    folgas = Folga.query.all()
+    assert folgas_por_semana == Counter(
+        (f.funcionario_id, modelo.semana[modelo.dias.index(f.data)]) for f in folgas
+    )
+    assert all(f.data not in modelo.contexto.dias_bloqueados for f in folgas)
+
+    disponiveis = {
+        (d.funcionario_id, d.faixa_horario_id)
+        for d in DisponibilidadeFuncionario.query.all()
+    }
+    folgas_dia = {(f.funcionario_id, f.data) for f in folgas}
+    for escala in EscalaDiaria.query.all():
+        assert (escala.funcionario_id, escala.faixa_horario_id) in disponiveis
+        assert (escala.funcionario_id, escala.data) not in folgas_dia
+
+
+def test_geracao_com_otimizacao(criar_cenario):
+    admin_id = criar_cenario(8, semente=2, faixas_por_funcionario=2)
+
+    resultado = gerar_escalas_com_faixas_horario(
+        admin_id, 2026, 1, otimizacao={"iteracoes": 500, "semente": 3}
+    )
+
+    assert resultado["busca_local"]["iteracoes"] == 500
+    assert resultado["busca_local"]["alertas_depois"] == _alertas_do_banco(admin_id)
+
+
+def test_escalas_fora_do_modelo_contam_como_nos_alertas(criar_cenario):
+    admin_id = criar_cenario(8, semente=2, faixas_por_funcionario=2)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    # Um funcionário desativado e uma faixa desativada, com as escalas
+    # gravadas: continuam cobrindo as outras faixas e contando como trabalho
+    inativo = Funcionario.query.filter_by(admin_id=admin_id).first()
+    inativo.ativo = False
+    faixa = (
+        FaixaHorario.query.filter_by(admin_id=admin_id)
+        .join(EscalaDiaria)
+        .order_by(FaixaHorario.id.desc())
+        .first()
+    )
+    faixa.ativo = False
+    db.session.commit()
+
+    modelo = _modelo(admin_id)
+    assert modelo.escalas_externas
+    assert any(modelo.fixos)
+    assert modelo.alertas() == _alertas_do_banco(admin_id)
+
+    externas = sorted(modelo.escalas_externas)
+    resultado = otimizar_periodo(admin_id, 2026, 1, iteracoes=3000, semente=1)
+    assert resultado["alertas_antes"] == modelo.alertas()
+    assert resultado["alertas_depois"] == _alertas_do_banco(admin_id)
+    assert sorted(_modelo(admin_id).escalas_externas) == externas
@@ -0,0 +1,308 @@
+from datetime import date, timedelta
+
+from models import (
+    db,
+    Admin,
+    Alerta,
+    Funcionario,
+    FaixaHorario,
+    EscalaDiaria,
+    Folga,
+    Ferias,
+)
+from escala_generator import (
+    gerar_escalas_com_faixas_horario,
+    regenerar_dias,
+    verificar_alertas_escalas,
+)
+from alertas import alertas_do_periodo, esquecer_periodos_materializados
+
+
+def _alertas_por_dia(alertas, tipo):
+    por_dia = {}
+    for alerta in alertas:
+        if alerta["tipo"] == tipo:
+            por_dia.setdefault(alerta["data_referencia"], []).append(alerta)
+    return por_dia
+
+
+def test_alertas_de_excesso_e_cobertura(app):
+    admin = Admin(nome="Admin", email="admin@empresa.com")
+    admin.definir_senha("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    manha = FaixaHorario(
+        admin_id=admin.id, hora_inicio="07:00", hora_fim="13:00", ordem=1
+    )
+    tarde = FaixaHorario(
+        admin_id=admin.id,
+        hora_inicio="11:00",
+        hora_fim="17:00",
+        ordem=2,
+        ativo_fds=False,
+    )
+    comercial = FaixaHorario(
+        admin_id=admin.id,
+        hora_inicio="07:00",
+        hora_fim="17:00",
+        ordem=3,
+        ativo_fds=False,
+    )
+    ana = Funcionario(
+        nome="Ana", horario_inicio="07:00", horario_fim="17:00", admin_id=admin.id
+    )
+    bia = Funcionario(
+        nome="Bia", horario_inicio="07:00", horario_fim="17:00", admin_id=admin.id
+    )
+    db.session.add_all([manha, tarde, comercial, ana, bia])
+    db.session.commit()
+
+    # Ana: 12/01 a 21/01 na faixa comercial, com folga em 20/01 (8 + 1 dias)
+    for i in range(10):
+        db.session.add(
+            EscalaDiaria(
+                funcionario_id=ana.id,
+                faixa_horario_id=comercial.id,
+                data=date(2026, 1, 12) + timedelta(days=i),
+            )
+        )
+    db.session.add(Folga(funcionario_id=ana.id, data=date(2026, 1, 20)))
+
+    # Bia: escalada 12/01 a 22/01 na manhã, mas de férias de 15/01 a 16/01
+    for i in range(11):
+        db.session.add(
+            EscalaDiaria(
+                funcionario_id=bia.id,
+                faixa_horario_id=manha.id,
+                data=date(2026, 1, 12) + timedelta(days=i),
+            )
+        )
+    db.session.add(
+        Ferias(
+            funcionario_id=bia.id,
+            data_inicio=date(2026, 1, 15),
+            data_fim=date(2026, 1, 16),
+        )
+    )
+    db.session.commit()
+
+    alertas = verificar_alertas_escalas(admin.id, 2026, 1)
+
+    excesso = [a for a in alertas if a["tipo"] == "excesso_dias"]
+    assert [(a["funcionario_nome"], a["mensagem"]) for a in excesso] == [
+        ("Ana", "Ana trabalhou 8 dias consecutivos (de 12/01 a 19/01)"),
+    ]
+
+    sem_cobertura = _alertas_por_dia(alertas, "sem_cobertura")
+    # Tarde coberta pela faixa comercial enquanto Ana está escalada
+    assert date(2026, 1, 14) not in sem_cobertura
+    # Na folga de Ana a escala dela continua no banco e cobre a tarde
+    assert date(2026, 1, 20) not in sem_cobertura
+    # 22/01: só a manhã ocupada
+    assert [a["faixa_horario_id"] for a in sem_cobertura[date(2026, 1, 22)]] == [
+        tarde.id,
+        comercial.id,
+    ]
+    # Sábado sem ninguém: só a manhã funciona no fim de semana
+    assert [a["faixa_horario_id"] for a in sem_cobertura[date(2026, 1, 24)]] == [
+        manha.id
+    ]
+    assert alertas[: len(excesso)] == excesso
+
+
+def test_alertas_usam_numero_constante_de_consultas(criar_cenario, contar_consultas):
+    admin_pequeno = criar_cenario(5, semente=1)
+    admin_grande = criar_cenario(40, semente=2)
+    gerar_escalas_com_faixas_horario(admin_pequeno, 2026, 1)
+    gerar_escalas_com_faixas_horario(admin_grande, 2026, 1)
+
+    consultas_pequeno = contar_consultas(
+        verificar_alertas_escalas, admin_pequeno, 2026, 1
+    )
+    consultas_grande = contar_consultas(
+        verificar_alertas_escalas, admin_grande, 2026, 1
+    )
+
+    assert consultas_pequeno == consultas_grande
+    assert consultas_grande <= 5
+
+
+def test_alertas_gravados_acompanham_as_alteracoes(criar_cenario, contar_consultas):
+    admin_id = criar_cenario(10, semente=5, faixas_por_funcionario=2)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    assert alertas_do_periodo(admin_id, 2026, 1) == verificar_alertas_escalas(
+        admin_id, 2026, 1
+    )
+    # Período já gravado: uma consulta
+    assert contar_consultas(alertas_do_periodo, admin_id, 2026, 1) == 1
+
+    ids_antes = {alerta.id for alerta in Alerta.query.all()}
+
+    # Alterações pelo ORM: retirar escalas de um dia, dar férias e folga
+    escalas_dia = EscalaDiaria.query.filter_by(data=date(2026, 1, 27)).all()
+    for escala in escalas_dia[:3]:
+        db.session.delete(escala)
+    funcionario = Funcionario.query.filter_by(admin_id=admin_id).first()
+    db.session.add(
+        Ferias(
+            funcionario_id=funcionario.id,
+            data_inicio=date(2026, 2, 2),
+            data_fim=date(2026, 2, 4),
+        )
+    )
+    db.session.add(Folga(funcionario_id=funcionario.id, data=date(2026, 1, 29)))
+    db.session.commit()
+
+    assert alertas_do_periodo(admin_id, 2026, 1) == verificar_alertas_escalas(
+        admin_id, 2026, 1
+    )
+    # Os alertas que não mudaram continuam as mesmas linhas
+    ids_depois = {alerta.id for alerta in Alerta.query.all()}
+    assert len(ids_antes & ids_depois) > 0
+
+    # Gravação em lote (regeneração de dias)
+    regenerar_dias(admin_id, [date(2026, 1, 27)])
+    assert alertas_do_periodo(admin_id, 2026, 1) == verificar_alertas_escalas(
+        admin_id, 2026, 1
+    )
+
+    # Alterações desfeitas não deixam recálculo pendente
+    db.session.delete(Folga.query.first())
+    db.session.flush()
+    db.session.rollback()
+    assert alertas_do_periodo(admin_id, 2026, 1) == verificar_alertas_escalas(
+        admin_id, 2026, 1
+    )
+
+
+def _alertas_gravados(admin_id):
+    # Como outro processo: lê a tabela sem a lista em memória de períodos
+    esquecer_periodos_materializados()
+    return sorted(
+        (alerta.tipo, alerta.mensagem)
+        for alerta in Alerta.query.filter_by(admin_id=admin_id).all()
+    )
+
+
+def test_cadastro_alterado_atualiza_a_tabela(criar_cenario):
+    admin_id = criar_cenario(10, semente=5, faixas_por_funcionario=2)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    alertas_do_periodo(admin_id, 2026, 1)
+
+    def esperados():
+        return sorted(
+            (alerta["tipo"], alerta["mensagem"])
+            for alerta in verificar_alertas_escalas(admin_id, 2026, 1)
+        )
+
+    # Novo nome de um funcionário com alerta de excesso
+    excesso = [
+        alerta
+        for alerta in verificar_alertas_escalas(admin_id, 2026, 1)
+        if alerta["tipo"] == "excesso_dias"
+    ]
+    assert excesso
+    funcionario = db.session.get(Funcionario, excesso[0]["funcionario_id"])
+    funcionario.nome = "Nome Novo"
+    db.session.commit()
+    assert _alertas_gravados(admin_id) == esperados()
+    assert any("Nome Novo" in mensagem for _, mensagem in esperados())
+
+    # Faixa desativada deixa de ter alertas de cobertura
+    sem_cobertura = [
+        alerta
+        for alerta in verificar_alertas_escalas(admin_id, 2026, 1)
+        if alerta["tipo"] == "sem_cobertura"
+    ]
+    assert sem_cobertura
+    faixa = db.session.get(FaixaHorario, sem_cobertura[0]["faixa_horario_id"])
+    faixa.ativo = False
+    db.session.commit()
+    assert _alertas_gravados(admin_id) == esperados()
+
+    # Nova faixa, sem ninguém escalado, depois removida
+    nova = FaixaHorario(admin_id=admin_id, hora_inicio="02:00", hora_fim="04:00")
+    db.session.add(nova)
+    db.session.commit()
+    assert _alertas_gravados(admin_id) == esperados()
+    assert any("02:00-04:00" in mensagem for _, mensagem in esperados())
+
+    db.session.delete(nova)
+    db.session.commit()
+    assert _alertas_gravados(admin_id) == esperados()
+
+
+def test_leitura_dos_alertas_nao_faz_commit_da_sessao(criar_cenario):
+    admin_id = criar_cenario(5)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    funcionario = Funcionario.query.filter_by(admin_id=admin_id).first()
+    funcionario.nome = "Não Gravado"
+    alertas = alertas_do_periodo(admin_id, 2026, 1)
+    db.session.rollback()
+
+    assert alertas == verificar_alertas_escalas(admin_id, 2026, 1)
+    assert db.session.get(Funcionario, funcionario.id).nome != "Não Gravado"
+
+
+def test_recalculo_em_volta_das_datas_alteradas(app):
+    admin = Admin(nome="Admin", email="admin@empresa.com")
+    admin.definir_senha("admin123")
+    db.session.add(admin)
+    db.session.commit()
+    manha = FaixaHorario(admin_id=admin.id, hora_inicio="07:00", hora_fim="13:00")
+    ana = Funcionario(
+        nome="Ana", horario_inicio="07:00", horario_fim="13:00", admin_id=admin.id
+    )
+    bia = Funcionario(
+        nome="Bia", horario_inicio="07:00", horario_fim="13:00", admin_id=admin.id
+    )
+    db.session.add_all([manha, ana, bia])
+    db.session.commit()
+
+    # Ana trabalha o período inteiro; Bia, de 12/01 a 20/01
+    primeiro_dia = date(2026, 1, 12)
+    for d in range(31):
+        data = primeiro_dia + timedelta(days=d)
+        db.session.add(
+            EscalaDiaria(funcionario_id=ana.id, faixa_horario_id=manha.id, data=data)
+        )
+        if d < 9:
+            db.session.add(
+                EscalaDiaria(
+                    funcionario_id=bia.id, faixa_horario_id=manha.id, data=data
+                )
+            )
+    db.session.commit()
+    alertas_do_periodo(admin.id, 2026, 1)
+
+    def esperados():
+        return sorted(
+            (alerta["tipo"], alerta["mensagem"])
+            for alerta in verificar_alertas_escalas(admin.id, 2026, 1)
+        )
+
+    # Folgas no meio de sequências que passam das bordas da janela
+    folga = Folga(funcionario_id=ana.id, data=date(2026, 1, 27))
+    db.session.add(folga)
+    db.session.add(Folga(funcionario_id=bia.id, data=date(2026, 1, 15)))
+    db.session.commit()
+    assert _alertas_gravados(admin.id) == esperados()
+    assert (
+        "excesso_dias",
+        "Ana trabalhou 15 dias consecutivos (de 12/01 a 26/01)",
+    ) in (esperados())
+
+    db.session.delete(folga)
+    db.session.commit()
+    assert _alertas_gravados(admin.id) == esperados()
+
+    # Escala retirada: as duas sequências que sobram passam das bordas
+    escala = EscalaDiaria.query.filter_by(
+        funcionario_id=ana.id, data=date(2026, 1, 25)
+    ).one()
+    db.session.delete(escala)
+    db.session.commit()
+    assert _alertas_gravados(admin.id) == esperados()
@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from alertas import esquecer_periodos_materializados
+from consultas import medir_consultas, metricas_rotas
+from escala_generator import gerar_escalas_com_faixas_horario
+from models import db
+
+PERIODO = "ano=2026&mes=1"
+
+# Consultas por requisição, independentes do tamanho da equipe. A primeira
+# visita ao calendário inclui a gravação dos alertas do período.
+ORCAMENTOS = [
+    (f"/admin/calendario?{PERIODO}", 16),
+    (f"/admin/calendario?{PERIODO}", 8),
+    (f"/escalas?{PERIODO}", 10),
+    (f"/admin/exportar-pdf?{PERIODO}", 8),
+]
+
+
+def test_rotas_dentro_do_orcamento_de_consultas(
+    criar_cenario, app_web, cliente_admin, orcamento_consultas
+):
+    consultas_por_tamanho = []
+    for semente, total in enumerate([10, 40], 1):
+        with app_web.app_context():
+            db.drop_all()
+            db.create_all()
+            esquecer_periodos_materializados()
+            admin_id = criar_cenario(total, semente=semente)
+            gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+        cliente = cliente_admin(admin_id)
+        consultas_por_tamanho.append(
+            [orcamento_consultas(cliente, url, limite) for url, limite in ORCAMENTOS]
+        )
+
+    assert consultas_por_tamanho[0] == consultas_por_tamanho[1]
+
+
+def test_cabecalhos_e_metricas(criar_cenario, cliente_admin, app_web):
+    with app_web.app_context():
+        admin_id = criar_cenario(5)
+    cliente = cliente_admin(admin_id)
+    metricas_rotas.limpar()
+
+    app_web.debug = True
+    try:
+        resposta = cliente.get(f"/admin/calendario?{PERIODO}")
+    finally:
+        app_web.debug = False
+    assert int(resposta.headers["X-Consultas-SQL"]) > 0
+    assert float(resposta.headers["X-Tempo-SQL-ms"]) >= 0
+    assert "X-Consultas-SQL" not in cliente.get(f"/escalas?{PERIODO}").headers
+
+    # Medições aninhadas somam as consultas da requisição
+    with medir_consultas() as rastreador:
+        cliente.get(f"/escalas?{PERIODO}")
+    assert rastreador.total > 0
+
+    rotas = cliente.get("/admin/metrics").get_json()["rotas"]
+    assert rotas["calendario"]["requisicoes"] == 1
+    assert rotas["calendario"]["consultas"] == int(resposta.headers["X-Consultas-SQL"])
+    assert rotas["visualizar_escalas"]["requisicoes"] == 2
+
+
+def test_consulta_com_erro_nao_deixa_inicio_pendente(app):
+    with db.engine.connect() as conexao:
+        with medir_consultas() as rastreador:
+            with pytest.raises(OperationalError):
+                conexao.exec_driver_sql("SELECT * FROM tabela_inexistente")
+            conexao.exec_driver_sql("SELECT 1")
+        assert not conexao.info.get("inicio_consulta")
+    assert rastreador.consultas == ["SELECT 1"]
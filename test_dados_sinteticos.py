@@ -0,0 +1,40 @@
+from models import db, Funcionario, FaixaHorario, DisponibilidadeFuncionario
+from popular_dados_exemplo import faixas_sinteticas, popular_dados_sinteticos
+
+
+def _retrato(admin_id):
+    funcionarios = Funcionario.query.filter_by(admin_id=admin_id).all()
+    return (
+        [(f.nome, f.preferencia_folga) for f in funcionarios],
+        sorted(
+            (d.funcionario.nome, d.faixa_horario.hora_inicio)
+            for d in DisponibilidadeFuncionario.query.join(Funcionario)
+            .filter(Funcionario.admin_id == admin_id)
+            .all()
+        ),
+        sorted(
+            (ferias.funcionario.nome, ferias.data_inicio, ferias.data_fim)
+            for func in funcionarios
+            for ferias in func.ferias
+        ),
+    )
+
+
+def test_dados_sinteticos_reproduziveis(app):
+    primeiro = _retrato(popular_dados_sinteticos(40, n_faixas=8, semente=3))
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+    segundo = _retrato(popular_dados_sinteticos(40, n_faixas=8, semente=3))
+
+    assert primeiro == segundo
+    assert len(primeiro[0]) == 40
+    assert len(primeiro[1]) == 40 * 3
+    assert FaixaHorario.query.count() == 8
+
+
+def test_faixas_sinteticas_distintas():
+    for n_faixas in (1, 4, 8, 16):
+        faixas = faixas_sinteticas(n_faixas)
+        assert len({(f["hora_inicio"], f["hora_fim"]) for f in faixas}) == n_faixas
+    assert faixas_sinteticas(16)[-1]["hora_fim"] == "01:00"
@@ -0,0 +1,87 @@
+import random
+from datetime import date, timedelta
+from itertools import product
+from types import SimpleNamespace
+
+from escala_generator import (
+    coletar_fins_de_semana,
+    distribuir_fins_de_semana,
+    esta_em_ferias,
+)
+
+FINS_DE_SEMANA = coletar_fins_de_semana(date(2026, 1, 12), date(2026, 2, 11), set())
+
+
+def _cenario(rnd, total_funcionarios, fins_de_semana, chance_ferias=0.4):
+    funcionarios = [SimpleNamespace(id=i + 1) for i in range(total_funcionarios)]
+    ferias = {}
+    for func in funcionarios:
+        if rnd.random() < chance_ferias:
+            inicio = fins_de_semana[0][0] + timedelta(days=rnd.randint(-3, 20))
+            ferias[func.id] = [
+                {"inicio": inicio, "fim": inicio + timedelta(days=rnd.randint(0, 16))}
+            ]
+    return funcionarios, ferias
+
+
+def _possiveis(func, fins_de_semana, ferias):
+    return [
+        w
+        for w, (sabado, domingo) in enumerate(fins_de_semana)
+        if not esta_em_ferias(sabado, ferias.get(func.id, []))
+        and not esta_em_ferias(domingo, ferias.get(func.id, []))
+    ]
+
+
+def _avaliar(distribuicao, funcionarios, fins_de_semana, ferias):
+    """(quantos ficaram fora das férias, soma dos quadrados das cargas)"""
+    fora_das_ferias = 0
+    carga = [0] * len(fins_de_semana)
+    for func in funcionarios:
+        w = fins_de_semana.index(distribuicao[func.id])
+        if w in _possiveis(func, fins_de_semana, ferias):
+            fora_das_ferias += 1
+            carga[w] += 1
+    return fora_das_ferias, sum(c * c for c in carga)
+
+
+def test_distribuicao_equilibrada_sem_ferias():
+    for total in (1, 3, 4, 9, 30, 151):
+        funcionarios = [SimpleNamespace(id=i + 1) for i in range(total)]
+        distribuicao = distribuir_fins_de_semana(funcionarios, FINS_DE_SEMANA, {})
+
+        assert set(distribuicao) == {func.id for func in funcionarios}
+        cargas = [list(distribuicao.values()).count(fds) for fds in FINS_DE_SEMANA]
+        assert max(cargas) - min(cargas) <= 1
+
+
+def test_distribuicao_otima_com_ferias():
+    """Compara com todas as distribuições possíveis em cenários pequenos"""
+    rnd = random.Random(19)
+    fins_de_semana = FINS_DE_SEMANA[:3]
+    for _ in range(60):
+        funcionarios, ferias = _cenario(rnd, rnd.randint(1, 6), fins_de_semana)
+        distribuicao = distribuir_fins_de_semana(funcionarios, fins_de_semana, ferias)
+
+        # Mais funcionários fora das férias e, depois, cargas mais equilibradas
+        melhor = min(
+            (-fora, quadrados)
+            for fora, quadrados in (
+                _avaliar(
+                    {
+                        func.id: fins_de_semana[w]
+                        for func, w in zip(funcionarios, escolha)
+                    },
+                    funcionarios,
+                    fins_de_semana,
+                    ferias,
+                )
+                for escolha in product(
+                    range(len(fins_de_semana)), repeat=len(funcionarios)
+                )
+            )
+        )
+
+        fora, quadrados = _avaliar(distribuicao, funcionarios, fins_de_semana, ferias)
+        assert (-fora, quadrados) == melhor
+        assert set(distribuicao) == {func.id for func in funcionarios}
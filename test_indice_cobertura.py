@@ -0,0 +1,169 @@
+import random
+
+from cobertura import (
+    IndiceCobertura,
+    horario_da_faixa,
+    intervalo_em_minutos,
+    mascara_horas,
+)
+from pontuacao import prioridades_por_assinatura
+
+EIXO = 1560
+
+
+def _bitmap(intervalos):
+    minutos = [False] * (2 * 24 * 60)
+    for inicio, fim in intervalos:
+        for minuto in range(inicio, fim):
+            minutos[minuto] = True
+    return minutos
+
+
+def _intervalo_aleatorio(rnd):
+    inicio = rnd.randrange(EIXO)
+    return inicio, min(EIXO, inicio + rnd.choice([0, 1, 30, 60, 240, 360, 600]))
+
+
+def test_indice_igual_ao_bitmap_de_minutos():
+    rnd = random.Random(11)
+    for _ in range(300):
+        intervalos = [_intervalo_aleatorio(rnd) for _ in range(rnd.randint(0, 8))]
+        indice = IndiceCobertura(intervalos)
+        minutos = _bitmap(intervalos)
+
+        # Intervalos disjuntos, ordenados e sem encostar uns nos outros
+        for i in range(1, len(indice.inicios)):
+            assert indice.fins[i - 1] < indice.inicios[i]
+        assert sum(f - i for i, f in zip(indice.inicios, indice.fins)) == sum(minutos)
+
+        for _ in range(20):
+            inicio, fim = _intervalo_aleatorio(rnd)
+            assert indice.cobre(inicio, fim) == all(minutos[inicio:fim])
+            assert indice.minutos_cobertos(inicio, fim) == sum(minutos[inicio:fim])
+
+
+def test_intervalo_cruzando_a_meia_noite():
+    assert intervalo_em_minutos("19:00", "01:00") == (1140, 1500)
+    assert intervalo_em_minutos("05:00", "11:00") == (300, 660)
+    assert intervalo_em_minutos("22:00", "00:00") == (1320, 1440)
+
+    rnd = random.Random(3)
+    for _ in range(200):
+        inicio = rnd.randrange(24 * 60)
+        fim = rnd.randrange(24 * 60)
+        horas = (
+            f"{inicio // 60:02d}:{inicio % 60:02d}",
+            f"{fim // 60:02d}:{fim % 60:02d}",
+        )
+        a, b = intervalo_em_minutos(*horas)
+        assert a == inicio and 0 < b - a <= 24 * 60 and b % (24 * 60) == fim
+
+
+def test_cobertura_de_faixas():
+    # Duas faixas que se encostam cobrem a faixa do meio
+    assert IndiceCobertura.dos_horarios(
+        [("07:00", "13:00"), ("13:00", "19:00")]
+    ).cobre_horario("11:00", "17:00")
+    # 19:00-01:00 não cobre o começo de 17:00-23:00
+    assert not IndiceCobertura.dos_horarios([("19:00", "01:00")]).cobre_horario(
+        "17:00", "23:00"
+    )
+    # A noite inteira coberta por duas faixas, uma delas depois da meia-noite
+    assert IndiceCobertura.dos_horarios(
+        [("15:00", "21:00"), ("21:00", "01:00")]
+    ).cobre_horario("19:00", "01:00")
+    # Faixas do dia que terminam antes das 19:00 não cobrem a noite
+    assert not IndiceCobertura.dos_horarios(
+        [("07:00", "13:00"), ("13:00", "19:00")]
+    ).cobre_horario("19:00", "01:00")
+    assert not IndiceCobertura([]).cobre_horario("07:00", "13:00")
+
+
+def _str_to_minutes(hora_str):
+    h, m = hora_str.split(":")
+    minutos = int(h) * 60 + int(m)
+    if minutos < 120:
+        minutos += 24 * 60
+    return minutos
+
+
+def _prioridades_por_minutos(faixas_texto, eh_fds):
+    """Cálculo anterior das prioridades: conjuntos de minutos"""
+    faixas = [
+        (faixa_id, _str_to_minutes(inicio), _str_to_minutes(fim))
+        for faixa_id, inicio, fim, _, semana, fds in faixas_texto
+        if (eh_fds and fds) or (not eh_fds and semana)
+    ]
+    prioridades = []
+    for faixa_id, inicio, fim in faixas:
+        minutos = set(range(inicio, fim))
+        cobertos = set()
+        for outra_id, outra_inicio, outra_fim in faixas:
+            if outra_id != faixa_id:
+                cobertos.update(minutos & set(range(outra_inicio, outra_fim)))
+        percentual = (len(cobertos) / (fim - inicio)) * 90 if fim > inicio else 0
+        prioridades.append((faixa_id, percentual))
+    prioridades.sort(key=lambda x: x[1])
+    return tuple(prioridades)
+
+
+def test_prioridades_iguais_as_calculadas_por_minutos():
+    rnd = random.Random(5)
+    for _ in range(100):
+        faixas_texto = []
+        for faixa_id in range(1, rnd.randint(1, 8) + 1):
+            # Inclui inícios de madrugada (antes das 02:00)
+            inicio = rnd.randrange(0, 24 * 60, 30)
+            fim = rnd.choice(
+                [
+                    rnd.randrange(inicio + 30, 24 * 60 + 30, 30),
+                    rnd.randrange(0, 24 * 60, 30),
+                    rnd.randrange(0, 120, 30),
+                ]
+            ) % (24 * 60)
+            faixas_texto.append(
+                (
+                    faixa_id,
+                    f"{inicio // 60:02d}:{inicio % 60:02d}",
+                    f"{fim // 60:02d}:{fim % 60:02d}",
+                    True,
+                    rnd.random() < 0.8,
+                    rnd.random() < 0.5,
+                )
+            )
+        assinatura = tuple(
+            (
+                faixa_id,
+                horario_da_faixa(inicio, fim)["minuto_inicio"],
+                horario_da_faixa(inicio, fim)["minuto_fim"],
+                ativo,
+                semana,
+                fds,
+            )
+            for faixa_id, inicio, fim, ativo, semana, fds in faixas_texto
+        )
+        for eh_fds in (False, True):
+            assert prioridades_por_assinatura(
+                assinatura, eh_fds
+            ) == _prioridades_por_minutos(faixas_texto, eh_fds)
+
+
+def _assinatura(faixas_texto):
+    return tuple(
+        (faixa_id, *intervalo_em_minutos(inicio, fim), True, True, True)
+        for faixa_id, inicio, fim in faixas_texto
+    )
+
+
+def test_prioridades_com_inicio_de_madrugada():
+    # Antes das 02:00 conta como dia seguinte: 00:00-06:00 não cobre nada
+    # nas prioridades, como na pontuação (mascara_horas)
+    faixas_texto = [(1, "00:00", "06:00"), (2, "05:00", "11:00"), (3, "22:00", "01:00")]
+    assert prioridades_por_assinatura(_assinatura(faixas_texto), False) == (
+        (1, 0),
+        (2, 0.0),
+        (3, 0.0),
+    )
+    assert mascara_horas("00:00", "06:00") == 0
+    assert mascara_horas("01:00", "03:00") == 0
+    assert mascara_horas("22:00", "01:00") == (1 << 22) | (1 << 23) | (1 << 0)
@@ -0,0 +1,144 @@
+import random
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+from models import EscalaDiaria
+from escala_generator import (
+    coletar_fins_de_semana,
+    distribuir_fins_de_semana,
+    esta_em_ferias,
+    gerar_escalas_com_faixas_horario,
+    gerar_folgas_funcionario,
+)
+from matriz_escala import MatrizEscala
+from scheduling_context import SchedulingContext
+
+PREFERENCIAS = ["segunda", "terca", "quarta", "quinta", "sexta", "sabado", "domingo"]
+
+
+def _cenario_aleatorio(rnd, total_funcionarios):
+    primeiro_dia = date(2026, rnd.randint(1, 12), 12)
+    ultimo_dia = primeiro_dia + timedelta(days=rnd.randint(28, 31))
+    dias_bloqueados = {
+        primeiro_dia + timedelta(days=rnd.randint(0, 28))
+        for _ in range(rnd.randint(0, 4))
+    }
+
+    funcionarios = []
+    ferias_por_funcionario = {}
+    for func_id in range(1, total_funcionarios + 1):
+        funcionarios.append(
+            SimpleNamespace(
+                id=func_id, preferencia_folga=rnd.choice(PREFERENCIAS + [None])
+            )
+        )
+        if rnd.random() < 0.3:
+            inicio = primeiro_dia + timedelta(days=rnd.randint(-5, 30))
+            ferias_por_funcionario[func_id] = [
+                {"inicio": inicio, "fim": inicio + timedelta(days=rnd.randint(0, 12))}
+            ]
+
+    return (
+        primeiro_dia,
+        ultimo_dia,
+        dias_bloqueados,
+        funcionarios,
+        ferias_por_funcionario,
+    )
+
+
+def test_folgas_vetorizadas_iguais_as_do_gerador():
+    rnd = random.Random(7)
+    for _ in range(30):
+        primeiro_dia, ultimo_dia, dias_bloqueados, funcionarios, ferias = (
+            _cenario_aleatorio(rnd, rnd.randint(1, 12))
+        )
+        fins_de_semana = distribuir_fins_de_semana(
+            funcionarios,
+            coletar_fins_de_semana(primeiro_dia, ultimo_dia, dias_bloqueados),
+            ferias,
+        )
+
+        esperadas = []
+        for func in funcionarios:
+            esperadas.extend(
+                gerar_folgas_funcionario(
+                    func,
+                    primeiro_dia,
+                    ultimo_dia,
+                    dias_bloqueados,
+                    ferias.get(func.id, []),
+                    fins_de_semana.get(func.id),
+                )
+            )
+
+        matriz = MatrizEscala(
+            [func.id for func in funcionarios], [], primeiro_dia, ultimo_dia
+        )
+        matriz.definir_bloqueados(dias_bloqueados)
+        matriz.definir_ferias(ferias)
+        folgas = matriz.gerar_folgas(
+            [func.preferencia_folga for func in funcionarios], fins_de_semana
+        )
+
+        assert folgas == esperadas
+        assert matriz.folga.sum() == len(esperadas)
+
+
+def test_sequencias_de_trabalho():
+    matriz = MatrizEscala([10, 20], [1], date(2026, 1, 12), date(2026, 1, 31))
+    matriz.alocacao[0, :] = 0
+    matriz.alocacao[1, 2:9] = 0
+    matriz.alocacao[1, 12:20] = 0
+    matriz.definir_folgas([{"funcionario_id": 10, "data": date(2026, 1, 19)}])
+
+    funcionarios, inicios, comprimentos = matriz.sequencias_de_trabalho(6)
+
+    assert funcionarios.tolist() == [0, 0, 1, 1]
+    assert inicios.tolist() == [0, 8, 2, 12]
+    assert comprimentos.tolist() == [7, 12, 7, 8]
+
+
+def test_matriz_de_um_ano_cabe_em_poucos_megabytes():
+    matriz = MatrizEscala(
+        list(range(500)), list(range(20)), date(2026, 1, 1), date(2026, 12, 31)
+    )
+
+    assert matriz.alocacao.shape == (500, 365)
+    assert matriz.nbytes() < 2 * 1024 * 1024
+
+
+def test_matriz_do_contexto_espelha_o_banco(criar_cenario):
+    admin_id = criar_cenario(12, semente=4)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    contexto = SchedulingContext.para_periodo(admin_id, 2026, 1)
+    matriz = contexto.matriz
+    matriz.definir_escalas(
+        (e.funcionario_id, e.faixa_horario_id, e.data) for e in EscalaDiaria.query.all()
+    )
+
+    for faixa in contexto.faixas:
+        for data in contexto.dias():
+            assert contexto.funcionarios_disponiveis(faixa, data) == [
+                func_id
+                for func_id in contexto.disponibilidades_por_faixa.get(faixa.id, [])
+                if not contexto.esta_de_folga(func_id, data)
+                and not esta_em_ferias(data, contexto.ferias_do_funcionario(func_id))
+            ]
+
+    assert sorted(
+        (linha["funcionario_id"], linha["faixa_horario_id"], linha["data"])
+        for linha in matriz.linhas_escalas()
+    ) == sorted(
+        (e.funcionario_id, e.faixa_horario_id, e.data) for e in EscalaDiaria.query.all()
+    )
+    assert np.array_equal(
+        matriz.folga,
+        [
+            [contexto.esta_de_folga(func.id, data) for data in contexto.dias()]
+            for func in contexto.funcionarios
+        ],
+    )
@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+from migracoes import MIGRACOES, executar_migracoes
+from models import db, Admin, FaixaHorario, Folga
+
+
+def test_minutos_preenchidos_ao_salvar(app):
+    admin = Admin(nome="Admin", email="admin@empresa.com")
+    admin.definir_senha("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    faixa = FaixaHorario(admin_id=admin.id, hora_inicio="19:00", hora_fim="01:00")
+    db.session.add(faixa)
+    db.session.commit()
+    assert (faixa.minuto_inicio, faixa.minuto_fim, faixa.cruza_meia_noite) == (
+        1140,
+        1500,
+        True,
+    )
+    assert faixa.mascara_horas == sum(1 << hora for hora in [19, 20, 21, 22, 23, 0])
+
+    faixa.hora_fim = "23:00"
+    db.session.commit()
+    db.session.expire_all()
+    assert (faixa.minuto_inicio, faixa.minuto_fim, faixa.cruza_meia_noite) == (
+        1140,
+        1380,
+        False,
+    )
+    assert faixa.mascara_horas == sum(1 << hora for hora in range(19, 23))
+
+
+def test_migracao_preenche_banco_antigo(app):
+    # Banco de antes das colunas de minutos, com faixas já cadastradas
+    with db.engine.begin() as conexao:
+        conexao.exec_driver_sql("DROP TABLE faixa_horario")
+        conexao.exec_driver_sql("DELETE FROM migracao")
+        conexao.exec_driver_sql(
+            "CREATE TABLE faixa_horario (id INTEGER PRIMARY KEY, "
+            "admin_id INTEGER NOT NULL, hora_inicio VARCHAR(5) NOT NULL, "
+            "hora_fim VARCHAR(5) NOT NULL, ordem INTEGER, ativo BOOLEAN, "
+            "ativo_semana BOOLEAN, ativo_fds BOOLEAN, criado_em DATETIME)"
+        )
+        conexao.execute(
+            text(
+                "INSERT INTO faixa_horario (id, admin_id, hora_inicio, hora_fim) "
+                "VALUES (1, 1, '05:00', '11:00'), (2, 1, '19:00', '01:00')"
+            )
+        )
+
+    assert executar_migracoes() == [nome for nome, _ in MIGRACOES]
+    assert executar_migracoes() == []
+
+    colunas = {c["name"] for c in inspect(db.engine).get_columns("faixa_horario")}
+    assert {"minuto_inicio", "minuto_fim", "cruza_meia_noite", "mascara_horas"} <= (
+        colunas
+    )
+    faixas = {faixa.id: faixa for faixa in FaixaHorario.query.all()}
+    assert (faixas[1].minuto_inicio, faixas[1].minuto_fim) == (300, 660)
+    assert not faixas[1].cruza_meia_noite
+    assert (faixas[2].minuto_inicio, faixas[2].minuto_fim) == (1140, 1500)
+    assert faixas[2].cruza_meia_noite
+
+
+def test_migracao_cria_indices_e_remove_folgas_repetidas(app):
+    # Banco de antes dos índices, com a mesma folga gravada duas vezes
+    tabelas = [
+        "escala_diaria",
+        "folga",
+        "ferias",
+        "disponibilidade_funcionario",
+        "dia_bloqueado",
+    ]
+    with db.engine.begin() as conexao:
+        for tabela in tabelas:
+            for indice in db.metadata.tables[tabela].indexes:
+                conexao.exec_driver_sql(f"DROP INDEX {indice.name}")
+        conexao.execute(
+            text(
+                "INSERT INTO folga (id, funcionario_id, data) VALUES "
+                "(1, 1, '2026-01-12'), (2, 1, '2026-01-12'), (3, 1, '2026-01-13')"
+            )
+        )
+        conexao.exec_driver_sql(
+            "DELETE FROM migracao WHERE nome = '0002_indices_tabelas_principais'"
+        )
+
+    assert executar_migracoes() == ["0002_indices_tabelas_principais"]
+
+    inspetor = inspect(db.engine)
+    for tabela in tabelas:
+        existentes = {indice["name"] for indice in inspetor.get_indexes(tabela)}
+        assert {indice.name for indice in db.metadata.tables[tabela].indexes} <= (
+            existentes
+        )
+    assert sorted(folga.id for folga in Folga.query.all()) == [1, 3]
+
+    with pytest.raises(IntegrityError):
+        with db.engine.begin() as conexao:
+            conexao.execute(
+                text(
+                    "INSERT INTO folga (funcionario_id, data) "
+                    "VALUES (1, '2026-01-13')"
+                )
+            )
+
+    # A leitura das escalas de um período usa índice em vez de varrer a tabela
+    with db.engine.connect() as conexao:
+        plano = " ".join(
+            linha[-1]
+            for linha in conexao.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM escala_diaria "
+                "WHERE data BETWEEN '2026-01-12' AND '2026-02-11'"
+            )
+        )
+    assert "ix_escala_diaria_data_faixa" in plano
+
+
+def test_migracao_cria_indice_de_alerta_em_banco_antigo(app):
+    # Tabela alerta como era antes do índice: o create_all não a recria
+    with db.engine.begin() as conexao:
+        conexao.exec_driver_sql("DROP TABLE alerta")
+        conexao.exec_driver_sql(
+            "CREATE TABLE alerta (id INTEGER PRIMARY KEY, "
+            "admin_id INTEGER NOT NULL, tipo VARCHAR(50) NOT NULL, "
+            "severidade VARCHAR(20), mensagem TEXT NOT NULL, "
+            "data_referencia DATE, funcionario_id INTEGER, "
+            "faixa_horario_id INTEGER, resolvido BOOLEAN, criado_em DATETIME)"
+        )
+        conexao.exec_driver_sql("DELETE FROM migracao")
+    db.create_all()
+    assert not inspect(db.engine).get_indexes("alerta")
+
+    assert "0003_indice_alerta" in executar_migracoes()
+
+    indices = {indice["name"] for indice in inspect(db.engine).get_indexes("alerta")}
+    assert "ix_alerta_admin_data" in indices
+    with db.engine.connect() as conexao:
+        plano = " ".join(
+            linha[-1]
+            for linha in conexao.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT * FROM alerta WHERE admin_id = 1 "
+                "AND data_referencia BETWEEN '2026-01-12' AND '2026-02-11'"
+            )
+        )
+    assert "ix_alerta_admin_data" in plano
@@ -0,0 +1,41 @@
+import json
+
+import perfil
+from escala_generator import gerar_escalas_com_faixas_horario, gerar_sugestao_escalas
+
+
+def test_perfil_da_geracao(criar_cenario, tmp_path, monkeypatch):
+    log = tmp_path / "perfil.jsonl"
+    monkeypatch.setattr(perfil, "ARQUIVO_LOG", str(log))
+    admin_id = criar_cenario(12, semente=6)
+
+    resultado = gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    assert "perfil" not in resultado
+    assert not log.exists()
+
+    resultado = gerar_escalas_com_faixas_horario(admin_id, 2026, 1, perfil=True)
+    dados = resultado["perfil"]
+    assert dados["funcao"] == "gerar_escalas_com_faixas_horario"
+    assert list(dados["fases_s"]) == [
+        "carregar_contexto",
+        "fins_de_semana",
+        "folgas",
+        "prioridades",
+        "busca_combinacoes",
+        "gravar_escalas",
+        "apagar_folgas",
+        "inserir_folgas",
+        "commit",
+    ]
+    assert len(dados["dias_s"]) == 31
+    assert sum(dados["fases_s"].values()) <= dados["total_s"] + 1e-3
+    assert dados["fases_s"]["busca_combinacoes"] >= max(dados["dias_s"].values())
+
+    gerar_sugestao_escalas(admin_id, 2026, 1, perfil=True)
+    linhas = [json.loads(linha) for linha in log.read_text().splitlines()]
+    assert [linha["funcao"] for linha in linhas] == [
+        "gerar_escalas_com_faixas_horario",
+        "gerar_sugestao_escalas",
+    ]
+    assert linhas[0]["fases_s"] == dados["fases_s"]
+    assert "dias_s" not in linhas[1]
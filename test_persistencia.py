@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import db, EscalaDiaria, Ferias, Folga, Funcionario
+from escala_generator import gerar_escalas_com_faixas_horario, gerar_sugestao_escalas
+from persistencia import GravacaoEmLote
+
+
+def _linhas():
+    return sorted(
+        (e.data, e.funcionario_id, e.faixa_horario_id) for e in EscalaDiaria.query.all()
+    ), sorted((f.data, f.funcionario_id) for f in Folga.query.all())
+
+
+def test_geracao_informa_linhas_gravadas(criar_cenario):
+    admin_id = criar_cenario(12)
+
+    primeira = gerar_escalas_com_faixas_horario(admin_id, 2026, 1)["persistencia"]
+    inseridas = primeira["linhas_inseridas"]
+    assert inseridas["escala_diaria"] == EscalaDiaria.query.count()
+    assert inseridas["folga"] == Folga.query.count()
+    assert primeira["linhas_apagadas"] == {"escala_diaria": 0, "folga": 0}
+
+    segunda = gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    assert segunda["escalas"] == {
+        "adicionadas": 0,
+        "removidas": 0,
+        "mantidas": inseridas["escala_diaria"],
+    }
+    assert segunda["persistencia"]["linhas_apagadas"] == {
+        "escala_diaria": 0,
+        "folga": inseridas["folga"],
+    }
+
+
+def test_insercao_em_lotes_limitados(criar_cenario):
+    admin_id = criar_cenario(3)
+    funcionario_id = Funcionario.query.filter_by(admin_id=admin_id).first().id
+    linhas = [
+        {"funcionario_id": funcionario_id, "data": date(2026, 1, 12) + timedelta(d)}
+        for d in range(20)
+    ]
+
+    execucoes = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT"):
+            execucoes.append(len(parameters) if executemany else 1)
+
+    gravacao = GravacaoEmLote(tamanho_lote=7)
+    event.listen(db.engine, "before_cursor_execute", registrar)
+    try:
+        gravacao.inserir(Folga, linhas)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", registrar)
+    gravacao.confirmar()
+
+    assert execucoes == [7, 7, 6]
+    assert Folga.query.count() == 20
+    assert gravacao.relatorio()["linhas_inseridas"] == {"folga": 20}
+
+
+def test_falha_na_gravacao_preserva_mes_anterior(criar_cenario, monkeypatch):
+    admin_id = criar_cenario(12)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    # Férias novas mudam as escalas antes da falha ao gravar as folgas
+    funcionario_id = EscalaDiaria.query.first().funcionario_id
+    db.session.add(
+        Ferias(
+            funcionario_id=funcionario_id,
+            data_inicio=date(2026, 1, 20),
+            data_fim=date(2026, 1, 30),
+        )
+    )
+    db.session.commit()
+    anterior = _linhas()
+
+    inserir = GravacaoEmLote.inserir
+
+    def inserir_com_falha(self, modelo, linhas):
+        if modelo is Folga:
+            raise RuntimeError("falha simulada")
+        return inserir(self, modelo, linhas)
+
+    monkeypatch.setattr(GravacaoEmLote, "inserir", inserir_com_falha)
+    with pytest.raises(RuntimeError):
+        gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    assert _linhas() == anterior
+
+
+def test_geracao_grava_so_a_diferenca(criar_cenario):
+    admin_id = criar_cenario(12)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    antes = {
+        (e.id, e.funcionario_id, e.faixa_horario_id, e.data)
+        for e in EscalaDiaria.query.all()
+    }
+
+    funcionario_id = EscalaDiaria.query.first().funcionario_id
+    db.session.add(
+        Ferias(
+            funcionario_id=funcionario_id,
+            data_inicio=date(2026, 1, 20),
+            data_fim=date(2026, 1, 30),
+        )
+    )
+    db.session.commit()
+
+    escalas = gerar_escalas_com_faixas_horario(admin_id, 2026, 1)["escalas"]
+    depois = {
+        (e.id, e.funcionario_id, e.faixa_horario_id, e.data)
+        for e in EscalaDiaria.query.all()
+    }
+
+    assert escalas["removidas"] > 0
+    assert len(antes & depois) == escalas["mantidas"]
+    assert len(antes - depois) == escalas["removidas"]
+    assert len(depois - antes) == escalas["adicionadas"]
+
+
+def test_sugestao_substitui_folgas_do_periodo(criar_cenario):
+    admin_id = criar_cenario(8)
+
+    resultado = gerar_sugestao_escalas(admin_id, 2026, 1)
+    assert resultado["persistencia"]["linhas_inseridas"]["folga"] == (
+        Folga.query.count()
+    )
+
+    gerar_sugestao_escalas(admin_id, 2026, 1)
+    assert Folga.query.count() == resultado["folgas_criadas"]
@@ -0,0 +1,27 @@
+from models import db, FaixaHorario
+from escala_generator import gerar_escalas_com_faixas_horario
+from pontuacao import prioridades_por_assinatura
+
+
+def test_prioridades_calculadas_uma_vez_por_tipo_de_dia(criar_cenario):
+    admin_id = criar_cenario(8)
+    prioridades_por_assinatura.cache_clear()
+
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    assert prioridades_por_assinatura.cache_info().misses == 2
+
+    # Outro mês do mesmo admin reaproveita o cache
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 2)
+    assert prioridades_por_assinatura.cache_info().misses == 2
+
+
+def test_cache_limpo_quando_faixa_muda(criar_cenario):
+    admin_id = criar_cenario(5)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    assert prioridades_por_assinatura.cache_info().currsize > 0
+
+    faixa = FaixaHorario.query.filter_by(admin_id=admin_id).first()
+    faixa.hora_fim = "12:00"
+    db.session.commit()
+
+    assert prioridades_por_assinatura.cache_info().currsize == 0
@@ -0,0 +1,116 @@
+from datetime import date
+
+from models import (
+    db,
+    Admin,
+    Funcionario,
+    FaixaHorario,
+    DisponibilidadeFuncionario,
+    EscalaDiaria,
+    Folga,
+)
+from escala_generator import (
+    gerar_escalas_com_faixas_horario,
+    realocar_horarios_por_folga,
+)
+from realocacao import RealocacaoDia
+from scheduling_context import SchedulingContext
+
+
+def _escalas_do_dia(data):
+    return sorted(
+        (e.funcionario_id, e.faixa_horario_id)
+        for e in EscalaDiaria.query.filter_by(data=data).all()
+    )
+
+
+def test_cadeia_de_substituicoes(app):
+    admin = Admin(nome="Admin", email="admin@empresa.com")
+    admin.definir_senha("admin123")
+    db.session.add(admin)
+    db.session.commit()
+
+    manha = FaixaHorario(admin_id=admin.id, hora_inicio="07:00", hora_fim="13:00")
+    tarde = FaixaHorario(admin_id=admin.id, hora_inicio="13:00", hora_fim="19:00")
+    noite = FaixaHorario(admin_id=admin.id, hora_inicio="19:00", hora_fim="01:00")
+    db.session.add_all([manha, tarde, noite])
+    db.session.commit()
+
+    funcionarios = {}
+    for nome, faixas in [
+        ("Ana", [noite]),
+        ("Bia", [manha, noite]),
+        ("Caio", [tarde]),
+        ("Duda", [manha]),
+    ]:
+        func = Funcionario(
+            nome=nome, horario_inicio="07:00", horario_fim="13:00", admin_id=admin.id
+        )
+        db.session.add(func)
+        db.session.flush()
+        for faixa in faixas:
+            db.session.add(
+                DisponibilidadeFuncionario(
+                    funcionario_id=func.id, faixa_horario_id=faixa.id
+                )
+            )
+        funcionarios[nome] = func.id
+
+    quarta = date(2026, 1, 14)
+    for nome, faixa in [("Ana", noite), ("Bia", manha), ("Caio", tarde)]:
+        db.session.add(
+            EscalaDiaria(
+                funcionario_id=funcionarios[nome],
+                faixa_horario_id=faixa.id,
+                data=quarta,
+            )
+        )
+    db.session.add(Folga(funcionario_id=funcionarios["Ana"], data=quarta))
+    db.session.commit()
+
+    # Só Bia cobre a noite; Duda, que estava livre, fica com a manhã dela
+    assert realocar_horarios_por_folga(quarta, funcionarios["Ana"], admin.id) == 2
+    assert _escalas_do_dia(quarta) == sorted(
+        [
+            (funcionarios["Bia"], noite.id),
+            (funcionarios["Caio"], tarde.id),
+            (funcionarios["Duda"], manha.id),
+        ]
+    )
+
+
+def test_realocacao_nao_piora_o_dia(criar_cenario, contar_consultas):
+    admin_id = criar_cenario(150, semente=9)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+
+    for data in [date(2026, 1, 14), date(2026, 1, 17), date(2026, 1, 29)]:
+        escalados = [func_id for func_id, _ in _escalas_do_dia(data)]
+        for func_id in escalados[:3]:
+            db.session.add(Folga(funcionario_id=func_id, data=data))
+            db.session.commit()
+
+            # Pontuação deixando as faixas dele descobertas
+            dia = RealocacaoDia(
+                SchedulingContext(admin_id, data, data),
+                data,
+                EscalaDiaria.query.filter_by(data=data).all(),
+            )
+            dia.liberar(func_id)
+            sem_substituto = dia.pontuar()
+
+            consultas = contar_consultas(
+                realocar_horarios_por_folga, data, func_id, admin_id
+            )
+
+            contexto = SchedulingContext(admin_id, data, data)
+            depois = RealocacaoDia(
+                contexto, data, EscalaDiaria.query.filter_by(data=data).all()
+            )
+            escalas = _escalas_do_dia(data)
+            assert depois.pontuar() >= sem_substituto
+            assert func_id not in [f for f, _ in escalas]
+            assert len({f for f, _ in escalas}) == len(escalas)
+            assert all(not contexto.esta_ausente(f, data) for f, _ in escalas)
+            # O dia é lido uma vez; o resto é o recálculo dos alertas no
+            # commit. O tempo fica no benchmark_escalas.py (etapa realocacao).
+            assert consultas <= 16
@@ -0,0 +1,143 @@
+from datetime import date
+
+from consultas import medir_consultas
+from models import (
+    db,
+    DisponibilidadeFuncionario,
+    EscalaDiaria,
+    FaixaHorario,
+    Ferias,
+    Folga,
+    Funcionario,
+)
+from escala_generator import (
+    gerar_escalas_com_faixas_horario,
+    regenerar_dias,
+    regenerar_dias_pendentes,
+)
+from dias_pendentes import dias_pendentes
+
+
+def _escalas_por_dia():
+    escalas = {}
+    for e in EscalaDiaria.query.all():
+        escalas.setdefault(e.data, set()).add(
+            (e.id, e.funcionario_id, e.faixa_horario_id)
+        )
+    return escalas
+
+
+def _sem_ids(escalas):
+    return {
+        data: {(func_id, faixa_id) for _, func_id, faixa_id in linhas}
+        for data, linhas in escalas.items()
+    }
+
+
+def test_regenerar_periodo_inteiro_igual_a_geracao(criar_cenario):
+    admin_id = criar_cenario(15, semente=4)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    gerado = _sem_ids(_escalas_por_dia())
+
+    datas = [
+        date(2026, 1, 12).fromordinal(d)
+        for d in range(date(2026, 1, 12).toordinal(), date(2026, 2, 11).toordinal() + 1)
+    ]
+    resultado = regenerar_dias(admin_id, datas)
+
+    assert len(resultado["dias_regenerados"]) == 31
+    assert _sem_ids(_escalas_por_dia()) == gerado
+
+
+def test_regenera_so_os_dias_alterados(criar_cenario):
+    admin_id = criar_cenario(15, semente=4)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    assert dias_pendentes(admin_id) == []
+
+    # Nova folga para um funcionário escalado, remoção de outra folga e
+    # férias de dois dias
+    funcionario_id = (
+        EscalaDiaria.query.filter_by(data=date(2026, 1, 15)).first().funcionario_id
+    )
+    db.session.add(Folga(funcionario_id=funcionario_id, data=date(2026, 1, 15)))
+    removida = (
+        Folga.query.filter(
+            Folga.data > date(2026, 1, 15), Folga.data < date(2026, 2, 2)
+        )
+        .order_by(Folga.data)
+        .first()
+    )
+    db.session.delete(removida)
+    db.session.add(
+        Ferias(
+            funcionario_id=funcionario_id,
+            data_inicio=date(2026, 2, 2),
+            data_fim=date(2026, 2, 3),
+        )
+    )
+    db.session.commit()
+
+    alterados = [date(2026, 1, 15), removida.data, date(2026, 2, 2), date(2026, 2, 3)]
+    assert dias_pendentes(admin_id) == alterados
+
+    antes = _escalas_por_dia()
+    resultado = regenerar_dias_pendentes(admin_id)
+    depois = _escalas_por_dia()
+
+    assert resultado["dias_regenerados"] == [d.isoformat() for d in alterados]
+    assert dias_pendentes(admin_id) == []
+
+    # Os outros dias ficam intactos (mesmas linhas, mesmos IDs)
+    for data in antes:
+        if data not in alterados:
+            assert depois[data] == antes[data]
+
+    # Os dias alterados ficam iguais a um recálculo completo com as mesmas folgas
+    completo = regenerar_dias(admin_id, list(antes))
+    assert completo["escalas"]["adicionadas"] == 0
+    assert completo["escalas"]["removidas"] == 0
+    recalculado = _sem_ids(_escalas_por_dia())
+    for data in alterados:
+        assert _sem_ids(depois)[data] == recalculado[data]
+    assert funcionario_id not in {
+        func_id for func_id, _ in recalculado[date(2026, 1, 15)]
+    }
+
+
+def test_rollback_nao_deixa_dias_pendentes(criar_cenario):
+    admin_id = criar_cenario(5)
+    funcionario = Funcionario.query.filter_by(admin_id=admin_id).first()
+    antes = dias_pendentes(admin_id)
+    assert date(2026, 1, 15) not in antes
+
+    # Folga enviada ao banco (flush) e desfeita, como numa geração que falha
+    db.session.add(Folga(funcionario_id=funcionario.id, data=date(2026, 1, 15)))
+    db.session.flush()
+    db.session.rollback()
+    db.session.commit()
+
+    assert dias_pendentes(admin_id) == antes
+
+
+def test_disponibilidades_buscam_os_dias_uma_vez(criar_cenario):
+    admin_id = criar_cenario(10)
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    funcionarios = Funcionario.query.filter_by(admin_id=admin_id).all()
+    faixa = FaixaHorario.query.filter_by(admin_id=admin_id).first()
+
+    # O mesmo formulário troca várias disponibilidades de uma vez
+    for funcionario in funcionarios[:5]:
+        for disponibilidade in funcionario.disponibilidades:
+            db.session.delete(disponibilidade)
+        db.session.add(
+            DisponibilidadeFuncionario(
+                funcionario_id=funcionario.id, faixa_horario_id=faixa.id
+            )
+        )
+    with medir_consultas() as rastreador:
+        db.session.commit()
+
+    consultas_escalas = [sql for sql in rastreador.selects if "escala_diaria" in sql]
+    assert len(consultas_escalas) == 1
+    datas = sorted({escala.data for escala in EscalaDiaria.query.all()})
+    assert dias_pendentes(admin_id) == [d for d in datas if d >= date.today()]
@@ -0,0 +1,84 @@
+from datetime import date
+
+from models import EscalaDiaria
+from escala_generator import gerar_escalas_com_faixas_horario
+from scheduling_context import SchedulingContext
+
+
+def test_contexto_indexa_disponiveis_por_faixa_e_dia(criar_cenario):
+    admin_id = criar_cenario(10)
+    contexto = SchedulingContext.para_periodo(admin_id, 2026, 1)
+
+    assert contexto.primeiro_dia == date(2026, 1, 12)
+    assert contexto.ultimo_dia == date(2026, 2, 11)
+    assert contexto.dias_bloqueados == {date(2026, 1, 20)}
+
+    faixa = contexto.faixas[0]
+    data = date(2026, 1, 14)
+    contexto.definir_folgas(
+        [
+            {
+                "funcionario_id": contexto.disponibilidades_por_faixa[faixa.id][0],
+                "data": data,
+            }
+        ]
+    )
+
+    disponiveis = contexto.funcionarios_disponiveis(faixa, data)
+    assert contexto.disponibilidades_por_faixa[faixa.id][0] not in disponiveis
+    assert all(not contexto.esta_ausente(f, data) for f in disponiveis)
+
+
+def test_geracao_usa_numero_constante_de_consultas(criar_cenario, contar_consultas):
+    admin_pequeno = criar_cenario(5, semente=1)
+    admin_grande = criar_cenario(30, semente=2)
+
+    consultas_pequeno = contar_consultas(
+        gerar_escalas_com_faixas_horario, admin_pequeno, 2026, 1
+    )
+    consultas_grande = contar_consultas(
+        gerar_escalas_com_faixas_horario, admin_grande, 2026, 1
+    )
+
+    assert consultas_pequeno == consultas_grande
+    # Até 10 da geração e 6 do recálculo dos alertas do período no commit
+    assert consultas_grande <= 16
+    assert EscalaDiaria.query.count() > 0
+
+
+def _escalas_geradas():
+    return sorted(
+        (e.data, e.funcionario_id, e.faixa_horario_id) for e in EscalaDiaria.query.all()
+    )
+
+
+def test_geracao_paralela_igual_a_serial(criar_cenario):
+    admin_id = criar_cenario(20, semente=3)
+
+    serial = gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    escalas_serial = _escalas_geradas()
+
+    paralelo = gerar_escalas_com_faixas_horario(
+        admin_id, 2026, 1, paralelo=True, processos=2
+    )
+
+    assert _escalas_geradas() == escalas_serial
+    assert paralelo["memo_alocacoes"] == serial["memo_alocacoes"]
+
+
+def test_orcamento_de_tempo(criar_cenario):
+    admin_id = criar_cenario(20, semente=3)
+
+    gerar_escalas_com_faixas_horario(admin_id, 2026, 1)
+    escalas_sem_limite = _escalas_geradas()
+
+    folgado = gerar_escalas_com_faixas_horario(admin_id, 2026, 1, orcamento_segundos=60)
+    assert folgado["otimalidade"] == {"dias_otimos": 31, "dias_interrompidos": []}
+    assert _escalas_geradas() == escalas_sem_limite
+
+    esgotado = gerar_escalas_com_faixas_horario(admin_id, 2026, 1, orcamento_segundos=0)
+    assert esgotado["otimalidade"]["dias_otimos"] < 31
+    assert len(esgotado["otimalidade"]["dias_interrompidos"]) == (
+        31 - esgotado["otimalidade"]["dias_otimos"]
+    )
+    assert esgotado["memo_alocacoes"]["acertos"] == 0
@@ -0,0 +1,115 @@
+import os
+import threading
+
+from models import db, Admin, EscalaDiaria
+from escala_generator import gerar_escalas_com_faixas_horario
+from tarefas import RegistroTarefas
+
+
+def test_tarefa_gera_escalas_e_informa_progresso(app, criar_cenario):
+    admin_id = criar_cenario(10)
+    registro = RegistroTarefas(max_workers=1)
+
+    tarefa, criada = registro.submeter(
+        app, gerar_escalas_com_faixas_horario, admin_id, 2026, 1
+    )
+    tarefa.futuro.result(timeout=30)
+
+    assert criada
+    assert registro.obter(tarefa.id) is tarefa
+    situacao = tarefa.para_dict()
+    assert situacao["estado"] == "concluida"
+    assert situacao["dias_resolvidos"] == situacao["total_dias"] == 31
+    assert situacao["resultado"]["sucesso"]
+    assert situacao["tempo_decorrido_s"] >= 0
+    assert EscalaDiaria.query.count() > 0
+
+
+def test_submissoes_repetidas_usam_a_tarefa_em_andamento(app):
+    registro = RegistroTarefas(max_workers=2)
+    liberar = threading.Event()
+    chamadas = []
+
+    def geracao_lenta(admin_id, ano, mes, progresso=None):
+        chamadas.append((admin_id, ano, mes))
+        liberar.wait(timeout=10)
+        return {"sucesso": True}
+
+    primeira, criada = registro.submeter(app, geracao_lenta, 1, 2026, 1)
+    repetida, criada_de_novo = registro.submeter(app, geracao_lenta, 1, 2026, 1)
+    outro_mes, _ = registro.submeter(app, geracao_lenta, 1, 2026, 2)
+
+    assert criada and not criada_de_novo
+    assert repetida is primeira
+    assert outro_mes is not primeira
+
+    liberar.set()
+    primeira.futuro.result(timeout=10)
+    outro_mes.futuro.result(timeout=10)
+    assert sorted(chamadas) == [(1, 2026, 1), (1, 2026, 2)]
+
+    # Terminada, uma nova submissão inicia outra geração
+    nova, criada = registro.submeter(app, geracao_lenta, 1, 2026, 1)
+    nova.futuro.result(timeout=10)
+    assert criada and nova is not primeira
+
+
+def test_erro_na_geracao_fica_na_tarefa(app):
+    registro = RegistroTarefas(max_workers=1)
+
+    def geracao_com_erro(admin_id, ano, mes, progresso=None):
+        raise Exception("Nenhuma faixa de horário cadastrada")
+
+    tarefa, _ = registro.submeter(app, geracao_com_erro, 1, 2026, 1)
+    tarefa.futuro.result(timeout=10)
+
+    assert tarefa.estado == "erro"
+    assert tarefa.erro == "Nenhuma faixa de horário cadastrada"
+
+
+def test_processos_invalidos_sao_recusados(app_web, cliente_admin):
+    with app_web.app_context():
+        admin = Admin(nome="Admin", email="admin@empresa.com")
+        admin.definir_senha("admin123")
+        db.session.add(admin)
+        db.session.commit()
+        admin_id = admin.id
+    cliente = cliente_admin(admin_id)
+
+    for processos in ["abc", 0, -1, (os.cpu_count() or 1) + 1]:
+        resposta = cliente.post(
+            "/admin/gerar-escala",
+            json={"ano": 2026, "mes": 1, "paralelo": True, "processos": processos},
+        )
+        assert resposta.status_code == 400, processos
+        assert "processos" in resposta.get_json()["erro"]
+
+
+def test_falha_da_busca_local_nao_desfaz_a_geracao(app, criar_cenario, monkeypatch):
+    import busca_local
+
+    def otimizacao_com_erro(*args, **kwargs):
+        raise RuntimeError("busca local interrompida")
+
+    monkeypatch.setattr(busca_local, "otimizar_periodo", otimizacao_com_erro)
+    admin_id = criar_cenario(6)
+    registro = RegistroTarefas(max_workers=1)
+
+    tarefa, _ = registro.submeter(
+        app,
+        gerar_escalas_com_faixas_horario,
+        admin_id,
+        2026,
+        1,
+        otimizacao={"iteracoes": 100},
+    )
+    tarefa.futuro.result(timeout=30)
+
+    # A geração foi gravada; a falha da busca local fica no resultado
+    assert tarefa.estado == "concluida"
+    assert tarefa.resultado["sucesso"]
+    assert tarefa.resultado["busca_local"] == {
+        "sucesso": False,
+        "erro": "busca local interrompida",
+    }
+    assert EscalaDiaria.query.count() > 0
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from visao_calendario import montar_calendario
+
+PRIMEIRO_DIA = date(2026, 1, 12)  # Segunda-feira
+ULTIMO_DIA = date(2026, 2, 11)
+
+
+def _faixa(id, ativo_semana=True, ativo_fds=True):
+    return SimpleNamespace(id=id, ativo_semana=ativo_semana, ativo_fds=ativo_fds)
+
+
+def _escala(id, data, faixa_id):
+    return SimpleNamespace(id=id, data=data, faixa_horario_id=faixa_id)
+
+
+def test_dias_do_periodo():
+    manha = _faixa(1)
+    so_semana = _faixa(2, ativo_fds=False)
+    so_fds = _faixa(3, ativo_semana=False)
+    segunda = PRIMEIRO_DIA
+    sabado = date(2026, 1, 17)
+
+    escalas = [
+        _escala(1, segunda, 1),
+        _escala(2, segunda, 2),
+        _escala(3, segunda, 1),
+        _escala(4, sabado, 3),
+        _escala(5, sabado, 2),  # Faixa inativa no fim de semana: não aparece
+        _escala(6, date(2026, 3, 1), 1),  # Fora do período
+    ]
+    folgas = [SimpleNamespace(id=1, data=sabado)]
+    ferias = [
+        SimpleNamespace(id=1, data_inicio=date(2026, 1, 1), data_fim=date(2026, 1, 13)),
+        SimpleNamespace(id=2, data_inicio=date(2026, 2, 10), data_fim=date(2026, 3, 1)),
+    ]
+    bloqueios = [SimpleNamespace(data=date(2026, 1, 20))]
+
+    calendario = montar_calendario(
+        PRIMEIRO_DIA,
+        ULTIMO_DIA,
+        [manha, so_semana, so_fds],
+        escalas,
+        folgas,
+        ferias,
+        bloqueios,
+        hoje=date(2026, 1, 13),
+    )
+    dias = calendario["dias"]
+
+    # Grade de 6 semanas a partir do domingo anterior ao período
+    semanas = calendario["semanas"]
+    assert len(semanas) == 6 and all(len(semana) == 7 for semana in semanas)
+    assert semanas[0][0] == date(2026, 1, 11)
+    assert semanas[-1][-1] == date(2026, 1, 11) + timedelta(days=41)
+    assert set(dias) == {
+        PRIMEIRO_DIA + timedelta(days=d)
+        for d in range((ULTIMO_DIA - PRIMEIRO_DIA).days + 1)
+    }
+
+    assert dias[segunda]["data_str"] == "2026-01-12"
+    assert [
+        (faixa.id, [escala.id for escala in escalas_faixa])
+        for faixa, escalas_faixa in dias[segunda]["turnos"]
+    ] == [(1, [1, 3]), (2, [2])]
+    assert [
+        (faixa.id, [escala.id for escala in escalas_faixa])
+        for faixa, escalas_faixa in dias[sabado]["turnos"]
+    ] == [(1, []), (3, [4])]
+    assert dias[sabado]["fim_de_semana"] and not dias[segunda]["fim_de_semana"]
+
+    assert [folga.id for folga in dias[sabado]["folgas"]] == [1]
+    assert [
+        data for data, dia in dias.items() if any(f.id == 1 for f in dia["ferias"])
+    ] == [date(2026, 1, 12), date(2026, 1, 13)]
+    assert [
+        data for data, dia in dias.items() if any(f.id == 2 for f in dia["ferias"])
+    ] == [date(2026, 2, 10), date(2026, 2, 11)]
+
+    assert [data for data, dia in dias.items() if dia["bloqueado"]] == [
+        date(2026, 1, 20)
+    ]
+    assert [data for data, dia in dias.items() if dia["hoje"]] == [date(2026, 1, 13)]
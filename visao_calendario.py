@@ -0,0 +1,90 @@
+"""
+Dados do calendário do admin, montados em uma passada sobre as linhas do
+período
+
+O template só percorre a grade e consulta cada dia em montar_calendario()
+["dias"], sem varrer as listas de escalas, folgas, férias e bloqueios a
+cada célula. O custo é proporcional ao número de dias mais o de linhas.
+"""
+
+from datetime import timedelta
+
+# A grade mostra sempre 6 semanas, de domingo a sábado
+SEMANAS_NA_GRADE = 6
+
+
+def grade_do_periodo(primeiro_dia):
+    """Datas da grade, por semana, a partir do domingo anterior ao período"""
+    inicio = primeiro_dia - timedelta(days=(primeiro_dia.weekday() + 1) % 7)
+    return [
+        [inicio + timedelta(days=semana * 7 + d) for d in range(7)]
+        for semana in range(SEMANAS_NA_GRADE)
+    ]
+
+
+def montar_calendario(
+    primeiro_dia,
+    ultimo_dia,
+    faixas,
+    escalas,
+    folgas,
+    ferias,
+    dias_bloqueados,
+    hoje,
+):
+    """
+    Retorna {"semanas": datas da grade por semana, "dias": {data: dia}} com,
+    para cada data do período:
+
+      - data_str ('2026-01-12'), bloqueado, hoje e fim_de_semana
+      - turnos: (faixa, escalas da faixa no dia) das faixas ativas no tipo
+        de dia, na ordem de faixas
+      - folgas e ferias do dia
+
+    Datas da grade fora do período não têm entrada em "dias".
+    """
+    faixas_semana = [faixa for faixa in faixas if faixa.ativo_semana]
+    faixas_fds = [faixa for faixa in faixas if faixa.ativo_fds]
+    bloqueados = {bloqueio.data for bloqueio in dias_bloqueados}
+
+    dias = {}
+    escalas_do_dia = {}
+    data = primeiro_dia
+    while data <= ultimo_dia:
+        fim_de_semana = data.weekday() in [5, 6]
+        escalas_do_dia[data] = {}
+        dias[data] = {
+            "data": data,
+            "data_str": data.strftime("%Y-%m-%d"),
+            "bloqueado": data in bloqueados,
+            "hoje": data == hoje,
+            "fim_de_semana": fim_de_semana,
+            "faixas": faixas_fds if fim_de_semana else faixas_semana,
+            "folgas": [],
+            "ferias": [],
+        }
+        data += timedelta(days=1)
+
+    for escala in escalas:
+        por_faixa = escalas_do_dia.get(escala.data)
+        if por_faixa is not None:
+            por_faixa.setdefault(escala.faixa_horario_id, []).append(escala)
+
+    for folga in folgas:
+        if folga.data in dias:
+            dias[folga.data]["folgas"].append(folga)
+
+    for feria in ferias:
+        data = max(feria.data_inicio, primeiro_dia)
+        fim = min(feria.data_fim, ultimo_dia)
+        while data <= fim:
+            dias[data]["ferias"].append(feria)
+            data += timedelta(days=1)
+
+    for data, dia in dias.items():
+        por_faixa = escalas_do_dia[data]
+        dia["turnos"] = [
+            (faixa, por_faixa.get(faixa.id, [])) for faixa in dia.pop("faixas")
+        ]
+
+    return {"semanas": grade_do_periodo(primeiro_dia), "dias": dias}